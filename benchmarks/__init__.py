@@ -0,0 +1,3 @@
+"""
+Benchmarks and synthetic fixtures for the Storage Assistant.
+"""
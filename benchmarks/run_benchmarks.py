@@ -0,0 +1,152 @@
+"""
+Benchmark harness for the scanner and analysis hot paths.
+
+Usage (from the project root):
+    python -m benchmarks.run_benchmarks --output bench_results.json
+    python -m benchmarks.run_benchmarks --save-baseline
+    python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+from typing import Callable, Dict
+
+from src.core.file_scanner import FileScanner
+from src.core.analysis import filter_files, space_by_extension, find_duplicate_groups
+from src.core.ai_interface import AIInterface
+from src.core.ai_backend import StubBackend
+from benchmarks.tree_generator import generate_tree
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+PROFILES = {
+    "small": {"depth": 2, "width": 4, "files_per_dir": 25},
+    "medium": {"depth": 3, "width": 5, "files_per_dir": 40},
+    "wide": {"depth": 1, "width": 50, "files_per_dir": 100, "max_size": 64 * 1024},
+}
+
+
+def time_it(func: Callable, repeat: int) -> Dict:
+    """Run ``func`` ``repeat`` times and report best/mean wall time in seconds."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return {"best": min(timings), "mean": sum(timings) / len(timings), "result": result}
+
+
+def run_profile(name: str, spec: Dict, repeat: int) -> Dict:
+    root = tempfile.mkdtemp(prefix=f"sa_bench_{name}_")
+    try:
+        manifest = generate_tree(root, **spec)
+        scanner = FileScanner()
+        results = {}
+
+        scan = time_it(lambda: scanner.fast_scan_directory(root), repeat)
+        file_data = scan.pop("result")
+        results["fast_scan_directory"] = dict(scan, files=len(file_data))
+
+        sample = file_data[: min(200, len(file_data))]
+        sample_bytes = sum(f["size"] for f in sample)
+        hashing = time_it(lambda: [scanner.calculate_file_hash(f["path"]) for f in sample], repeat)
+        hashing.pop("result")
+        results["calculate_file_hash"] = dict(
+            hashing, files=len(sample), mb_per_sec=sample_bytes / (1024 * 1024) / max(hashing["best"], 1e-9)
+        )
+
+        dupes = time_it(lambda: find_duplicate_groups(file_data, scanner.calculate_file_hash), repeat)
+        groups = dupes.pop("result")
+        results["find_duplicate_groups"] = dict(dupes, groups=len(groups))
+
+        params = {"extension": ".jpg", "min_size": 4096}
+        filtering = time_it(lambda: filter_files(file_data, params), repeat * 10)
+        filtering.pop("result")
+        results["filter_files"] = filtering
+
+        space = time_it(lambda: space_by_extension(file_data), repeat * 10)
+        space.pop("result")
+        results["analyze_space"] = space
+
+        # Prompt building and parsing against the offline stub; no cache, so every call builds the prompt
+        ai = AIInterface(backend=StubBackend(cache_size=0))
+        ai.add_scan_context(file_data)
+        parsing = time_it(lambda: ai.parse_query("Show me .jpg files larger than 4 KB", file_data), repeat * 10)
+        parsing.pop("result")
+        usage = ai.backend.metrics.summary()["parse_query"]
+        results["parse_query"] = dict(parsing, prompt_tokens=usage["prompt_tokens"] // usage["calls"])
+
+        return {"manifest": {k: v for k, v in manifest.items() if k != "spec"}, "results": results}
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> bool:
+    """Print per-benchmark ratios against the baseline; return False on regression."""
+    ok = True
+    for profile, data in current["profiles"].items():
+        base_profile = baseline.get("profiles", {}).get(profile)
+        if not base_profile:
+            continue
+        for bench, stats in data["results"].items():
+            base = base_profile["results"].get(bench)
+            if not base or not base["best"]:
+                continue
+            ratio = stats["best"] / base["best"]
+            status = "ok"
+            if ratio > 1 + tolerance:
+                status = "REGRESSION"
+                ok = False
+            elif ratio < 1 - tolerance:
+                status = "faster"
+            print(f"{profile:>8} {bench:<24} {stats['best'] * 1000:10.2f} ms  x{ratio:5.2f}  {status}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Storage Assistant benchmarks")
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before flagging a regression")
+    args = parser.parse_args()
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "profiles": {}
+    }
+    for name in args.profiles:
+        print(f"Running profile '{name}'...")
+        report["profiles"][name] = run_profile(name, PROFILES[name], args.repeat)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.tolerance):
+            sys.exit(1)
+    else:
+        print("No baseline found; run with --save-baseline to create one.")
+
+
+if __name__ == "__main__":
+    main()
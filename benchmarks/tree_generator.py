@@ -0,0 +1,99 @@
+"""
+Deterministic synthetic directory trees for benchmarks.
+"""
+import os
+import random
+import argparse
+from typing import Dict, List
+
+EXTENSIONS = [".txt", ".jpg", ".png", ".pdf", ".mp4", ".zip", ".log", ".docx", ".py", ""]
+
+# Size distributions take (rng, params) and return a size in bytes
+SIZE_DISTRIBUTIONS = {
+    "fixed": lambda rng, p: p["mean_size"],
+    "uniform": lambda rng, p: rng.randint(p["min_size"], p["max_size"]),
+    "lognormal": lambda rng, p: int(rng.lognormvariate(p["mu"], p["sigma"])),
+}
+
+DEFAULT_SPEC = {
+    "depth": 3,
+    "width": 4,
+    "files_per_dir": 20,
+    "distribution": "lognormal",
+    "mean_size": 16 * 1024,
+    "min_size": 0,
+    "max_size": 1024 * 1024,
+    "mu": 9.0,
+    "sigma": 1.5,
+    "duplicate_ratio": 0.2,
+    "seed": 42,
+}
+
+
+def _random_bytes(rng: random.Random, size: int) -> bytes:
+    return rng.getrandbits(size * 8).to_bytes(size, "little") if size else b""
+
+
+def generate_tree(root: str, **spec) -> Dict:
+    """Write a tree under ``root`` and return a manifest describing it.
+
+    ``depth`` levels of ``width`` subdirectories each hold ``files_per_dir``
+    files. Sizes follow ``distribution`` (clamped to ``max_size``) and a
+    ``duplicate_ratio`` share of files copy the content of an earlier file.
+    The same spec and seed always produce the same tree.
+    """
+    params = dict(DEFAULT_SPEC, **spec)
+    rng = random.Random(params["seed"])
+    sizer = SIZE_DISTRIBUTIONS[params["distribution"]]
+
+    originals: List[bytes] = []
+    file_count = 0
+    duplicate_count = 0
+    total_bytes = 0
+
+    dirs = [root]
+    for level in range(params["depth"]):
+        dirs += [
+            os.path.join(d, f"dir_{level}_{i}")
+            for d in dirs if d.count(os.sep) - root.count(os.sep) == level
+            for i in range(params["width"])
+        ]
+
+    for directory in dirs:
+        os.makedirs(directory, exist_ok=True)
+        for i in range(params["files_per_dir"]):
+            if originals and rng.random() < params["duplicate_ratio"]:
+                content = rng.choice(originals)
+                duplicate_count += 1
+            else:
+                size = max(0, min(params["max_size"], sizer(rng, params)))
+                content = _random_bytes(rng, size)
+                originals.append(content)
+            ext = rng.choice(EXTENSIONS)
+            with open(os.path.join(directory, f"file_{i}{ext}"), "wb") as f:
+                f.write(content)
+            file_count += 1
+            total_bytes += len(content)
+
+    return {
+        "spec": params,
+        "directories": len(dirs),
+        "files": file_count,
+        "duplicates": duplicate_count,
+        "total_bytes": total_bytes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic directory tree")
+    parser.add_argument("root")
+    for key, value in DEFAULT_SPEC.items():
+        arg_type = type(value) if key != "distribution" else str
+        parser.add_argument(f"--{key.replace('_', '-')}", type=arg_type, default=value)
+    args = parser.parse_args()
+    spec = {k: v for k, v in vars(args).items() if k != "root"}
+    print(generate_tree(args.root, **spec))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,11 @@ from src.gui.app import StorageAssistant
 import ctypes
 import sys
 import os
+import multiprocessing
 
 if __name__ == "__main__":
+    # Required for process pools in the frozen EXE
+    multiprocessing.freeze_support()
     try:
         app = StorageAssistant()
         app.run()
@@ -0,0 +1,156 @@
+import os
+import heapq
+import time
+from typing import Dict, Iterable, List, Optional
+
+AGE_BUCKETS = 14           # <1 day, 1-2, 2-4, ... doubling up to 2^12+ days (~11 years)
+DEFAULT_MIN_AGE_DAYS = 180
+DEFAULT_SUBTREE_DEPTH = 2
+TOP_CANDIDATES = 50
+SECONDS_PER_DAY = 86400
+
+
+def bucket_label(bucket: int) -> str:
+    if bucket == 0:
+        return "<1d"
+    low, high = 2 ** (bucket - 1), 2 ** bucket
+    return f">={low}d" if bucket == AGE_BUCKETS - 1 else f"{low}-{high}d"
+
+
+def age_bucket(age_days: int) -> int:
+    """Log2 bucket of an age in whole days; an integer op, no log() per file."""
+    return min(age_days.bit_length(), AGE_BUCKETS - 1) if age_days > 0 else 0
+
+
+class _Histograms:
+    """Bytes and file counts per age bucket, for last access and last modification."""
+
+    __slots__ = ("access_bytes", "modify_bytes", "access_files", "modify_files", "cold_bytes", "bytes")
+
+    def __init__(self):
+        self.access_bytes = [0] * AGE_BUCKETS
+        self.modify_bytes = [0] * AGE_BUCKETS
+        self.access_files = [0] * AGE_BUCKETS
+        self.modify_files = [0] * AGE_BUCKETS
+        self.cold_bytes = 0
+        self.bytes = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "bytes": self.bytes,
+            "cold_bytes": self.cold_bytes,
+            "access_bytes": self.access_bytes,
+            "modify_bytes": self.modify_bytes,
+            "access_files": self.access_files,
+            "modify_files": self.modify_files,
+        }
+
+
+def subtree_of(path: str, root: str, depth: int) -> str:
+    """The folder ``depth`` levels below ``root`` that contains ``path``."""
+    relative = path[len(root):] if root and path.startswith(root) else os.path.splitdrive(path)[1]
+    parts = [p for p in relative.replace("\\", "/").split("/") if p][:-1][:depth]
+    return os.path.join(root, *parts) if parts else (root or os.sep)
+
+
+def aging_report(
+    file_data: Iterable[Dict],
+    root: str = "",
+    min_age_days: int = DEFAULT_MIN_AGE_DAYS,
+    depth: int = DEFAULT_SUBTREE_DEPTH,
+    top: int = TOP_CANDIDATES,
+    now: Optional[float] = None
+) -> Dict:
+    """Histogram bytes by last access and last modification in one pass.
+
+    Totals are broken down per extension and per directory subtree (``depth``
+    levels below ``root``). A file's idle time is measured from its most
+    recent access or modification, since many volumes do not update atime on
+    every read (NTFS by default, Linux relatime). Files idle for at least
+    ``min_age_days`` are cold; the largest, longest-idle ones are ranked as
+    archive candidates, as are subtrees holding the most cold bytes.
+    """
+    now = now or time.time()
+    root = root.rstrip("\\/")
+    totals = _Histograms()
+    extensions: Dict[str, _Histograms] = {}
+    subtrees: Dict[str, _Histograms] = {}
+    candidates: List = []  # min-heap of (score, path, size, idle_days)
+    subtree_of_dir: Dict[str, _Histograms] = {}  # directory -> its subtree's histograms
+
+    for record in file_data:
+        size = record["size"]
+        modified = record["last_modified"].timestamp()
+        accessed = max(record["last_accessed"].timestamp(), modified)
+        modify_bucket = age_bucket(int((now - modified) // SECONDS_PER_DAY))
+        idle_days = int((now - accessed) // SECONDS_PER_DAY)
+        access_bucket = age_bucket(idle_days)
+
+        directory = os.path.dirname(record["path"])
+        subtree_hist = subtree_of_dir.get(directory)
+        if subtree_hist is None:
+            name = subtree_of(record["path"], root, depth)
+            subtree_hist = subtrees.get(name)
+            if subtree_hist is None:
+                subtree_hist = subtrees[name] = _Histograms()
+            subtree_of_dir[directory] = subtree_hist
+        ext = record["extension"] or "no_extension"
+        ext_hist = extensions.get(ext)
+        if ext_hist is None:
+            ext_hist = extensions[ext] = _Histograms()
+
+        cold = idle_days >= min_age_days
+        for group in (totals, ext_hist, subtree_hist):
+            group.bytes += size
+            group.access_bytes[access_bucket] += size
+            group.access_files[access_bucket] += 1
+            group.modify_bytes[modify_bucket] += size
+            group.modify_files[modify_bucket] += 1
+            if cold:
+                group.cold_bytes += size
+
+        if cold and size:
+            # Bigger and longer idle ranks higher; idle time counts logarithmically
+            score = size * idle_days.bit_length()
+            entry = (score, record["path"], size, idle_days)
+            if len(candidates) < top:
+                heapq.heappush(candidates, entry)
+            elif score > candidates[0][0]:
+                heapq.heapreplace(candidates, entry)
+
+    ranked_subtrees = heapq.nlargest(top, subtrees.items(), key=lambda kv: kv[1].cold_bytes)
+    return {
+        "min_age_days": min_age_days,
+        "buckets": [bucket_label(b) for b in range(AGE_BUCKETS)],
+        "totals": totals.to_dict(),
+        "extensions": {ext: h.to_dict() for ext, h in extensions.items()},
+        "subtrees": {name: h.to_dict() for name, h in subtrees.items()},
+        "archive_files": [
+            {"path": path, "size": size, "idle_days": idle}
+            for _, path, size, idle in sorted(candidates, reverse=True)
+        ],
+        "archive_subtrees": [
+            {"path": name, "cold_bytes": h.cold_bytes, "bytes": h.bytes}
+            for name, h in ranked_subtrees if h.cold_bytes
+        ],
+    }
+
+
+def format_aging(report: Dict, limit: int = 10) -> str:
+    """Readable summary: the access-age histogram, cold share and top candidates."""
+    mb = lambda b: f"{b / (1024 * 1024):.2f} MB"
+    totals = report["totals"]
+    lines = ["Bytes by time since last use:"]
+    for label, size, count in zip(report["buckets"], totals["access_bytes"], totals["access_files"]):
+        if count:
+            lines.append(f"- {label}: {mb(size)} in {count} files")
+    share = totals["cold_bytes"] / totals["bytes"] * 100 if totals["bytes"] else 0.0
+    lines.append(f"Cold (idle {report['min_age_days']}+ days): {mb(totals['cold_bytes'])} ({share:.1f}%)")
+    coldest_ext = sorted(report["extensions"].items(), key=lambda kv: -kv[1]["cold_bytes"])[:limit]
+    lines.append("Extensions with the most cold data:")
+    lines += [f"- {ext}: {mb(h['cold_bytes'])} of {mb(h['bytes'])}" for ext, h in coldest_ext if h["cold_bytes"]]
+    lines.append("Folders to archive first:")
+    lines += [f"- {s['path']}: {mb(s['cold_bytes'])} cold of {mb(s['bytes'])}" for s in report["archive_subtrees"][:limit]]
+    lines.append("Largest cold files:")
+    lines += [f"- {f['path']} ({mb(f['size'])}, idle {f['idle_days']} days)" for f in report["archive_files"][:limit]]
+    return "\n".join(lines)
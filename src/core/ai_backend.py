@@ -0,0 +1,332 @@
+import os
+import re
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+from src.core.context_builder import estimate_tokens, SIZE_UNITS
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+DEFAULT_TIMEOUT = 30.0        # seconds per HTTP attempt
+DEFAULT_MAX_RETRIES = 2       # retried on connection errors, 429 and 5xx with backoff
+CACHE_SIZE = 256              # temperature-0 responses kept
+RECENT_CALLS = 500            # per-call records kept for percentiles
+
+Messages = List[Dict[str, str]]
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class BackendMetrics:
+    """Latency, token and cache accounting per call, totalled per feature.
+
+    ``feature`` names the caller (e.g. "chat", "parse_query") so prompt size
+    and model choice can be compared on what each feature actually costs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = deque(maxlen=RECENT_CALLS)
+            self.features: Dict[str, Dict] = {}
+
+    def record(self, feature: str, model: str, seconds: float, prompt_tokens: int = 0,
+               completion_tokens: int = 0, cached_tokens: int = 0, cache_hit: bool = False,
+               error: Optional[str] = None) -> None:
+        call = {
+            "time": time.time(), "feature": feature, "model": model, "seconds": seconds,
+            "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens, "cache_hit": cache_hit, "error": error,
+        }
+        with self._lock:
+            self.calls.append(call)
+            totals = self.features.get(feature)
+            if totals is None:
+                totals = self.features[feature] = {
+                    "calls": 0, "cache_hits": 0, "errors": 0, "seconds": 0.0,
+                    "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0,
+                }
+            totals["calls"] += 1
+            totals["cache_hits"] += cache_hit
+            totals["errors"] += error is not None
+            totals["seconds"] += seconds
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+            totals["cached_tokens"] += cached_tokens
+
+    def summary(self) -> Dict:
+        """Totals per feature, with latency percentiles over the recent requests that reached the model."""
+        with self._lock:
+            calls = list(self.calls)
+            features = {name: dict(totals) for name, totals in self.features.items()}
+        for name, totals in features.items():
+            latencies = [c["seconds"] for c in calls if c["feature"] == name and not c["cache_hit"]]
+            requests = totals["calls"] - totals["cache_hits"]
+            totals["mean_ms"] = totals["seconds"] / requests * 1000 if requests else 0.0
+            totals["p50_ms"] = _percentile(latencies, 0.5) * 1000
+            totals["p95_ms"] = _percentile(latencies, 0.95) * 1000
+        return features
+
+    def to_json(self) -> str:
+        with self._lock:
+            calls = list(self.calls)
+        return json.dumps({"features": self.summary(), "calls": calls}, indent=2)
+
+
+def format_usage(summary: Dict, backend: str = "") -> str:
+    if not summary:
+        return "No AI calls yet."
+    lines = [f"AI usage ({backend}):" if backend else "AI usage:"]
+    for name, t in sorted(summary.items()):
+        lines.append(
+            f"- {name}: {t['calls']} calls ({t['cache_hits']} cached, {t['errors']} failed), "
+            f"mean {t['mean_ms']:.0f} ms, p95 {t['p95_ms']:.0f} ms, "
+            f"{t['prompt_tokens']} prompt + {t['completion_tokens']} completion tokens"
+            + (f" ({t['cached_tokens']} prompt tokens cached by the server)" if t["cached_tokens"] else "")
+        )
+    return "\n".join(lines)
+
+
+class ChatBackend:
+    """Base class for chat-completion backends.
+
+    Subclasses implement ``_complete``; timing, token accounting and an LRU
+    cache of temperature-0 responses live here. Only deterministic requests
+    are cached, so repeated command parsing over the same scan is free while
+    chat answers are always fresh.
+    """
+
+    name = "base"
+
+    def __init__(self, model: str = DEFAULT_MODEL, cache_size: int = CACHE_SIZE):
+        self.model = model
+        self.cache_size = cache_size
+        self.metrics = BackendMetrics()
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def describe(self) -> str:
+        return f"{self.name}, model {self.model}"
+
+    def complete(self, messages: Messages, temperature: float = 0.3, feature: str = "chat") -> str:
+        """Reply text for ``messages``; raises whatever the backend raises once retries are exhausted."""
+        key = None
+        if temperature == 0 and self.cache_size:
+            key = hashlib.sha1(json.dumps([self.model, messages], sort_keys=True).encode("utf-8")).hexdigest()
+            with self._cache_lock:
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+            if cached is not None:
+                self.metrics.record(feature, self.model, 0.0, cache_hit=True)
+                return cached
+
+        start = time.perf_counter()
+        try:
+            text, usage = self._complete(messages, temperature)
+        except Exception as e:
+            self.metrics.record(feature, self.model, time.perf_counter() - start, error=type(e).__name__)
+            raise
+        self.metrics.record(feature, self.model, time.perf_counter() - start, **usage)
+
+        if key is not None:
+            with self._cache_lock:
+                self._cache[key] = text
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return text
+
+    def _complete(self, messages: Messages, temperature: float) -> Tuple[str, Dict[str, int]]:
+        """``(text, usage)`` where usage has prompt_tokens, completion_tokens and cached_tokens."""
+        raise NotImplementedError
+
+
+_clients: Dict[Tuple, object] = {}
+_clients_lock = threading.Lock()
+
+
+def shared_client(base_url: Optional[str], api_key: Optional[str], timeout: float, max_retries: int):
+    """One OpenAI client per endpoint and settings, shared by every backend that uses it.
+
+    The client keeps a pool of keep-alive HTTP connections, so reusing it
+    saves a TLS handshake per request; retries back off exponentially.
+    """
+    key = (base_url, api_key, timeout, max_retries)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            try:
+                from openai import OpenAI
+            except ImportError:
+                raise ImportError("openai is required for the OpenAI backend (pip install openai)")
+            client = _clients[key] = OpenAI(
+                api_key=api_key, base_url=base_url, timeout=timeout, max_retries=max_retries
+            )
+    return client
+
+
+class OpenAIBackend(ChatBackend):
+    """OpenAI or any OpenAI-compatible server (Azure proxies, vLLM, llama.cpp, Ollama) at ``base_url``."""
+
+    name = "openai"
+
+    def __init__(self, model: str = DEFAULT_MODEL, base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 timeout: float = DEFAULT_TIMEOUT, max_retries: int = DEFAULT_MAX_RETRIES,
+                 cache_size: int = CACHE_SIZE):
+        super().__init__(model, cache_size)
+        self.base_url = base_url
+        # Local servers usually ignore the key, but the client insists on one
+        api_key = api_key or os.getenv("OPENAI_API_KEY") or ("unused" if base_url else None)
+        self.client = shared_client(base_url, api_key, timeout, max_retries)
+
+    def describe(self) -> str:
+        return f"{self.name} at {self.base_url or 'api.openai.com'}, model {self.model}"
+
+    def _complete(self, messages: Messages, temperature: float) -> Tuple[str, Dict[str, int]]:
+        response = self.client.chat.completions.create(model=self.model, messages=messages, temperature=temperature)
+        text = (response.choices[0].message.content or "").strip()
+        usage = response.usage
+        if usage is None:
+            # Some compatible servers omit usage; estimate so totals stay comparable
+            return text, {
+                "prompt_tokens": sum(estimate_tokens(m["content"]) for m in messages),
+                "completion_tokens": estimate_tokens(text),
+            }
+        details = getattr(usage, "prompt_tokens_details", None)
+        return text, {
+            "prompt_tokens": usage.prompt_tokens or 0,
+            "completion_tokens": usage.completion_tokens or 0,
+            "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+        }
+
+
+# Keywords the stub maps to actions, checked in order
+STUB_ACTIONS = [
+    ("delete", "delete"),
+    ("remove", "delete"),
+    ("similar", "find_similar_images"),
+    ("undo", "undo_link_duplicates"),
+    ("hard link", "link_duplicates"),
+    ("duplicate", "find_duplicates"),
+    ("chunk", "analyze_chunks"),
+    ("junk", "analyze_junk"),
+    ("cache", "analyze_junk"),
+    ("compress", "estimate_compression"),
+    ("cold", "analyze_aging"),
+    ("unused", "analyze_aging"),
+    ("snapshot", "save_snapshot"),
+    ("changed", "diff_snapshots"),
+    ("export", "export"),
+    ("throttle", "set_io_limits"),
+    ("search", "search"),
+    ("where is", "search"),
+    ("space", "analyze_space"),
+]
+
+
+class StubBackend(ChatBackend):
+    """Deterministic offline backend for tests and benchmarks.
+
+    Command prompts get a JSON command picked by keyword, with an extension
+    and a minimum size when the query names them; chat prompts get a reply
+    quoting the question. Token counts are estimated from the text, and
+    ``latency`` (seconds) can stand in for a network round trip.
+    """
+
+    name = "stub"
+
+    def __init__(self, model: str = "stub", latency: float = 0.0, cache_size: int = CACHE_SIZE):
+        super().__init__(model, cache_size)
+        self.latency = latency
+
+    def command(self, query: str) -> Dict:
+        text = query.lower()
+        action = next((action for keyword, action in STUB_ACTIONS if keyword in text), "list")
+        parameters: Dict = {}
+        extension = re.search(r"(?<![\w/\\])\.([a-z0-9]{1,6})\b", text)
+        if extension:
+            parameters["extension"] = "." + extension.group(1)
+        size = re.search(r"(\d+(?:\.\d+)?)\s*(tb|gb|mb|kb)\b", text)
+        if size:
+            parameters["min_size"] = int(float(size.group(1)) * SIZE_UNITS[size.group(2)])
+        if action == "search":
+            parameters = {"query": re.sub(r"^(?:search(?: for)?|where is)\s+", "", text).strip(" ?")}
+        return {"action": action, "parameters": parameters}
+
+    def _complete(self, messages: Messages, temperature: float) -> Tuple[str, Dict[str, int]]:
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = messages[-1]["content"]
+        query = re.search(r'^Query: "(.*)"$', prompt, re.MULTILINE)
+        if query and "JSON" in prompt:
+            text = json.dumps(self.command(query.group(1)))
+        else:
+            context_tokens = sum(estimate_tokens(m["content"]) for m in messages[:-1])
+            text = f"[stub] {prompt.strip()} ({context_tokens} tokens of context)"
+        return text, {
+            "prompt_tokens": sum(estimate_tokens(m["content"]) for m in messages),
+            "completion_tokens": estimate_tokens(text),
+        }
+
+
+def create_backend(kind: Optional[str] = None, model: Optional[str] = None) -> ChatBackend:
+    """Backend configured by the environment (or ``.env``).
+
+    ``AI_BACKEND`` is ``openai`` (default) or ``stub``; ``AI_BASE_URL``
+    points the OpenAI backend at a compatible server; ``AI_MODEL``,
+    ``AI_TIMEOUT`` and ``AI_MAX_RETRIES`` tune it.
+    """
+    kind = (kind or os.getenv("AI_BACKEND") or "openai").lower()
+    model = model or os.getenv("AI_MODEL")
+    if kind == "stub":
+        return StubBackend(model or "stub")
+    if kind != "openai":
+        raise ValueError(f"Unknown AI backend: {kind}")
+    return OpenAIBackend(
+        model=model or DEFAULT_MODEL,
+        base_url=os.getenv("AI_BASE_URL") or None,
+        timeout=float(os.getenv("AI_TIMEOUT") or DEFAULT_TIMEOUT),
+        max_retries=int(os.getenv("AI_MAX_RETRIES") or DEFAULT_MAX_RETRIES),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time chat completions against the configured AI backend")
+    parser.add_argument("prompts", nargs="+", help="Prompts to send")
+    parser.add_argument("--backend", help="openai or stub (default: AI_BACKEND or openai)")
+    parser.add_argument("--model", help="Model name (default: AI_MODEL)")
+    parser.add_argument("--repeat", type=int, default=3, help="Times each prompt is sent")
+    parser.add_argument("--temperature", type=float, default=0.3,
+                        help="0 makes repeats cache hits, measuring the cache instead of the model")
+    parser.add_argument("--json", action="store_true", help="Print per-call records as JSON")
+    args = parser.parse_args()
+
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+    backend = create_backend(args.backend, args.model)
+    for prompt in args.prompts:
+        for _ in range(args.repeat):
+            try:
+                backend.complete([{"role": "user", "content": prompt}], args.temperature, feature="cli")
+            except Exception as e:
+                print(f"Error: {str(e)}")
+    print(backend.metrics.to_json() if args.json else format_usage(backend.metrics.summary(), backend.describe()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,119 +1,108 @@
-from openai import OpenAI
 import os
+import hashlib
 from dotenv import load_dotenv
-from typing import Dict, List
+from typing import Dict, List, Optional
 import json
 from src.core.history import QueryHistory
+from src.core.scan_index import ScanIndex
+from src.core.junk_rules import JUNK_CATEGORIES
+from src.core.context_builder import ContextBuilder
+from src.core.ai_backend import ChatBackend, create_backend
+from src.utils.paths import app_data_dir
+
+# Actions parse_query may return, with the parameters each one understands
+COMMAND_ACTIONS = {
+    "list": "extension (e.g. \".pdf\"), min_size (bytes), folder, category (junk category)",
+    "delete": "extension, min_size (bytes), folder, category (junk category, e.g. temp_files)",
+    "search": "query (part of a file or folder name; typos are tolerated), limit (default 20)",
+    "find_duplicates": "none",
+    "link_duplicates": "none (replaces confirmed duplicate copies with hard links)",
+    "undo_link_duplicates": "journal (optional, defaults to the latest link run)",
+    "find_similar_images": "max_distance (0-16 bits, default 6; lower is stricter)",
+    "analyze_chunks": "min_size (bytes; only files at least this large are chunked, default 8 MB)",
+    "analyze_space": "none",
+    "analyze_junk": f"none (caches, build outputs and other junk in categories: {', '.join(JUNK_CATEGORIES)})",
+    "estimate_compression": "method (zlib or lzma, default zlib), budget_mb (total MB to sample, default 64)",
+    "analyze_aging": "min_age_days (idle days before a file counts as cold, default 180), depth (folder levels, default 2)",
+    "save_snapshot": "name (optional)",
+    "diff_snapshots": "old (snapshot name, defaults to the previous one), new (snapshot name, defaults to the current scan)",
+    "export": "format (parquet, arrow, csv or ndjson; default csv), name (optional file name, saved in the exports folder)",
+    "set_io_limits": "bytes_per_sec, ops_per_sec (0 for unlimited), background (true for low priority), memory_mb (RAM for scan records before spilling to disk)",
+    "show_ai_usage": "none (latency, tokens and cache hits of AI calls so far)",
+}
 
 class AIInterface:
-    def __init__(self):
+    def __init__(self, backend: Optional[ChatBackend] = None):
+        """``backend`` defaults to the one configured by the environment; see ``create_backend``."""
         load_dotenv()
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.history = QueryHistory()
+        self.backend = backend if backend is not None else create_backend()
+        self.history = QueryHistory(path=os.path.join(app_data_dir(), "history.json"))
         self.conversation_context = []
         self.current_scan_data = None
+        self.scan_index = ScanIndex()
+        self.context_builder = ContextBuilder(self.scan_index)
+        self.snapshot_names: List[str] = []
+        self.diff_summary = ""
 
-    def add_scan_context(self, file_data: List[Dict]):
-        """Summarize scan results and store them as system context."""
-        if not file_data:
-            # Truncate for token safety
-            top_files = sorted(file_data, key=lambda f: f['size'], reverse=True)[:10]
-            top_exts = {}
-            for f in file_data:
-                ext = f.get("extension", "unknown")
-                top_exts[ext] = top_exts.get(ext, 0) + f.get("size", 0)
+    def scope_history(self, root: str) -> None:
+        """Keep a separate chat history per scanned root, so one root's turns are not replayed for another."""
+        key = hashlib.sha1(os.path.normcase(root).encode("utf-8")).hexdigest()[:16]
+        self.history.switch(os.path.join(app_data_dir("history"), key + ".json"))
 
-            top_exts_str = "\n".join([f"{ext}: {size / 1e6:.2f} MB" for ext, size in sorted(top_exts.items(), key=lambda x: -x[1])[:5]])
-            top_file_str = "\n".join([f"{f['path']} ({f['size'] / 1e6:.2f} MB)" for f in top_files])
-
-            self.conversation_context = [{
-                "role": "system",
-                "content": f"""
-            You are a smart storage assistant.
-            Here's the current scan data:
-
-            Top file extensions by total size:
-            {top_exts_str}
-
-            Top 10 largest files:
-            {top_file_str}
-
-            Only answer based on this scan data.
-            """
-            }]
-
-            return
+    def add_scan_context(self, file_data: List[Dict], index: Optional[ScanIndex] = None):
+        """Index scan results and store a budgeted summary as system context.
 
+        ``index`` is an index already built over ``file_data`` (e.g. while scanning).
+        """
         self.current_scan_data = file_data
-        total_size_bytes = sum(f.get("size", 0) for f in file_data)
-        total_size_gb = total_size_bytes / (1024 ** 3)
-        extensions = list({f.get("extension", "") for f in file_data if f.get("extension")})
-        sample_paths = [f.get("path") for f in file_data[:3]]
+        self.scan_index = index if index is not None else ScanIndex(file_data)
+        self.context_builder = ContextBuilder(self.scan_index)
 
         system_prompt = (
             "You are a helpful AI assistant that helps users manage files on their computer.\n"
-            f"Scan Summary:\n"
-            f"- Total files: {len(file_data)}\n"
-            f"- Total size: {total_size_gb:.2f} GB\n"
-            f"- Common extensions: {', '.join(extensions[:5]) or 'None'}\n"
-            f"- Sample paths: {json.dumps(sample_paths, indent=2)}\n"
+            "Scan Summary:\n"
+            f"{self.context_builder.build(max_tokens=500)}\n"
             "Provide helpful responses or actions based on this scan."
         )
 
         self.conversation_context = [{"role": "system", "content": system_prompt}]
 
     def chat_query(self, message: str) -> str:
-        """Send a chat query with real-time scan data injected for deeper context."""
+        """Send a chat query with scan data relevant to the question injected."""
         try:
             # Fallback if no scan data available
             if not self.current_scan_data:
                 fallback_context = [
                     {"role": "system", "content": "You are a filesystem assistant, but no scan data is currently available."},
+                    *self.history.context_messages(),
                     {"role": "user", "content": message}
                 ]
-                response = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=fallback_context,
-                    temperature=0.3
-                )
-                return response.choices[0].message.content.strip()
-
-            # Process scan data for injection
-            file_data = self.current_scan_data
-            top_files = sorted(file_data, key=lambda f: f['size'], reverse=True)[:10]
-            
-            ext_summary = {}
-            for f in file_data:
-                ext = f.get("extension", "unknown")
-                ext_summary[ext] = ext_summary.get(ext, 0) + f.get("size", 0)
-            top_exts = sorted(ext_summary.items(), key=lambda x: -x[1])[:5]
-
-            # Format for context
-            extension_breakdown = "\n".join([f"- {ext}: {size / 1e6:.2f} MB" for ext, size in top_exts])
-            file_breakdown = "\n".join([f"- {f['path']} ({f['size'] / 1e6:.2f} MB)" for f in top_files])
+                answer = self.backend.complete(fallback_context, temperature=0.3, feature="chat")
+                self.history.log_chat(message, answer)
+                return answer
+
+            # Retrieve only the rows and aggregates the question refers to
+            scan_context = self.context_builder.build(message)
 
             messages = [
                 {
                     "role": "system",
                     "content": (
                         "You are a smart desktop file assistant. The following file scan has been loaded:\n\n"
-                        f"📦 **Total files**: {len(file_data)}\n"
-                        f"💾 **Top extensions by space**:\n{extension_breakdown}\n\n"
-                        f"📁 **Top 10 largest files**:\n{file_breakdown}\n\n"
-                        "Answer the user’s request using only the context above."
+                        f"{scan_context}\n\n"
+                        + (f"Changes since the last snapshot:\n{self.diff_summary}\n\n" if self.diff_summary else "")
+                        + "Answer the user’s request using only the context above."
                     )
                 },
+                # Earlier turns, summarized to fit the history budget
+                *self.history.context_messages(),
                 {"role": "user", "content": message}
             ]
 
             # Make the request
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                temperature=0.3
-            )
-
-            return response.choices[0].message.content.strip()
+            answer = self.backend.complete(messages, temperature=0.3, feature="chat")
+            self.history.log_chat(message, answer)
+            return answer
 
         except Exception as e:
             return f"⚠️ Error during AI query: {str(e)}"
@@ -121,10 +110,14 @@ class AIInterface:
     def parse_query(self, query: str, file_data: List[Dict]) -> Dict:
         """Convert a natural language query into a structured file operation command."""
         try:
+            if file_data is self.current_scan_data:
+                index = self.scan_index
+            else:
+                index = ScanIndex(file_data)
             context = {
-                "file_count": len(file_data),
-                "total_size_mb": sum(f["size"] for f in file_data) / (1024 * 1024),
-                "extensions": list({f.get("extension", "") for f in file_data})
+                "file_count": index.file_count,
+                "total_size_mb": index.total_size / (1024 * 1024),
+                "extensions": ContextBuilder(index).extension_list()
             }
 
             prompt = (
@@ -132,25 +125,28 @@ class AIInterface:
                 f"Context:\n"
                 f"- Files: {context['file_count']}\n"
                 f"- Total size: {context['total_size_mb']:.2f} MB\n"
-                f"- Extensions: {', '.join(context['extensions'])}\n\n"
+                f"- Extensions: {context['extensions']}\n"
+                f"- Snapshots: {', '.join(self.snapshot_names[:10]) or 'none'}\n\n"
                 f"Query: \"{query}\"\n"
-                "Respond with a JSON object:\n"
+                "Available actions and their parameters:\n"
+                + "".join(f"- {action}: {params}\n" for action, params in COMMAND_ACTIONS.items())
+                + "Any action that works on files also takes folder (a path, absolute or relative to the "
+                "scanned folder) to limit it to that subtree.\n"
+                + "Respond with a JSON object:\n"
                 "{\n"
-                "  \"action\": \"list|delete|find_duplicates|analyze_space\",\n"
+                f"  \"action\": \"{'|'.join(COMMAND_ACTIONS)}\",\n"
                 "  \"parameters\": { ... }\n"
                 "}"
             )
 
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
+            raw_content = self.backend.complete(
+                [
                     {"role": "system", "content": "You turn user file queries into structured JSON commands."},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0
+                temperature=0,
+                feature="parse_query"
             )
-
-            raw_content = response.choices[0].message.content.strip()
             command_json = json.loads(raw_content)
             return command_json
 
@@ -0,0 +1,146 @@
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.core.scan_index import path_key, subtree_bounds
+
+
+def filter_files(file_data: List[Dict], params: Dict) -> List[Dict]:
+    """Filter files based on command parameters; always a new list, never ``file_data`` itself."""
+    filtered = file_data
+    if "extension" in params:
+        filtered = [f for f in filtered if f["extension"] == params["extension"]]
+    if "min_size" in params:
+        filtered = [f for f in filtered if f["size"] >= params["min_size"]]
+    if params.get("folder"):
+        filtered = under_folder(filtered, params["folder"])
+    return filtered if filtered is not file_data else list(file_data)
+
+
+def under_folder(file_data: List[Dict], folder: str) -> List[Dict]:
+    """Files below ``folder`` by a linear scan; ScanIndex.records_under does the same by bisect."""
+    low, high = subtree_bounds(folder)
+    return [f for f in file_data if low <= path_key(f["path"]) < high]
+
+
+def group_by_size(file_data: List[Dict]) -> Dict[int, List[Dict]]:
+    """Group files by size for duplicate detection."""
+    size_groups: Dict[int, List[Dict]] = {}
+    for file in file_data:
+        size_groups.setdefault(file["size"], []).append(file)
+    return size_groups
+
+
+def unique_files(file_data: Iterable[Dict]) -> Iterator[Dict]:
+    """Records with hard links to a file already seen left out, so its data is counted once."""
+    seen = set()
+    for file in file_data:
+        file_id = file.get("file_id")
+        if file_id is not None:
+            if file_id in seen:
+                continue
+            seen.add(file_id)
+        yield file
+
+
+def space_by_extension(file_data: List[Dict]) -> Tuple[int, Dict[str, Dict]]:
+    """Return the total size and per-extension count/size/allocated size/percentage.
+
+    Counts are per path; sizes count hard-linked data once.
+    """
+    totals: Dict[str, List[int]] = {}
+    total_size = 0
+    seen = set()
+    for file in file_data:
+        ext = file["extension"] or "no_extension"
+        entry = totals.get(ext)
+        if entry is None:
+            entry = totals[ext] = [0, 0, 0]
+        entry[0] += 1
+        file_id = file.get("file_id")
+        if file_id is not None:
+            if file_id in seen:
+                continue
+            seen.add(file_id)
+        entry[1] += file["size"]
+        entry[2] += file.get("allocated_size", file["size"])
+        total_size += file["size"]
+
+    stats = {
+        ext: {
+            "count": count,
+            "total_size": size,
+            "allocated_size": allocated,
+            "percentage": size / total_size * 100 if total_size else 0.0
+        }
+        for ext, (count, size, allocated) in totals.items()
+    }
+    return total_size, stats
+
+
+def reclaimable_bytes(group: List[Dict]) -> int:
+    """Space freed by deleting all but one file of a duplicate set.
+
+    A file with other hard links frees nothing when one path is deleted, so
+    such a file is the one kept when there is one.
+    """
+    single = sum(1 for file in group if file.get("links", 1) <= 1)
+    if single == len(group):
+        single -= 1
+    return group[0]["size"] * single
+
+
+def find_duplicate_groups(
+    file_data: List[Dict],
+    hash_func: Callable[[str], str],
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    order_key: Optional[Callable[[Dict], object]] = None,
+    hash_cache=None
+) -> List[List[Dict]]:
+    """Find byte-identical files: bucket by size, then hash only the collisions.
+
+    Hashes are stored in each record's ``hash`` field. ``progress_callback``
+    receives ``(processed, total)`` after each hashed file. ``order_key``
+    sorts the reads across all size buckets, e.g. into on-disk order to cut
+    seeks on spinning disks. ``hash_cache`` (e.g. a ``HashCheckpoint``)
+    supplies hashes finished by an interrupted run and records new ones.
+
+    Hard links to one file are a single identity: it is hashed once, its other
+    paths get the same hash, and only its first path appears in the groups, so
+    links are never reported as duplicates of each other.
+    """
+    links: Dict[Tuple[int, int], List[Dict]] = {}
+    unique: List[Dict] = []
+    for file in file_data:
+        file_id = file.get("file_id")
+        if file_id is not None:
+            paths = links.get(file_id)
+            if paths is not None:
+                paths.append(file)
+                continue
+            links[file_id] = [file]
+        unique.append(file)
+    candidates = [file for size, files in group_by_size(unique).items() if size > 0 and len(files) > 1 for file in files]
+    if order_key:
+        candidates.sort(key=order_key)
+    total = len(candidates)
+    by_content: Dict[Tuple[int, str], List[Dict]] = {}
+
+    for processed, file in enumerate(candidates, 1):
+        cached = hash_cache.get(file) if hash_cache is not None else None
+        if cached:
+            file["hash"] = cached
+        else:
+            try:
+                file["hash"] = hash_func(file["path"])
+            except OSError:
+                file["hash"] = ""
+            if hash_cache is not None and file["hash"]:
+                hash_cache.put(file, file["hash"])
+        if file.get("file_id") is not None:
+            for link in links[file["file_id"]][1:]:
+                link["hash"] = file["hash"]
+        if progress_callback:
+            progress_callback(processed, total)
+        if file["hash"]:
+            by_content.setdefault((file["size"], file["hash"]), []).append(file)
+
+    return [group for group in by_content.values() if len(group) > 1]
@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from src.utils.paths import app_data_dir
+
+CHECKPOINT_VERSION = 2
+CHECKPOINT_INTERVAL = 30.0  # seconds between checkpoints of a running scan
+HASH_FLUSH_EVERY = 256      # hashed files between hash-job flushes
+CHECKPOINT_MAX_AGE = 7 * 24 * 3600  # seconds before an interrupted scan is too stale to resume
+
+
+def _root_key(root: str) -> str:
+    return os.path.normcase(os.path.abspath(root))
+
+
+def _checkpoint_dir(root: str) -> str:
+    key = hashlib.sha1(_root_key(root).encode("utf-8")).hexdigest()[:16]
+    return app_data_dir("checkpoints", key)
+
+
+def _write_json(path: str, data: Dict) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ScanCheckpoint:
+    """On-disk progress of one root's traversal so it can resume after a cancel or crash.
+
+    Records are appended to ``records.jsonl`` as the scan goes; ``state.json``
+    holds the traversal frontier (the directory stack), the counters and the
+    byte offset of the records file at the moment it was written. Everything
+    popped off the stack before that point is complete, so resuming means
+    truncating the records file to the saved offset and continuing with the
+    saved stack. No per-directory set has to be kept, so a checkpoint costs
+    one fsync'd append plus a rewrite of the (small) frontier.
+    """
+
+    def __init__(self, root: str, interval: float = CHECKPOINT_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self.directory = _checkpoint_dir(root)
+        self.state_path = os.path.join(self.directory, "state.json")
+        self.records_path = os.path.join(self.directory, "records.jsonl")
+        self.logger = logging.getLogger(__name__)
+        self.last_saved = time.monotonic()
+        self.persisted = 0  # number of in-memory results already on disk
+        self._records_file = None
+
+    def load(self) -> Optional[Dict]:
+        """The saved state for this root, or None if there is nothing to resume.
+
+        Checkpoints older than ``CHECKPOINT_MAX_AGE`` are deleted rather than
+        resumed, since the files they describe have likely changed since.
+        """
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Compare like the directory key does, so another spelling of the root still matches
+        if state.get("version") != CHECKPOINT_VERSION or _root_key(state.get("root", "")) != _root_key(self.root):
+            return None
+        if expired(state):
+            self.logger.info(f"Discarding stale scan checkpoint for {self.root}")
+            self.clear()
+            return None
+        return state
+
+    def iter_records(self, state: Dict) -> Iterator[Dict]:
+        """Stream the records saved up to ``state``; anything written after it is discarded."""
+        self.persisted = 0
+        with open(self.records_path, "r+b") as f:
+            f.truncate(state["records_offset"])
+            for line in f:
+                path, size, mtime, atime, allocated, links, file_id = json.loads(line)
+                self.persisted += 1
+                yield {
+                    "path": path,
+                    "size": size,
+                    "last_modified": datetime.fromtimestamp(mtime),
+                    "last_accessed": datetime.fromtimestamp(atime),
+                    "extension": os.path.splitext(path)[1].lower(),
+                    "hash": "",
+                    "allocated_size": allocated,
+                    "links": links,
+                    "file_id": tuple(file_id) if file_id else None
+                }
+
+    def due(self) -> bool:
+        return time.monotonic() - self.last_saved >= self.interval
+
+    def save(self, stack: List[str], results: List[Dict], counters: Dict) -> None:
+        """Append results not yet on disk, then record the frontier that goes with them."""
+        try:
+            if self._records_file is None:
+                self._records_file = open(self.records_path, "ab")
+            f = self._records_file
+            f.writelines(
+                (json.dumps([r["path"], r["size"], r["last_modified"].timestamp(),
+                             r["last_accessed"].timestamp(), r.get("allocated_size", r["size"]),
+                             r.get("links", 1), r.get("file_id")]) + "\n").encode("utf-8")
+                for r in results[self.persisted:]
+            )
+            f.flush()
+            os.fsync(f.fileno())
+            self.persisted = len(results)
+            _write_json(self.state_path, {
+                "version": CHECKPOINT_VERSION,
+                "root": self.root,
+                "updated": time.time(),
+                "stack": stack,
+                "records_offset": f.tell(),
+                **counters
+            })
+        except OSError as e:
+            self.logger.warning(f"Could not write scan checkpoint for {self.root}: {str(e)}")
+        self.last_saved = time.monotonic()
+
+    def close(self) -> None:
+        if self._records_file is not None:
+            self._records_file.close()
+            self._records_file = None
+
+    def clear(self) -> None:
+        """Forget the checkpoint once the scan has completed, or before one starts without resuming."""
+        self.close()
+        self.persisted = 0
+        for path in (self.state_path, self.records_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class HashCheckpoint:
+    """Hashes finished so far by a duplicate search, keyed on path, size and mtime.
+
+    Lines are appended and flushed every ``HASH_FLUSH_EVERY`` files, so an
+    interrupted job loses at most that many hashes.
+    """
+
+    def __init__(self, root: str):
+        self.path = os.path.join(_checkpoint_dir(root), "hashes.jsonl")
+        self.entries: Dict[str, List] = {}
+        self.logger = logging.getLogger(__name__)
+        self.pending = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        path, size, mtime, digest = json.loads(line)
+                    except ValueError:
+                        break  # torn final line after a crash
+                    self.entries[path] = [size, mtime, digest]
+        except OSError:
+            pass
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, record: Dict) -> Optional[str]:
+        entry = self.entries.get(record["path"])
+        if entry and entry[0] == record["size"] and entry[1] == int(record["last_modified"].timestamp()):
+            return entry[2]
+        return None
+
+    def put(self, record: Dict, digest: str) -> None:
+        entry = [record["size"], int(record["last_modified"].timestamp()), digest]
+        self.entries[record["path"]] = entry
+        self._file.write(json.dumps([record["path"], *entry]) + "\n")
+        self.pending += 1
+        if self.pending >= HASH_FLUSH_EVERY:
+            self.flush()
+
+    def flush(self) -> None:
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except OSError as e:
+            self.logger.warning(f"Could not write hash checkpoint: {str(e)}")
+        self.pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+    def clear(self) -> None:
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def expired(state: Dict) -> bool:
+    return time.time() - state.get("updated", 0) > CHECKPOINT_MAX_AGE
+
+
+def resumable_roots() -> List[Dict]:
+    """States of all interrupted scans recent enough to resume."""
+    states = []
+    base = app_data_dir("checkpoints")
+    for key in os.listdir(base):
+        try:
+            with open(os.path.join(base, key, "state.json"), "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not expired(state):
+            states.append(state)
+    return states
+
+
+def discard(root: str) -> None:
+    shutil.rmtree(_checkpoint_dir(root), ignore_errors=True)
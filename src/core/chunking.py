@@ -0,0 +1,168 @@
+import os
+import random
+import shutil
+import struct
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+MIN_CHUNK = 16 * 1024
+AVG_CHUNK_BITS = 16  # ~64 KiB average chunk
+MAX_CHUNK = 256 * 1024
+MIN_FILE_SIZE = 8 * 1024 * 1024  # only large files are worth chunking
+READ_SIZE = 1024 * 1024
+GEAR_WINDOW = 64  # a 64-bit gear hash only depends on the last 64 bytes
+
+# Fixed seed so chunk boundaries are stable across runs and processes
+_rng = random.Random(0x5A5A)
+GEAR = [_rng.getrandbits(64) for _ in range(256)]
+MASK64 = (1 << 64) - 1
+
+CHUNK_RECORD = struct.Struct("<QI")  # 8-byte digest, chunk size
+
+
+def iter_chunks(
+    f,
+    min_size: int = MIN_CHUNK,
+    avg_bits: int = AVG_CHUNK_BITS,
+    max_size: int = MAX_CHUNK
+) -> Iterator[Tuple[int, int]]:
+    """Yield ``(digest, size)`` for content-defined chunks of a binary stream.
+
+    Boundaries come from a Gear rolling hash. Hashing starts just before
+    ``min_size`` into each chunk (the skipped bytes cannot influence a
+    64-byte window), which saves most of the per-byte work. At most one
+    chunk plus one read buffer is held in memory.
+    """
+    mask = ((1 << avg_bits) - 1) << (64 - avg_bits)  # test the high, well-mixed bits
+    gear = GEAR
+    buffer = bytearray()
+    start = 0
+    eof = False
+    while True:
+        if not eof and len(buffer) - start < max_size:
+            data = f.read(READ_SIZE)
+            if data:
+                # Drop consumed bytes before growing so the buffer stays ~1 read + 1 chunk
+                del buffer[:start]
+                start = 0
+                buffer += data
+                continue
+            eof = True
+        available = len(buffer) - start
+        if not available:
+            return
+
+        limit = start + min(available, max_size)
+        cut = limit
+        if limit - start > min_size:
+            h = 0
+            for i in range(start + min_size - GEAR_WINDOW, limit):
+                h = ((h << 1) + gear[buffer[i]]) & MASK64
+                if not h & mask:
+                    cut = i + 1
+                    break
+        digest = int.from_bytes(hashlib.blake2b(buffer[start:cut], digest_size=8).digest(), "little")
+        yield digest, cut - start
+        start = cut
+
+
+def chunk_file(path: str) -> Tuple[str, bytes, Optional[str]]:
+    """Chunk one file; returns packed ``CHUNK_RECORD`` entries (worker-safe)."""
+    try:
+        with open(path, "rb") as f:
+            packed = bytearray()
+            for digest, size in iter_chunks(f):
+                packed += CHUNK_RECORD.pack(digest, size)
+        return path, bytes(packed), None
+    except OSError as e:
+        return path, b"", str(e)
+
+
+class ChunkIndex:
+    """Chunk digests spilled to disk, partitioned by the digest's top byte.
+
+    Each chunk costs 12 bytes on disk and nothing in memory beyond a small
+    write buffer per partition; ``summarize`` then dedups one partition at a
+    time, so peak memory is about 1/256 of the full digest set.
+    """
+
+    PARTITIONS = 256
+    FLUSH_BYTES = 64 * 1024
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = tempfile.mkdtemp(prefix="sa_chunks_", dir=directory)
+        self.buffers = [bytearray() for _ in range(self.PARTITIONS)]
+
+    def add_packed(self, packed: bytes) -> None:
+        for offset in range(0, len(packed), CHUNK_RECORD.size):
+            record = packed[offset:offset + CHUNK_RECORD.size]
+            part = record[7]  # top byte of the little-endian digest
+            buffer = self.buffers[part]
+            buffer += record
+            if len(buffer) >= self.FLUSH_BYTES:
+                self._flush(part)
+
+    def _flush(self, part: int) -> None:
+        with open(os.path.join(self.directory, f"{part:02x}.bin"), "ab") as f:
+            f.write(self.buffers[part])
+        self.buffers[part].clear()
+
+    def summarize(self) -> Dict:
+        for part in range(self.PARTITIONS):
+            if self.buffers[part]:
+                self._flush(part)
+        totals = {"chunks": 0, "unique_chunks": 0, "total_bytes": 0, "unique_bytes": 0}
+        for part in range(self.PARTITIONS):
+            path = os.path.join(self.directory, f"{part:02x}.bin")
+            if not os.path.exists(path):
+                continue
+            seen = set()
+            with open(path, "rb") as f:
+                data = f.read()
+            for digest, size in CHUNK_RECORD.iter_unpack(data):
+                totals["chunks"] += 1
+                totals["total_bytes"] += size
+                if digest not in seen:
+                    seen.add(digest)
+                    totals["unique_chunks"] += 1
+                    totals["unique_bytes"] += size
+        totals["saveable_bytes"] = totals["total_bytes"] - totals["unique_bytes"]
+        return totals
+
+    def close(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def analyze_chunks(
+    file_data: List[Dict],
+    min_file_size: int = MIN_FILE_SIZE,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    workers: Optional[int] = None
+) -> Dict:
+    """Estimate bytes saved by chunk-level dedup across large files.
+
+    Files are chunked in parallel in a process pool and each file's digests
+    are streamed into a disk-backed ``ChunkIndex`` as soon as it finishes.
+    """
+    candidates = [f for f in file_data if f["size"] >= min_file_size]
+    total = len(candidates)
+    index = ChunkIndex()
+    errors = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Largest first so one huge file does not finish last on its own
+            paths = [f["path"] for f in sorted(candidates, key=lambda f: -f["size"])]
+            for done, (path, packed, error) in enumerate(pool.map(chunk_file, paths), 1):
+                if error:
+                    errors += 1
+                index.add_packed(packed)
+                if progress_callback:
+                    progress_callback(done, total)
+        summary = index.summarize()
+    finally:
+        index.close()
+    summary["files"] = total
+    summary["errors"] = errors
+    return summary
@@ -0,0 +1,191 @@
+import lzma
+import math
+import zlib
+import bisect
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.core.aging import subtree_of, DEFAULT_SUBTREE_DEPTH
+
+DEFAULT_BUDGET = 64 * 1024 * 1024  # total bytes read across all files
+BLOCK_SIZE = 64 * 1024
+Z_95 = 1.96
+DEFAULT_WORKERS = 8
+
+COMPRESSORS = {
+    "zlib": lambda data: zlib.compress(data, 6),
+    "lzma": lambda data: lzma.compress(data, preset=1),
+}
+
+
+def _sample_file(path: str, offsets: List[int], method: str) -> Tuple[str, List[float], int]:
+    """Compression ratios of the blocks at ``offsets`` (worker; zlib/lzma release the GIL)."""
+    compress = COMPRESSORS[method]
+    ratios = []
+    read = 0
+    try:
+        with open(path, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                block = f.read(BLOCK_SIZE)
+                if not block:
+                    continue
+                read += len(block)
+                ratios.append(min(1.0, len(compress(block)) / len(block)))
+    except OSError:
+        pass
+    return path, ratios, read
+
+
+class _Estimate:
+    __slots__ = ("bytes", "ratios")
+
+    def __init__(self):
+        self.bytes = 0
+        self.ratios: List[float] = []
+
+    def to_dict(self) -> Dict:
+        n = len(self.ratios)
+        if not n:
+            return {"bytes": self.bytes, "samples": 0}
+        mean = sum(self.ratios) / n
+        if n > 1:
+            variance = sum((r - mean) ** 2 for r in self.ratios) / (n - 1)
+            half_width = Z_95 * math.sqrt(variance / n)
+        else:
+            half_width = 1.0  # one sample says little about a whole group
+        low_ratio = max(0.0, mean - half_width)
+        high_ratio = min(1.0, mean + half_width)
+        return {
+            "bytes": self.bytes,
+            "samples": n,
+            "ratio": mean,
+            "savings": self.bytes * (1 - mean),
+            "savings_low": self.bytes * (1 - high_ratio),
+            "savings_high": self.bytes * (1 - low_ratio),
+        }
+
+
+def _stratified(overall: Dict, strata: List[Dict]) -> Dict:
+    """Overall estimate as the sum of per-extension estimates.
+
+    Stratifying removes the noise of how many samples happened to land in
+    each extension; extensions nobody sampled fall back to the pooled ratio.
+    """
+    if not overall["samples"]:
+        return overall
+    savings = 0.0
+    variance = 0.0
+    for e in strata:
+        if e["samples"]:
+            savings += e["savings"]
+            variance += ((e["savings_high"] - e["savings_low"]) / (2 * Z_95)) ** 2
+        else:
+            savings += e["bytes"] * (1 - overall["ratio"])
+    half_width = Z_95 * math.sqrt(variance)
+    return {
+        **overall,
+        "ratio": 1 - savings / overall["bytes"],
+        "savings": savings,
+        "savings_low": max(0.0, savings - half_width),
+        "savings_high": min(overall["bytes"], savings + half_width),
+    }
+
+
+def estimate_compressibility(
+    file_data: List[Dict],
+    budget: int = DEFAULT_BUDGET,
+    method: str = "zlib",
+    root: str = "",
+    depth: int = DEFAULT_SUBTREE_DEPTH,
+    workers: int = DEFAULT_WORKERS,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    seed: Optional[int] = None
+) -> Dict:
+    """Estimate compression savings from a fixed read budget.
+
+    Sample positions are drawn uniformly over all bytes of the scan, so each
+    file is sampled in proportion to its size and the mean block ratio of a
+    group estimates that group's byte-weighted ratio. Savings per extension
+    and per subtree come with 95% confidence bounds from the spread of the
+    block ratios. Blocks of one file are read in offset order, files in
+    parallel.
+    """
+    files = [f for f in file_data if f["size"] > 0]
+    total_bytes = sum(f["size"] for f in files)
+    if not total_bytes:
+        return {"method": method, "budget": budget, "bytes_read": 0, "overall": _Estimate().to_dict(),
+                "extensions": {}, "subtrees": {}}
+
+    cumulative = []
+    running = 0
+    for f in files:
+        running += f["size"]
+        cumulative.append(running)
+    rng = random.Random(seed)
+    samples = max(1, budget // BLOCK_SIZE)
+    offsets: Dict[int, List[int]] = {}
+    for _ in range(samples):
+        position = rng.randrange(total_bytes)
+        i = bisect.bisect_right(cumulative, position)
+        start = cumulative[i] - files[i]["size"]
+        # Align so a block never runs past the end of a file that is large enough to hold it
+        offset = min(position - start, max(0, files[i]["size"] - BLOCK_SIZE))
+        offsets.setdefault(i, []).append(offset)
+
+    overall = _Estimate()
+    extensions: Dict[str, _Estimate] = {}
+    subtrees: Dict[str, _Estimate] = {}
+    group_of = {}
+    for i, f in enumerate(files):
+        ext = extensions.setdefault(f["extension"] or "no_extension", _Estimate())
+        subtree = subtrees.setdefault(subtree_of(f["path"], root.rstrip("\\/"), depth), _Estimate())
+        overall.bytes += f["size"]
+        ext.bytes += f["size"]
+        subtree.bytes += f["size"]
+        group_of[f["path"]] = (ext, subtree)
+
+    bytes_read = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        jobs = [pool.submit(_sample_file, files[i]["path"], sorted(o), method) for i, o in offsets.items()]
+        for done, job in enumerate(jobs, 1):
+            path, ratios, read = job.result()
+            bytes_read += read
+            ext, subtree = group_of[path]
+            for group in (overall, ext, subtree):
+                group.ratios.extend(ratios)
+            if progress_callback:
+                progress_callback(done, len(jobs))
+
+    by_extension = {k: e.to_dict() for k, e in extensions.items()}
+    return {
+        "method": method,
+        "budget": budget,
+        "bytes_read": bytes_read,
+        "overall": _stratified(overall.to_dict(), list(by_extension.values())),
+        "extensions": by_extension,
+        "subtrees": {k: e.to_dict() for k, e in subtrees.items()},
+    }
+
+
+def format_compressibility(report: Dict, limit: int = 10) -> str:
+    mb = lambda b: f"{b / (1024 * 1024):.2f} MB"
+
+    def line(name, e):
+        return (f"- {name}: save ~{mb(e['savings'])} of {mb(e['bytes'])} "
+                f"(95%: {mb(e['savings_low'])}-{mb(e['savings_high'])}, {e['samples']} samples)")
+
+    overall = report["overall"]
+    lines = [f"Sampled {mb(report['bytes_read'])} with {report['method']}."]
+    if not overall["samples"]:
+        return lines[0]
+    lines.append(line("Overall", overall))
+    for title, key in (("By extension:", "extensions"), ("By folder:", "subtrees")):
+        ranked = sorted(
+            ((k, e) for k, e in report[key].items() if e["samples"]),
+            key=lambda kv: -kv[1]["savings"]
+        )[:limit]
+        lines.append(title)
+        lines += [line(k, e) for k, e in ranked]
+    return "\n".join(lines)
@@ -0,0 +1,176 @@
+import re
+from typing import Dict, List, Optional, Set
+
+from src.core.scan_index import ScanIndex
+
+DEFAULT_CONTEXT_TOKENS = 1500
+
+SIZE_UNITS = {"b": 1, "kb": 1024, "mb": 1024 ** 2, "gb": 1024 ** 3, "tb": 1024 ** 4}
+
+# Plain-language words that stand for a family of extensions
+EXTENSION_GROUPS = {
+    "image": {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".webp", ".heic"},
+    "photo": {".jpg", ".jpeg", ".png", ".heic", ".raw", ".cr2", ".nef"},
+    "video": {".mp4", ".mkv", ".avi", ".mov", ".wmv", ".webm", ".m4v"},
+    "audio": {".mp3", ".wav", ".flac", ".aac", ".ogg", ".m4a"},
+    "music": {".mp3", ".wav", ".flac", ".aac", ".ogg", ".m4a"},
+    "document": {".pdf", ".doc", ".docx", ".txt", ".odt", ".rtf", ".xls", ".xlsx", ".ppt", ".pptx"},
+    "archive": {".zip", ".rar", ".7z", ".tar", ".gz", ".bz2", ".xz", ".iso"},
+    "installer": {".exe", ".msi", ".dmg", ".pkg"},
+    "temporary": {".tmp", ".temp", ".bak", ".old", ".log"},
+}
+
+STOPWORDS = {
+    "the", "and", "for", "with", "files", "file", "show", "list", "find", "what",
+    "which", "where", "that", "than", "are", "all", "any", "from", "into", "about",
+    "larger", "smaller", "bigger", "over", "under", "more", "less", "most", "space",
+    "using", "taking", "biggest", "largest", "me", "my", "in", "of", "is", "a",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def format_size(size: int) -> str:
+    return f"{size / (1024 * 1024):.2f} MB"
+
+
+class ContextBuilder:
+    """Build prompt context from a ScanIndex within a fixed token budget."""
+
+    def __init__(self, index: ScanIndex, max_tokens: int = DEFAULT_CONTEXT_TOKENS):
+        self.index = index
+        self.max_tokens = max_tokens
+
+    def parse_terms(self, question: str) -> Dict:
+        """Pull extensions, size bounds and path terms out of a question."""
+        text = question.lower()
+        extensions: Set[str] = set()
+        for match in re.finditer(r"(?<![\w/\\])\.?([a-z0-9]{1,6})\b", text):
+            ext = "." + match.group(1)
+            if ext in self.index.extension_totals and match.group(1) not in STOPWORDS:
+                extensions.add(ext)
+        for word, group in EXTENSION_GROUPS.items():
+            if re.search(rf"\b{word}s?\b", text):
+                extensions.update(group)
+
+        min_size: Optional[int] = None
+        max_size: Optional[int] = None
+        for match in re.finditer(
+            r"(?:(larger|bigger|greater|more|over|above|>|smaller|less|under|below|<)(?:\s+than)?)?\s*"
+            r"(\d+(?:\.\d+)?)\s*(tb|gb|mb|kb|b)\b",
+            text
+        ):
+            qualifier, value, unit = match.groups()
+            size = int(float(value) * SIZE_UNITS[unit])
+            if qualifier in ("smaller", "less", "under", "below", "<"):
+                max_size = size
+            else:
+                min_size = size
+
+        quoted = r"[\"']([^\"']+)[\"']"
+        path_terms: List[str] = re.findall(quoted, question)
+        # Unquoted paths, from the rest of the question so quoted ones are not picked up twice
+        unquoted = re.sub(quoted, " ", question)
+        for token in re.findall(r"\S*[\\/]\S*", unquoted):
+            token = token.rstrip("?!,;:").strip("\"'")
+            if len(token) > 1:
+                path_terms.append(token)
+        components = [
+            w for w in re.findall(r"[a-z0-9_\-]{3,}", text)
+            if w not in STOPWORDS and self.index.rows_for_component(w)
+        ]
+
+        return {
+            "extensions": extensions,
+            "min_size": min_size,
+            "max_size": max_size,
+            "path_terms": path_terms,
+            "components": components,
+        }
+
+    def matching_rows(self, terms: Dict) -> Optional[Set[int]]:
+        """Intersect the index lookups for ``terms``; ``None`` means no filter."""
+        candidates: Optional[Set[int]] = None
+
+        def narrow(rows: Set[int]):
+            nonlocal candidates
+            candidates = set(rows) if candidates is None else candidates & rows
+
+        if terms["extensions"]:
+            rows: Set[int] = set()
+            for ext in terms["extensions"]:
+                rows |= self.index.rows_for_extension(ext)
+            narrow(rows)
+        if terms["min_size"] is not None or terms["max_size"] is not None:
+            narrow(self.index.rows_in_size_range(terms["min_size"] or 0, terms["max_size"]))
+        for component in terms["components"]:
+            narrow(self.index.rows_for_component(component))
+        for term in terms["path_terms"]:
+            narrow(self.index.rows_matching_path(term.strip("\\/\"'")))
+        return candidates
+
+    def build(self, question: str = "", max_tokens: Optional[int] = None) -> str:
+        """Render scan context relevant to ``question`` without exceeding the budget."""
+        budget = max_tokens or self.max_tokens
+        lines: List[str] = []
+        used = 0
+
+        def emit(line: str) -> bool:
+            nonlocal used
+            cost = estimate_tokens(line)
+            if used + cost > budget:
+                return False
+            lines.append(line)
+            used += cost
+            return True
+
+        emit(f"Total files: {self.index.file_count}")
+        emit(f"Total size: {self.index.total_size / (1024 ** 3):.2f} GB")
+
+        terms = self.parse_terms(question) if question else None
+        rows = self.matching_rows(terms) if terms else None
+
+        if rows is not None:
+            matched_size = sum(self.index.rows[r]["size"] for r in rows)
+            emit(f"Files matching the question: {len(rows)} ({format_size(matched_size)})")
+            for ext in sorted(terms["extensions"]):
+                count, size = self.index.extension_totals.get(ext, (0, 0))
+                if count:
+                    emit(f"- {ext}: {count} files, {format_size(size)} in total")
+
+        # Leave two thirds of the remaining budget for the file listing
+        ext_budget = used + (budget - used) // 3
+        emit("Top extensions by total size:")
+        for ext, count, size in self.index.top_extensions():
+            if used >= ext_budget or not emit(f"- {ext or 'no_extension'}: {count} files, {format_size(size)}"):
+                break
+
+        emit("Largest matching files:" if rows is not None else "Largest files:")
+        shown = 0
+        total = self.index.file_count if rows is None else len(rows)
+        for record in self.index.largest(rows):
+            if not emit(f"- {record['path']} ({format_size(record['size'])})"):
+                break
+            shown += 1
+        if shown < total:
+            lines.append(f"... and {total - shown} more files not shown")
+
+        return "\n".join(lines)
+
+    def extension_list(self, max_tokens: int = 200) -> str:
+        """Comma-separated extensions ordered by bytes, truncated to the budget."""
+        parts: List[str] = []
+        used = 0
+        for ext, _, _ in self.index.top_extensions():
+            if not ext:
+                continue
+            cost = estimate_tokens(ext + ", ")
+            if used + cost > max_tokens:
+                parts.append("...")
+                break
+            parts.append(ext)
+            used += cost
+        return ", ".join(parts)
@@ -0,0 +1,200 @@
+import os
+import csv
+import json
+import argparse
+from typing import Dict, Iterable, List, Optional
+
+ROW_GROUP_SIZE = 65536
+FIELDS = ["path", "size", "last_modified", "last_accessed", "extension", "hash", "allocated_size", "links"]
+FORMATS = {
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".csv": "csv",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+}
+
+
+class RecordExporter:
+    """Base class for streaming exporters.
+
+    Records are buffered into row groups of ``row_group_size`` and handed to
+    ``_write_rows``, so memory stays bounded however many files are exported.
+    Per-extension aggregates are kept as records pass through and written
+    next to the export as ``<path>.aggregates.json`` on ``close``; they count
+    the data of hard-linked files once.
+    """
+
+    def __init__(self, path: str, row_group_size: int = ROW_GROUP_SIZE):
+        self.path = path
+        self.row_group_size = row_group_size
+        self.rows: List[Dict] = []
+        self.files = 0
+        self.total_size = 0
+        self.extensions: Dict[str, List[int]] = {}
+        self.identities = set()
+
+    def write(self, record: Dict) -> None:
+        self.rows.append(record)
+        self.files += 1
+        size = record["size"]
+        file_id = record.get("file_id")
+        if file_id is not None:
+            if file_id in self.identities:
+                size = 0
+            self.identities.add(file_id)
+        self.total_size += size
+        ext = record["extension"] or "no_extension"
+        entry = self.extensions.get(ext)
+        if entry is None:
+            entry = self.extensions[ext] = [0, 0]
+        entry[0] += 1
+        entry[1] += size
+        if len(self.rows) >= self.row_group_size:
+            self.flush()
+
+    def write_all(self, records: Iterable[Dict]) -> None:
+        for record in records:
+            self.write(record)
+
+    def flush(self) -> None:
+        if self.rows:
+            self._write_rows(self.rows)
+            self.rows = []
+
+    def aggregates(self) -> Dict:
+        return {
+            "files": self.files,
+            "total_size": self.total_size,
+            "extensions": {
+                ext: {"count": count, "total_size": size}
+                for ext, (count, size) in sorted(self.extensions.items(), key=lambda kv: -kv[1][1])
+            },
+        }
+
+    def close(self) -> None:
+        self.flush()
+        self._close()
+        with open(self.path + ".aggregates.json", "w", encoding="utf-8") as f:
+            json.dump(self.aggregates(), f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_rows(self, rows: List[Dict]) -> None:
+        raise NotImplementedError
+
+    def _close(self) -> None:
+        pass
+
+
+def _text_row(record: Dict) -> List:
+    # datetimes are not JSON-serializable; ISO 8601 keeps them readable and sortable
+    return [
+        record["path"],
+        record["size"],
+        record["last_modified"].isoformat(),
+        record["last_accessed"].isoformat(),
+        record["extension"],
+        record.get("hash", ""),
+        record.get("allocated_size", record["size"]),
+        record.get("links", 1),
+    ]
+
+
+class NDJSONExporter(RecordExporter):
+    def __init__(self, path: str, row_group_size: int = ROW_GROUP_SIZE):
+        super().__init__(path, row_group_size)
+        self.file = open(path, "w", encoding="utf-8")
+
+    def _write_rows(self, rows: List[Dict]) -> None:
+        self.file.writelines(json.dumps(dict(zip(FIELDS, _text_row(r)))) + "\n" for r in rows)
+
+    def _close(self) -> None:
+        self.file.close()
+
+
+class CSVExporter(RecordExporter):
+    def __init__(self, path: str, row_group_size: int = ROW_GROUP_SIZE):
+        super().__init__(path, row_group_size)
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(FIELDS)
+
+    def _write_rows(self, rows: List[Dict]) -> None:
+        self.writer.writerows(_text_row(r) for r in rows)
+
+    def _close(self) -> None:
+        self.file.close()
+
+
+class ArrowExporter(RecordExporter):
+    """Parquet or Arrow IPC (Feather v2) via pyarrow, one row group per batch."""
+
+    def __init__(self, path: str, row_group_size: int = ROW_GROUP_SIZE, parquet: bool = True):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("pyarrow is required for Parquet/Arrow export (pip install pyarrow)")
+        super().__init__(path, row_group_size)
+        self.pa = pa
+        self.schema = pa.schema([
+            ("path", pa.string()),
+            ("size", pa.int64()),
+            ("last_modified", pa.timestamp("us")),
+            ("last_accessed", pa.timestamp("us")),
+            ("extension", pa.string()),
+            ("hash", pa.string()),
+            ("allocated_size", pa.int64()),
+            ("links", pa.int32()),
+        ])
+        if parquet:
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        else:
+            self.writer = pa.ipc.new_file(path, self.schema)
+
+    def _write_rows(self, rows: List[Dict]) -> None:
+        columns = {name: [r.get(name, "") for r in rows] for name in FIELDS[:6]}
+        columns["allocated_size"] = [r.get("allocated_size", r["size"]) for r in rows]
+        columns["links"] = [r.get("links", 1) for r in rows]
+        self.writer.write_table(self.pa.Table.from_pydict(columns, schema=self.schema))
+
+    def _close(self) -> None:
+        self.writer.close()
+
+
+def open_exporter(path: str, fmt: Optional[str] = None, row_group_size: int = ROW_GROUP_SIZE) -> RecordExporter:
+    """Exporter for ``fmt``, or for the format implied by the file extension."""
+    fmt = fmt or FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt == "parquet":
+        return ArrowExporter(path, row_group_size, parquet=True)
+    if fmt == "arrow":
+        return ArrowExporter(path, row_group_size, parquet=False)
+    if fmt == "csv":
+        return CSVExporter(path, row_group_size)
+    if fmt == "ndjson":
+        return NDJSONExporter(path, row_group_size)
+    raise ValueError(f"Unknown export format for {path}; use one of {', '.join(sorted(set(FORMATS.values())))}")
+
+
+def main():
+    from src.core.file_scanner import FileScanner
+    parser = argparse.ArgumentParser(description="Scan a directory and stream the records to a file")
+    parser.add_argument("root")
+    parser.add_argument("output", help="Output path; .parquet, .arrow, .csv or .ndjson")
+    parser.add_argument("--format", choices=sorted(set(FORMATS.values())))
+    parser.add_argument("--row-group-size", type=int, default=ROW_GROUP_SIZE)
+    args = parser.parse_args()
+
+    with open_exporter(args.output, args.format, args.row_group_size) as exporter:
+        FileScanner().fast_scan_directory(args.root, record_callback=exporter.write, collect=False)
+    print(json.dumps({k: v for k, v in exporter.aggregates().items() if k != "extensions"}))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,22 +3,76 @@ import hashlib
 import struct
 from datetime import datetime
 from typing import Dict, List, Optional, Callable
-import win32file
-import win32con
 import queue
 import logging
 import time
 import threading
+from contextlib import nullcontext
+
+from src.core.scan_metrics import ScanMetrics
+from src.core.io_scheduler import IOScheduler, HASH_BLOCK_SIZE
+from src.core.checkpoint import ScanCheckpoint
+
+try:
+    import win32file
+    import win32con
+    from src.utils.windows_api import USN_RECORD, FSCTL_QUERY_USN_JOURNAL, FSCTL_ENUM_USN_DATA, is_ntfs_drive
+except ImportError:
+    # Non-Windows hosts (benchmarks, CI) fall back to the os.scandir backend
+    win32file = None
+    win32con = None
+
+FILE_ATTRIBUTE_SPARSE_FILE = 0x200
+FILE_ATTRIBUTE_COMPRESSED = 0x800
+DEFAULT_CLUSTER_SIZE = 4096
+# Directory names never descended into, at any depth
+SKIP_DIRS = frozenset({"Windows", "Program Files", "Program Files (x86)", "System Volume Information"})
+
+
+def _cluster_size(path: str) -> int:
+    """Allocation unit of the volume holding ``path``."""
+    try:
+        import ctypes
+        sectors, sector_bytes, free, total = (ctypes.c_ulong() for _ in range(4))
+        root = os.path.splitdrive(os.path.abspath(path))[0] + "\\"
+        if ctypes.windll.kernel32.GetDiskFreeSpaceW(
+            root, ctypes.byref(sectors), ctypes.byref(sector_bytes), ctypes.byref(free), ctypes.byref(total)
+        ):
+            return sectors.value * sector_bytes.value or DEFAULT_CLUSTER_SIZE
+    except (AttributeError, OSError):
+        pass
+    return DEFAULT_CLUSTER_SIZE
+
+
+def _compressed_file_size(path: str) -> Optional[int]:
+    """On-disk size of a compressed or sparse file, or None if it cannot be read."""
+    try:
+        import ctypes
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.GetCompressedFileSizeW.restype = ctypes.c_ulong
+        high = ctypes.c_ulong()
+        low = kernel32.GetCompressedFileSizeW(path, ctypes.byref(high))
+        if low == 0xFFFFFFFF and ctypes.get_last_error():
+            return None
+        return (high.value << 32) + low
+    except (AttributeError, OSError):
+        return None
 
-from src.utils.windows_api import USN_RECORD, FSCTL_QUERY_USN_JOURNAL, FSCTL_ENUM_USN_DATA, is_ntfs_drive
 
 class FileScanner:
     def __init__(self):
         self.file_cache: Dict[str, Dict] = {}
         self.logger = logging.getLogger(__name__)
         self.scan_cancelled = False
+        self.scan_failed = False  # set when the last scan stopped on an unexpected error
         self.log_queue = queue.Queue()
         self.current_queries = []
+        self.metrics = ScanMetrics()
+        # Optional semaphore shared by scanners on the same volume to cap concurrent directory I/O
+        self.io_budget: Optional[threading.Semaphore] = None
+        # Optional rate limits, adaptive backoff and background priority
+        self.io_scheduler: Optional[IOScheduler] = None
+        self._cluster_sizes: Dict[int, int] = {}  # volume serial -> bytes per cluster
         
     def get_usn_journal_data(self, drive: str) -> List[Dict]:
         """Read the USN Journal for fast file enumeration."""
@@ -90,14 +144,7 @@ class FileScanner:
                                 file_path = os.path.join(drive, file_name)
                                 stats = os.stat(file_path)
                                 
-                                results.append({
-                                    "path": file_path,
-                                    "size": stats.st_size,
-                                    "last_modified": datetime.fromtimestamp(stats.st_mtime),
-                                    "last_accessed": datetime.fromtimestamp(stats.st_atime),
-                                    "extension": os.path.splitext(file_name)[1].lower(),
-                                    "hash": ""  # We'll calculate this only if needed
-                                })
+                                results.append(self.build_record(file_path, stats))
                             except:
                                 # Skip files we can't access
                                 pass
@@ -125,85 +172,241 @@ class FileScanner:
         if self.scan_cancelled:
             return ""
         self.logger.debug(f"Calculating hash for: {file_path}")
+        start = time.perf_counter()
+        hashed_bytes = 0
         sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                if self.scan_cancelled:
-                    return ""
-                sha256_hash.update(byte_block)
+        scheduler = self.io_scheduler
+        try:
+            with scheduler.background_priority() if scheduler else nullcontext(), open(file_path, "rb") as f:
+                while True:
+                    read_start = time.perf_counter()
+                    byte_block = f.read(HASH_BLOCK_SIZE)
+                    if not byte_block:
+                        break
+                    if scheduler:
+                        # Charged after the read so the bucket sees actual bytes
+                        scheduler.observe("read", time.perf_counter() - read_start)
+                        scheduler.acquire(nbytes=len(byte_block))
+                    if self.scan_cancelled:
+                        return ""
+                    sha256_hash.update(byte_block)
+                    hashed_bytes += len(byte_block)
+        except OSError as e:
+            self.metrics.record_error(e)
+            raise
+        self.metrics.record_hash(hashed_bytes, time.perf_counter() - start)
         return sha256_hash.hexdigest()
     
-    def fast_scan_directory(self, directory: str, progress_callback=None, log_callback=None) -> List[Dict]:
-        """Fast directory scanning using win32file.FindFilesIterator."""
+    def _list_directory(self, directory: str):
+        """Yield ``(name, is_dir)`` for each entry, using FindFilesIterator on Windows."""
+        if win32file is not None:
+            for file_info in win32file.FindFilesIterator(os.path.join(directory, "*")):
+                file_name = file_info[8]
+                # Skip . and .. directories
+                if file_name in (".", ".."):
+                    continue
+                yield file_name, bool(file_info[0] & win32con.FILE_ATTRIBUTE_DIRECTORY)
+        else:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    yield entry.name, entry.is_dir(follow_symlinks=False)
+
+    def build_record(self, full_path: str, stats: os.stat_result) -> Dict:
+        """Build the scan record for a file from its stat result.
+
+        ``file_id`` is the (volume serial, file index) pair, kept only for
+        files with more than one hard link since only those can share their
+        data with another path; aggregates and duplicate hashing count each
+        identity once.
+        """
+        links = stats.st_nlink
+        return {
+            "path": full_path,
+            "size": stats.st_size,
+            "last_modified": datetime.fromtimestamp(stats.st_mtime),
+            "last_accessed": datetime.fromtimestamp(stats.st_atime),
+            "extension": os.path.splitext(full_path)[1].lower(),
+            "hash": "",  # We'll calculate this only if needed
+            "allocated_size": self.allocated_size(full_path, stats),
+            "links": links,
+            "file_id": (stats.st_dev, stats.st_ino) if links > 1 else None
+        }
+
+    def allocated_size(self, full_path: str, stats: os.stat_result) -> int:
+        """Bytes the file occupies on disk, as opposed to its logical size."""
+        blocks = getattr(stats, "st_blocks", None)
+        if blocks is not None:
+            return blocks * 512
+        # Windows: compressed and sparse files report their real allocation, everything
+        # else is rounded up to whole clusters (tiny files resident in the MFT are overcounted)
+        attributes = getattr(stats, "st_file_attributes", 0)
+        if attributes & (FILE_ATTRIBUTE_COMPRESSED | FILE_ATTRIBUTE_SPARSE_FILE):
+            allocated = _compressed_file_size(full_path)
+            if allocated is not None:
+                return allocated
+        cluster = self._cluster_sizes.get(stats.st_dev)
+        if cluster is None:
+            cluster = self._cluster_sizes[stats.st_dev] = _cluster_size(full_path)
+        return -(-stats.st_size // cluster) * cluster
+
+    def fast_scan_directory(
+        self,
+        directory: str,
+        progress_callback=None,
+        log_callback=None,
+        checkpoint: Optional[ScanCheckpoint] = None,
+        record_callback: Optional[Callable[[Dict], None]] = None,
+        collect: bool = True,
+        results=None
+    ) -> List[Dict]:
+        """Fast directory scanning using win32file.FindFilesIterator (os.scandir elsewhere).
+
+        With a ``checkpoint``, progress is saved periodically and when the scan
+        is cancelled, and a saved checkpoint for the same root is resumed.
+        ``record_callback`` receives each record as soon as it is built; with
+        ``collect=False`` records are only streamed and an empty list is
+        returned, keeping memory flat (checkpoints need collected results).
+        ``results`` replaces the list records are collected into, e.g. a
+        ``SpillingCollector`` that moves them to disk past a memory budget;
+        it is what gets returned.
+        """
         # Reset state for a new scan
         self.scan_cancelled = False
-        results = []
+        self.scan_failed = False
+        self.metrics.reset()
+        metrics = self.metrics
+        scheduler = self.io_scheduler
+        results = results if results is not None else []
         total_size = 0
         processed_files = 0
-        skip_dirs = {"Windows", "Program Files", "Program Files (x86)", "System Volume Information"}
+        if not collect:
+            checkpoint = None
+        skip_dirs = SKIP_DIRS
 
         try:
-            # Get total file count first, excluding skipped directories
-            total_files = 0
-            for root, dirs, files in os.walk(directory):
-                # Remove skipped directories from traversal
-                dirs[:] = [d for d in dirs if d not in skip_dirs]
-                total_files += len(files)
-            
-            if log_callback:
-                log_callback(f"Found {total_files} files to scan")
-            
-            # Use a stack for iterative traversal instead of recursion
-            stack = [directory]
+            state = checkpoint.load() if checkpoint else None
+            if state:
+                # Stream saved records straight into the sink so a resumed
+                # scan spills past its memory budget like a fresh one
+                for record in checkpoint.iter_records(state):
+                    results.append(record)
+                    if record_callback:
+                        record_callback(record)
+                processed_files = checkpoint.persisted
+                total_files = state["total_files"]
+                total_size = state["total_size"]
+                stack = state["stack"]
+                if log_callback:
+                    log_callback(f"Resuming from checkpoint: {processed_files}/{total_files} files already scanned")
+            else:
+                if checkpoint:
+                    # Records left by an unresumable checkpoint must not be appended to
+                    checkpoint.clear()
+                # Get total file count first, excluding skipped directories
+                total_files = 0
+                with metrics.phase("count"):
+                    walker = os.walk(directory)
+                    while True:
+                        # Each step lists one directory, so it takes the volume's I/O budget like the scan does
+                        with self.io_budget or nullcontext():
+                            step = next(walker, None)
+                        if step is None:
+                            break
+                        _, dirs, files = step
+                        # Remove skipped directories from traversal
+                        dirs[:] = [d for d in dirs if d not in skip_dirs]
+                        total_files += len(files)
+
+                if log_callback:
+                    log_callback(f"Found {total_files} files to scan")
+
+                # Use a stack for iterative traversal instead of recursion
+                stack = [directory]
+            save_checkpoint = lambda: checkpoint.save(
+                stack, results, {"total_files": total_files, "total_size": total_size}
+            )
             while stack and not self.scan_cancelled:
                 current_dir = stack.pop()
-                dir_name = os.path.basename(current_dir)
-                
+
                 try:
-                    pattern = os.path.join(current_dir, "*")
-                    for file_info in win32file.FindFilesIterator(pattern):
-                        file_name = file_info[8]
-                        file_attrs = file_info[0]
-                        # Skip . and .. directories
-                        if file_name in (".", ".."):
-                            continue
-                        full_path = os.path.join(current_dir, file_name)
-                        if file_attrs & win32con.FILE_ATTRIBUTE_DIRECTORY:
-                            # Skip directories in skip_dirs
-                            if file_name in skip_dirs:
+                    with self.io_budget or nullcontext(), \
+                            scheduler.background_priority() if scheduler else nullcontext():
+                        if scheduler:
+                            scheduler.acquire()
+                        dir_start = time.perf_counter()
+                        entries = list(self._list_directory(current_dir))
+                        listed = time.perf_counter()
+                        if scheduler:
+                            scheduler.acquire(ops=len(entries))
+                        stat_start = time.perf_counter()
+                        metrics.add_time("enumerate", listed - dir_start)
+                        for file_name, is_dir in entries:
+                            full_path = os.path.join(current_dir, file_name)
+                            if is_dir:
+                                # Skip directories in skip_dirs
+                                if file_name in skip_dirs:
+                                    continue
+                                stack.append(full_path)
+                                continue
+                            try:
+                                stats = os.stat(full_path)
+                                file_size = stats.st_size
+                                total_size += file_size
+                                metrics.files_visited += 1
+                                metrics.bytes_stat += file_size
+                                record = self.build_record(full_path, stats)
+                                if collect:
+                                    results.append(record)
+                                if record_callback:
+                                    record_callback(record)
+                                processed_files += 1
+                                if processed_files % 100 == 0:
+                                    if log_callback:
+                                        progress_msg = f"Processed {processed_files}/{total_files} files ({(processed_files/total_files)*100:.1f}%)"
+                                        size_msg = f"Current total size: {total_size/(1024*1024):.2f} MB"
+                                        log_callback(progress_msg)
+                                        log_callback(size_msg)
+                                    if progress_callback:
+                                        progress_callback(processed_files / total_files * 100)
+                            except (PermissionError, FileNotFoundError) as e:
+                                metrics.record_error(e)
                                 continue
-                            stack.append(full_path)
-                            continue
-                        try:
-                            stats = os.stat(full_path)
-                            file_size = stats.st_size
-                            total_size += file_size
-                            results.append({
-                                "path": full_path,
-                                "size": file_size,
-                                "last_modified": datetime.fromtimestamp(stats.st_mtime),
-                                "last_accessed": datetime.fromtimestamp(stats.st_atime),
-                                "extension": os.path.splitext(file_name)[1].lower(),
-                                "hash": ""  # We'll calculate this only if needed
-                            })
-                            processed_files += 1
-                            if processed_files % 100 == 0:
-                                if log_callback:
-                                    progress_msg = f"Processed {processed_files}/{total_files} files ({(processed_files/total_files)*100:.1f}%)"
-                                    size_msg = f"Current total size: {total_size/(1024*1024):.2f} MB"
-                                    log_callback(progress_msg)
-                                    log_callback(size_msg)
-                                if progress_callback:
-                                    progress_callback(processed_files / total_files * 100)
-                        except (PermissionError, FileNotFoundError):
-                            continue
+                        dir_end = time.perf_counter()
+                        metrics.add_time("stat", dir_end - stat_start, len(entries))
+                        # Time spent throttled is not directory latency
+                        io_seconds = (listed - dir_start) + (dir_end - stat_start)
+                        if scheduler:
+                            scheduler.observe("metadata", io_seconds, len(entries) + 1)
+                        metrics.observe_directory(current_dir, io_seconds)
                 except Exception as e:
+                    metrics.record_error(e)
                     self.logger.error(f"Error scanning directory {current_dir}: {str(e)}")
-                    continue
+                # Between directories the stack and results agree, so this is a safe point to save
+                if checkpoint and checkpoint.due():
+                    save_checkpoint()
+            if checkpoint:
+                if stack:
+                    save_checkpoint()
+                    checkpoint.close()
+                else:
+                    checkpoint.clear()
             return results
         except Exception as e:
             self.logger.error(f"Error in fast_scan_directory: {str(e)}")
-            return [] 
+            self.scan_failed = True
+            if checkpoint:
+                # Keep the last consistent checkpoint for a later resume
+                checkpoint.close()
+            # The same container as on success (e.g. a SpillingCollector), with what was scanned so far
+            return results
+
+    def get_metrics(self) -> Dict:
+        """Return a snapshot of the instrumentation for the last scan."""
+        return self.metrics.snapshot()
+
+    def dump_metrics(self, path: str) -> None:
+        """Write the last scan's metrics to ``path`` as JSON."""
+        self.metrics.dump(path)
 
     def start_scan(self):
         """Start scanning the selected directory with real-time feedback."""
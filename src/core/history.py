@@ -1,10 +1,107 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Deque
+from collections import deque
 from datetime import datetime
+import atexit
+import hashlib
 import json
+import logging
+import os
+
+from src.core.context_builder import estimate_tokens
+
+DEFAULT_MAX_ENTRIES = 50
+DEFAULT_HISTORY_TOKENS = 600
+DEFAULT_SAVE_EVERY = 10  # entries logged between writes of the history file
+SAMPLE_PATHS = 5
+
+
+def digest_results(results: List[Dict]) -> Dict:
+    """Reduce a result list to a small, JSON-safe reference."""
+    paths = sorted(r["path"] for r in results)
+    sha = hashlib.sha1()
+    for path in paths:
+        sha.update(path.encode("utf-8", "surrogatepass"))
+        sha.update(b"\0")
+    return {
+        "count": len(results),
+        "total_size": sum(r.get("size", 0) for r in results),
+        "sample_paths": paths[:SAMPLE_PATHS],
+        "digest": sha.hexdigest(),
+    }
+
 
 class QueryHistory:
-    def __init__(self):
-        self.history: List[Dict] = []
+    """Bounded ring buffer of queries and chat turns.
+
+    Entries keep only a digest of their results. Entries that fall off the
+    end of the buffer are folded into a short rolling summary so follow-up
+    questions still have some memory of the earlier session.
+
+    With a ``path`` the buffer is written every ``save_every`` entries and at
+    exit rather than on every entry. ``switch`` moves to another file, e.g.
+    one per scanned root.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        path: Optional[str] = None,
+        max_tokens: int = DEFAULT_HISTORY_TOKENS,
+        save_every: int = DEFAULT_SAVE_EVERY
+    ):
+        self.history: Deque[Dict] = deque(maxlen=max_entries)
+        self.summary: Deque[str] = deque()
+        self.path = path
+        self.max_tokens = max_tokens
+        self.save_every = save_every
+        self.unsaved = 0
+        self.logger = logging.getLogger(__name__)
+        if path and os.path.exists(path):
+            self.load(path)
+        atexit.register(self.flush)
+
+    def _append(self, entry: Dict) -> None:
+        if len(self.history) == self.history.maxlen:
+            self._fold(self.history[0])
+        self.history.append(entry)
+        if self.path:
+            self.unsaved += 1
+            if self.unsaved >= self.save_every:
+                self.save()
+
+    def flush(self) -> None:
+        """Write entries logged since the last save."""
+        if self.path and self.unsaved:
+            self.save()
+
+    def switch(self, path: str) -> None:
+        """Save the current buffer and continue with the one stored at ``path``."""
+        if path == self.path:
+            return
+        self.flush()
+        self.path = path
+        self.history.clear()
+        self.summary.clear()
+        self.unsaved = 0
+        if os.path.exists(path):
+            self.load(path)
+
+    def _fold(self, entry: Dict) -> None:
+        """Compress an evicted entry into the rolling summary."""
+        self.summary.append(self._summarize_entry(entry))
+        # The summary gets at most a third of the history budget
+        while self.summary and sum(estimate_tokens(s) for s in self.summary) > self.max_tokens // 3:
+            self.summary.popleft()
+
+    @staticmethod
+    def _summarize_entry(entry: Dict) -> str:
+        line = f"Q: {entry['query'][:80]}"
+        results = entry.get("results")
+        if results:
+            line += f" -> {entry['action']}: {results['count']} files, {results['total_size'] / (1024 * 1024):.1f} MB"
+        elif entry.get("response"):
+            line += f" -> A: {entry['response'][:80]}"
+        return line
 
     def log_query(
         self,
@@ -13,19 +110,94 @@ class QueryHistory:
         parameters: Dict,
         results: List[Dict]
     ) -> None:
-        """Log a query and its results to history."""
-        self.history.append({
+        """Log a query and a digest of its results to history."""
+        self._append({
             "timestamp": datetime.now().isoformat(),
             "query": query,
             "action": action,
             "parameters": parameters,
-            "results": results
+            "results": digest_results(results or [])
+        })
+
+    def log_chat(self, message: str, response: str) -> None:
+        """Log a chat exchange."""
+        self._append({
+            "timestamp": datetime.now().isoformat(),
+            "query": message,
+            "action": "chat",
+            "parameters": {},
+            "response": response
         })
 
     def get_recent(self, n: int = 3) -> List[Dict]:
         """Get the last `n` queries (default: 3)."""
-        return self.history[-n:]
+        return list(self.history)[-n:]
+
+    def context_messages(self, max_tokens: Optional[int] = None) -> List[Dict]:
+        """Chat messages for recent turns, newest kept first, within the budget."""
+        budget = max_tokens or self.max_tokens
+        messages: List[Dict] = []
+        used = 0
+        older: List[str] = []
+
+        for entry in reversed(self.history):
+            if entry["action"] == "chat":
+                turn = [
+                    {"role": "user", "content": entry["query"]},
+                    {"role": "assistant", "content": entry["response"]}
+                ]
+            else:
+                turn = [{"role": "system", "content": "Earlier: " + self._summarize_entry(entry)}]
+            cost = sum(estimate_tokens(m["content"]) for m in turn)
+            if older or used + cost > budget * 2 // 3:
+                older.append(self._summarize_entry(entry))
+                continue
+            messages[:0] = turn
+            used += cost
+
+        # Whatever did not fit verbatim is condensed into one summary message
+        summary_lines = list(self.summary) + older[::-1]
+        summary = ""
+        for line in reversed(summary_lines):
+            if used + estimate_tokens(summary + line) > budget:
+                break
+            summary = line + "\n" + summary
+        if summary:
+            messages.insert(0, {"role": "system", "content": "Earlier in this session:\n" + summary.rstrip()})
+        return messages
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Persist the buffer and rolling summary as JSON."""
+        path = path or self.path
+        try:
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"entries": list(self.history), "summary": list(self.summary)}, f)
+            os.replace(tmp_path, path)
+            if path == self.path:
+                self.unsaved = 0
+        except OSError as e:
+            self.logger.warning(f"Could not save history to {path}: {str(e)}")
+
+    def load(self, path: Optional[str] = None) -> None:
+        """Restore a buffer written by ``save``."""
+        path = path or self.path
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not load history from {path}: {str(e)}")
+            return
+        self.summary = deque(data.get("summary", []))
+        self.history.clear()
+        for entry in data.get("entries", []):
+            if len(self.history) == self.history.maxlen:
+                self._fold(self.history[0])
+            self.history.append(entry)
 
     def clear(self) -> None:
         """Clear the history."""
-        self.history.clear() 
\ No newline at end of file
+        self.history.clear()
+        self.summary.clear()
+        if self.path:
+            self.save()
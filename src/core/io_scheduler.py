@@ -0,0 +1,264 @@
+import os
+import sys
+import time
+import ctypes
+import logging
+import platform
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+HASH_BLOCK_SIZE = 1024 * 1024
+BURST_SECONDS = 0.5        # a bucket holds this many seconds of its rate
+EWMA_ALPHA = 0.2           # recent latency
+BASELINE_ALPHA = 0.01      # typical latency
+WARMUP_SAMPLES = 20
+LATENCY_FACTOR = 3.0       # back off once latency exceeds this multiple of the baseline
+BACKGROUND_LATENCY_FACTOR = 1.5
+MAX_BACKOFF = 0.5          # seconds of extra delay per operation, at most
+MIN_BACKOFF = 0.0005
+
+# ioprio_set/ioprio_get syscall numbers; the idle I/O class only gets disk time nobody else wants
+SYS_IOPRIO_SET = {"x86_64": 251, "aarch64": 30, "i686": 289}
+SYS_IOPRIO_GET = {"x86_64": 252, "aarch64": 31, "i686": 290}
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_WHO_PROCESS = 1
+THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+THREAD_MODE_BACKGROUND_END = 0x00020000
+
+
+class TokenBucket:
+    """Rate limiter that lets callers reserve ahead and sleep off the debt."""
+
+    def __init__(self, rate: float, burst_seconds: float = BURST_SECONDS):
+        self.rate = rate
+        self.capacity = rate * burst_seconds
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self, amount: float) -> float:
+        """Take ``amount`` tokens; returns how long the caller must wait."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class _LatencyTracker:
+    """Recent per-operation latency relative to the typical (slowly averaged) latency.
+
+    Comparing against a long-run average rather than the best case keeps
+    cache hits from making every real disk read look like congestion.
+    """
+
+    def __init__(self):
+        self.samples = 0
+        self.ewma = 0.0
+        self.baseline = 0.0
+
+    def observe(self, latency: float) -> float:
+        self.samples += 1
+        if self.samples == 1:
+            self.ewma = self.baseline = latency
+        else:
+            self.ewma += EWMA_ALPHA * (latency - self.ewma)
+            self.baseline += BASELINE_ALPHA * (latency - self.baseline)
+        if self.samples < WARMUP_SAMPLES or self.baseline <= 0:
+            return 1.0
+        return self.ewma / self.baseline
+
+
+class IOScheduler:
+    """Throttle scan metadata operations and hash reads.
+
+    ``bytes_per_sec`` and ``ops_per_sec`` are hard limits (token buckets).
+    On top of that, recent latency is compared per kind of I/O to its long-run
+    average; when the disk slows down, presumably because someone
+    else is using it, an extra per-operation delay grows multiplicatively and
+    decays again once latency recovers. With ``background``, the I/O done
+    inside ``background_priority`` runs at lowered CPU and I/O priority.
+    ``locality`` picks the hash read order: "path", "inode", "auto" (inode
+    order on rotational disks) or None.
+    """
+
+    def __init__(
+        self,
+        bytes_per_sec: Optional[float] = None,
+        ops_per_sec: Optional[float] = None,
+        background: bool = False,
+        adaptive: bool = True,
+        locality: Optional[str] = "auto"
+    ):
+        self.bytes_bucket = TokenBucket(bytes_per_sec) if bytes_per_sec else None
+        self.ops_bucket = TokenBucket(ops_per_sec) if ops_per_sec else None
+        self.background = background
+        self.adaptive = adaptive
+        self.locality = locality
+        self.latency_factor = BACKGROUND_LATENCY_FACTOR if background else LATENCY_FACTOR
+        self.backoff = 0.0
+        self.trackers: Dict[str, _LatencyTracker] = {}
+        self.throttled_seconds = 0.0
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def background_priority(self):
+        """Lower the calling thread's priority for the block in background mode, then restore it.
+
+        Nested blocks on one thread leave the lowering to the outermost one.
+        """
+        if not self.background or getattr(self._local, "saved", None) is not None:
+            yield
+            return
+        self._local.saved = _lower_thread_priority(self.logger)
+        try:
+            yield
+        finally:
+            saved, self._local.saved = self._local.saved, None
+            _restore_thread_priority(saved, self.logger)
+
+    def acquire(self, nbytes: int = 0, ops: int = 1) -> None:
+        """Block until ``nbytes`` and ``ops`` fit within the limits and backoff."""
+        wait = self.backoff * ops
+        if self.ops_bucket and ops:
+            wait = max(wait, self.ops_bucket.take(ops))
+        if self.bytes_bucket and nbytes:
+            wait = max(wait, self.bytes_bucket.take(nbytes))
+        if wait > 0:
+            with self._lock:
+                self.throttled_seconds += wait
+            time.sleep(wait)
+
+    def observe(self, kind: str, seconds: float, ops: int = 1) -> None:
+        """Feed back how long ``ops`` operations of ``kind`` took."""
+        if not self.adaptive or ops <= 0:
+            return
+        with self._lock:
+            tracker = self.trackers.get(kind)
+            if tracker is None:
+                tracker = self.trackers[kind] = _LatencyTracker()
+            ratio = tracker.observe(seconds / ops)
+            if ratio > self.latency_factor:
+                self.backoff = min(MAX_BACKOFF, max(self.backoff * 2, MIN_BACKOFF))
+            elif self.backoff:
+                self.backoff = self.backoff * 0.8 if self.backoff > MIN_BACKOFF else 0.0
+
+    def locality_key(self, file_data: List[Dict]) -> Optional[Callable[[Dict], object]]:
+        """Sort key that orders hash reads by physical locality, or None to keep scan order."""
+        strategy = self.locality
+        if strategy == "auto":
+            strategy = "inode" if file_data and is_rotational(file_data[0]["path"]) else None
+        if strategy == "path":
+            return lambda record: record["path"]
+        if strategy == "inode":
+            return inode_key
+        return None
+
+    def stats(self) -> Dict:
+        return {
+            "throttled_seconds": self.throttled_seconds,
+            "backoff": self.backoff,
+            "latency": {k: t.ewma for k, t in self.trackers.items()},
+        }
+
+
+def _lower_thread_priority(logger: logging.Logger):
+    """Drop the calling thread to background CPU and I/O priority; returns what to restore."""
+    try:
+        if sys.platform == "win32":
+            # Lowers both CPU and I/O priority of the calling thread
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN)
+            return True
+        if sys.platform.startswith("linux"):
+            native_id = threading.get_native_id()
+            nice = os.getpriority(os.PRIO_PROCESS, native_id)
+            ioprio = None
+            machine = platform.machine()
+            libc = ctypes.CDLL(None, use_errno=True)
+            if machine in SYS_IOPRIO_GET:
+                ioprio = libc.syscall(SYS_IOPRIO_GET[machine], IOPRIO_WHO_PROCESS, native_id)
+            os.setpriority(os.PRIO_PROCESS, native_id, 19)
+            if ioprio is not None and ioprio >= 0:
+                libc.syscall(SYS_IOPRIO_SET[machine], IOPRIO_WHO_PROCESS, native_id, IOPRIO_CLASS_IDLE << 13)
+            return native_id, nice, ioprio
+    except (OSError, AttributeError) as e:
+        logger.warning(f"Could not lower I/O priority: {str(e)}")
+    return False
+
+
+def _restore_thread_priority(saved, logger: logging.Logger) -> None:
+    """Undo ``_lower_thread_priority`` on the same thread."""
+    if not saved:
+        return
+    try:
+        if sys.platform == "win32":
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_END)
+        else:
+            native_id, nice, ioprio = saved
+            if ioprio is not None and ioprio >= 0:
+                libc = ctypes.CDLL(None, use_errno=True)
+                libc.syscall(SYS_IOPRIO_SET[platform.machine()], IOPRIO_WHO_PROCESS, native_id, ioprio)
+            # Raising the nice value back may need CAP_SYS_NICE (or RLIMIT_NICE)
+            os.setpriority(os.PRIO_PROCESS, native_id, nice)
+    except (OSError, AttributeError) as e:
+        logger.debug(f"Could not restore thread priority: {str(e)}")
+
+
+def inode_key(record: Dict):
+    """(device, inode/file ID); on most filesystems this roughly follows on-disk layout."""
+    try:
+        stats = os.stat(record["path"])
+        return stats.st_dev, stats.st_ino, record["path"]
+    except OSError:
+        return 0, 0, record["path"]
+
+
+def is_rotational(path: str) -> Optional[bool]:
+    """Whether ``path`` lives on a spinning disk; None when it cannot be told."""
+    try:
+        if sys.platform == "win32":
+            return _incurs_seek_penalty(path)
+        if sys.platform.startswith("linux"):
+            dev = os.stat(path).st_dev
+            block = os.path.realpath(f"/sys/dev/block/{os.major(dev)}:{os.minor(dev)}")
+            # Partitions have no queue/ of their own; the parent device does
+            for candidate in (block, os.path.dirname(block)):
+                flag = os.path.join(candidate, "queue", "rotational")
+                if os.path.exists(flag):
+                    with open(flag) as f:
+                        return f.read().strip() == "1"
+    except Exception:
+        pass
+    return None
+
+
+def _incurs_seek_penalty(path: str) -> Optional[bool]:
+    import struct
+    import win32file
+    import win32con
+    IOCTL_STORAGE_QUERY_PROPERTY = 0x2D1400
+    STORAGE_DEVICE_SEEK_PENALTY_PROPERTY = 7
+    drive = os.path.splitdrive(os.path.abspath(path))[0]
+    if not drive or drive.startswith("\\\\"):
+        return None  # network shares have no local seek penalty to report
+    handle = win32file.CreateFile(
+        f"\\\\.\\{drive}",
+        0,
+        win32con.FILE_SHARE_READ | win32con.FILE_SHARE_WRITE,
+        None,
+        win32con.OPEN_EXISTING,
+        0,
+        None
+    )
+    try:
+        query = struct.pack("<II4x", STORAGE_DEVICE_SEEK_PENALTY_PROPERTY, 0)  # PropertyStandardQuery
+        result = win32file.DeviceIoControl(handle, IOCTL_STORAGE_QUERY_PROPERTY, query, 12)
+        return bool(result[8])  # DEVICE_SEEK_PENALTY_DESCRIPTOR.IncursSeekPenalty
+    finally:
+        win32file.CloseHandle(handle)
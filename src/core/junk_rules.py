@@ -0,0 +1,244 @@
+import os
+import re
+import json
+import heapq
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from src.utils.paths import app_data_dir
+
+TOP_FILES = 10
+
+# Built-in categories. "folders" are regexes over a directory path, lowercased
+# with '/' separators and enclosed in '/'; every file below a matching folder
+# belongs to the category. "names" are regexes over the lowercased file name,
+# optionally only inside folders matching "within".
+JUNK_CATEGORIES: Dict[str, Dict] = {
+    "browser_cache": {
+        "description": "Browser caches",
+        "folders": [
+            r"/(?:google/chrome|chromium|microsoft/edge|bravesoftware/brave-browser)/user data/[^/]+/"
+            r"(?:cache|code cache|gpucache|service worker/cachestorage)/",
+            r"/mozilla/firefox/profiles/[^/]+/cache2/",
+            r"/\.cache/(?:google-chrome|chromium|mozilla)/",
+        ],
+    },
+    "node_modules": {
+        "description": "Node.js dependencies (reinstallable)",
+        "folders": [r"/node_modules/"],
+    },
+    "python_cache": {
+        "description": "Python bytecode and tool caches",
+        "folders": [r"/(?:__pycache__|\.pytest_cache|\.mypy_cache|\.ruff_cache|\.tox)/"],
+        "names": [r"\.py[co]$"],
+    },
+    "build_output": {
+        "description": "Build outputs (regenerated by a rebuild)",
+        "folders": [
+            r"/(?:bin|obj)/(?:debug|release)/",
+            r"/target/(?:debug|release)/",
+            r"/cmake-build-[^/]+/",
+            r"/build/intermediates/",
+            r"/\.gradle/caches/",
+        ],
+    },
+    "package_cache": {
+        "description": "Package manager download caches",
+        "folders": [
+            r"/(?:\.npm/_cacache|\.yarn/cache|yarn/cache|pip/cache|\.cache/pip|\.nuget/packages|\.m2/repository)/",
+        ],
+    },
+    "installers": {
+        "description": "Installers and disk images in Downloads",
+        "within": r"/downloads/",
+        "names": [r"\.(?:exe|msi|msix|msixbundle|appx|dmg|pkg|iso)$"],
+    },
+    "crash_dumps": {
+        "description": "Crash dumps and error reports",
+        "folders": [r"/(?:crashdumps|minidump|crashpad|wer/reportarchive|wer/reportqueue)/"],
+        "names": [r"\.(?:dmp|mdmp|hdmp)$"],
+    },
+    "update_cache": {
+        "description": "Windows Update downloads",
+        "folders": [r"/windows/softwaredistribution/download/"],
+    },
+    "temp_files": {
+        "description": "Temporary and leftover files",
+        "folders": [r"/(?:appdata/local/temp|windows/temp|tmp)/"],
+        "names": [r"\.(?:tmp|temp|bak|old|crdownload|part)$", r"^~\$", r"^(?:thumbs\.db|\.ds_store)$"],
+    },
+    "recycle_bin": {
+        "description": "Recycle bin contents",
+        "folders": [r"/\$recycle\.bin/"],
+    },
+    "logs": {
+        "description": "Log files",
+        "names": [r"\.log(?:\.\d+)?$"],
+    },
+}
+
+
+def _split(path: str):
+    """``(directory, name)`` for both Windows and POSIX separators."""
+    cut = max(path.rfind("\\"), path.rfind("/"))
+    return path[:cut], path[cut + 1:]
+
+
+def _folder_key(directory: str) -> str:
+    directory = directory.replace("\\", "/").lower().strip("/")
+    return f"/{directory}/"
+
+
+def _compile(patterns: List[tuple]) -> Optional["re.Pattern"]:
+    """One alternation with a named group per pattern; ``lastgroup`` names the winner."""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?P<r{i}>{pattern})" for i, (_, pattern) in enumerate(patterns)))
+
+
+class _Matcher:
+    __slots__ = ("regex", "categories")
+
+    def __init__(self, patterns: List[tuple]):
+        self.regex = _compile(patterns)
+        self.categories = [name for name, _ in patterns]
+
+    def category(self, text: str) -> Optional[str]:
+        match = self.regex.search(text) if self.regex else None
+        return self.categories[int(match.lastgroup[1:])] if match else None
+
+
+def load_rules(path: Optional[str] = None) -> Dict[str, Dict]:
+    """Built-in categories plus user rules from ``junk_rules.json`` in the app data folder.
+
+    User rules use the same shape as ``JUNK_CATEGORIES``; for a category that
+    already exists the extra folders and names are appended.
+    """
+    rules = {name: {**rule, "folders": list(rule.get("folders", [])), "names": list(rule.get("names", []))}
+             for name, rule in JUNK_CATEGORIES.items()}
+    path = path or os.path.join(app_data_dir(), "junk_rules.json")
+    if not os.path.exists(path):
+        return rules
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            custom = json.load(f)
+        for name, rule in custom.items():
+            for pattern in rule.get("folders", []) + rule.get("names", []) + [rule.get("within", "")]:
+                re.compile(pattern)  # reject bad patterns before they break the combined matcher
+            entry = rules.setdefault(name, {"description": rule.get("description", name), "folders": [], "names": []})
+            entry["folders"].extend(rule.get("folders", []))
+            entry["names"].extend(rule.get("names", []))
+            if "within" in rule:
+                entry["within"] = rule["within"]
+    except (OSError, ValueError, re.error) as e:
+        logging.getLogger(__name__).warning(f"Ignoring junk rules in {path}: {str(e)}")
+    return rules
+
+
+class JunkClassifier:
+    """Assigns files to junk categories with merged, compiled matchers.
+
+    All folder rules form one regex that runs once per directory; its result
+    is cached together with the name matcher for that directory, which merges
+    the unrestricted name rules with any whose ``within`` folder matched. A
+    file therefore costs a dict lookup plus, outside junk folders, one regex
+    over its name. Earlier catalog entries win ties. ``add`` accumulates
+    per-category counts, bytes and largest files, so feeding it from the
+    scan's record callback yields the report without a second pass.
+    """
+
+    def __init__(self, rules: Optional[Dict[str, Dict]] = None):
+        self.rules = rules if rules is not None else load_rules()
+        self._folders = _Matcher([(name, p) for name, rule in self.rules.items() for p in rule.get("folders", [])])
+        self._within = {name: re.compile(rule["within"]) for name, rule in self.rules.items() if rule.get("within")}
+        self._name_matchers: Dict[frozenset, _Matcher] = {}
+        self._dir_cache: Dict[str, tuple] = {}  # directory -> (folder category, name matcher)
+        self.totals: Dict[str, List[int]] = {}  # category -> [count, bytes]
+        self.largest: Dict[str, List] = {}      # category -> min-heap of (size, path)
+        self.files = 0
+        self.identities = set()  # hard-linked files already counted
+
+    def _names_for(self, armed: frozenset) -> _Matcher:
+        matcher = self._name_matchers.get(armed)
+        if matcher is None:
+            matcher = self._name_matchers[armed] = _Matcher([
+                (name, p) for name, rule in self.rules.items()
+                if name not in self._within or name in armed
+                for p in rule.get("names", [])
+            ])
+        return matcher
+
+    def _directory(self, directory: str) -> tuple:
+        entry = self._dir_cache.get(directory)
+        if entry is None:
+            key = _folder_key(directory)
+            armed = frozenset(name for name, within in self._within.items() if within.search(key))
+            entry = self._dir_cache[directory] = (self._folders.category(key), self._names_for(armed))
+        return entry
+
+    def category(self, path: str) -> Optional[str]:
+        """Junk category of ``path``, or None when no rule matches."""
+        directory, name = _split(path)
+        folder_category, names = self._directory(directory)
+        return folder_category or names.category(name.lower())
+
+    def add(self, record: Dict) -> Optional[str]:
+        """Classify a scan record and count it."""
+        self.files += 1
+        category = self.category(record["path"])
+        if category is None:
+            return None
+        entry = self.totals.get(category)
+        if entry is None:
+            entry = self.totals[category] = [0, 0]
+            self.largest[category] = []
+        entry[0] += 1
+        file_id = record.get("file_id")
+        if file_id is not None:
+            if file_id in self.identities:
+                return category
+            self.identities.add(file_id)
+        entry[1] += record["size"]
+        heap = self.largest[category]
+        item = (record["size"], record["path"])
+        if len(heap) < TOP_FILES:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+        return category
+
+    def add_all(self, records: Iterable[Dict]) -> "JunkClassifier":
+        for record in records:
+            self.add(record)
+        return self
+
+    def select(self, file_data: Iterable[Dict], category: str) -> List[Dict]:
+        """Records in ``category``."""
+        return [f for f in file_data if self.category(f["path"]) == category]
+
+    def report(self) -> Dict:
+        return {
+            "files": self.files,
+            "categories": {
+                name: {
+                    "description": self.rules[name]["description"],
+                    "count": count,
+                    "bytes": size,
+                    "largest": [{"path": path, "size": s} for s, path in sorted(self.largest[name], reverse=True)],
+                }
+                for name, (count, size) in sorted(self.totals.items(), key=lambda kv: -kv[1][1])
+            },
+        }
+
+
+def format_junk(report: Dict, limit: int = 3) -> str:
+    mb = lambda b: f"{b / (1024 * 1024):.2f} MB"
+    categories = report["categories"]
+    if not categories:
+        return "No junk or cache files found."
+    total = sum(c["bytes"] for c in categories.values())
+    lines = [f"Junk and caches: {mb(total)} in {sum(c['count'] for c in categories.values())} files"]
+    for name, c in categories.items():
+        lines.append(f"- {c['description']} ({name}): {mb(c['bytes'])} in {c['count']} files")
+        lines += [f"    {f['path']} ({mb(f['size'])})" for f in c["largest"][:limit]]
+    return "\n".join(lines)
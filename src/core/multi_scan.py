@@ -0,0 +1,192 @@
+import os
+import time
+import threading
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional
+
+from src.core.file_scanner import FileScanner
+from src.core.io_scheduler import IOScheduler
+from src.core.checkpoint import ScanCheckpoint
+from src.core.spill_store import SpillingCollector, SpillStore
+from src.core.analysis import unique_files
+
+# Directories listed (or files hashed) at once per volume. Each root's scanner
+# lists one directory at a time, so 1 makes roots sharing a disk take turns.
+DEFAULT_VOLUME_CONCURRENCY = 1
+
+
+def split_roots(text: str) -> List[str]:
+    """Parse a ``;``-separated list of roots (``os.pathsep`` elsewhere)."""
+    separator = ";" if ";" in text else os.pathsep
+    return [part.strip() for part in text.split(separator) if part.strip()]
+
+
+def normalize_roots(roots: List[str]) -> List[str]:
+    """Drop duplicates and roots nested inside another root, so no file is scanned twice."""
+    unique = []
+    keys = []
+    for root in sorted({os.path.abspath(r) for r in roots}, key=len):
+        key = os.path.normcase(root)
+        if not any(key == kept or key.startswith(kept.rstrip("\\/") + os.sep) for kept in keys):
+            unique.append(root)
+            keys.append(key)
+    return unique
+
+
+def volume_key(root: str):
+    """Identify the volume a root lives on (device number, else drive/UNC share)."""
+    try:
+        return os.stat(root).st_dev
+    except OSError:
+        return os.path.splitdrive(root)[0].upper() or root
+
+
+class MultiRootScanner:
+    """Scan several roots or volumes at once and merge the results.
+
+    Every root gets its own ``FileScanner`` (and so its own cancellation flag,
+    metrics and checkpoint) on its own thread. Roots on the same volume share an I/O
+    budget, so two folders on one disk do not thrash it, while separate
+    volumes and network shares proceed independently and the whole scan takes
+    about as long as the slowest volume. The budget also covers each root's
+    counting pass, and ``budgeted`` applies it to hashing.
+    """
+
+    def __init__(
+        self,
+        roots: List[str],
+        volume_concurrency: int = DEFAULT_VOLUME_CONCURRENCY,
+        io_scheduler: Optional[IOScheduler] = None
+    ):
+        self.roots = normalize_roots(roots)
+        self.scanners: Dict[str, FileScanner] = {root: FileScanner() for root in self.roots}
+        self.cancelled: Dict[str, bool] = {root: False for root in self.roots}
+        budgets: Dict = {}
+        for root, scanner in self.scanners.items():
+            volume = volume_key(root)
+            if volume not in budgets:
+                budgets[volume] = threading.BoundedSemaphore(volume_concurrency)
+            scanner.io_budget = budgets[volume]
+            scanner.io_scheduler = io_scheduler
+        self.aggregates: Dict[str, Dict] = {}
+        self.sinks: Dict[str, SpillingCollector] = {}
+
+    @property
+    def spilled(self) -> bool:
+        return any(sink.spilled for sink in self.sinks.values())
+
+    def _budget_for(self, path: str):
+        key = os.path.normcase(os.path.abspath(path))
+        for root, scanner in self.scanners.items():
+            root_key = os.path.normcase(root)
+            if key == root_key or key.startswith(root_key.rstrip("\\/") + os.sep):
+                return scanner.io_budget
+        return nullcontext()
+
+    def budgeted(self, func: Callable[[str], str]) -> Callable[[str], str]:
+        """Wrap a per-file function (e.g. hashing) to run inside the I/O budget of the file's volume."""
+        def call(path: str) -> str:
+            with self._budget_for(path):
+                return func(path)
+        return call
+
+    @property
+    def files_visited(self) -> int:
+        return sum(scanner.metrics.files_visited for scanner in self.scanners.values())
+
+    def cancel(self, root: Optional[str] = None) -> None:
+        """Cancel one root, or every root when ``root`` is None."""
+        for name in [root] if root else self.roots:
+            name = os.path.abspath(name)
+            if name in self.scanners:
+                self.cancelled[name] = True
+                self.scanners[name].scan_cancelled = True
+
+    def scan(
+        self,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        log_callback: Optional[Callable[[str], None]] = None,
+        record_callback: Optional[Callable[[Dict], None]] = None,
+        memory_budget: Optional[int] = None
+    ) -> List[Dict]:
+        """Scan all roots concurrently; returns the merged records.
+
+        Per-root results are summarized in ``self.aggregates``.
+        ``record_callback`` is called from the per-root threads. With a
+        ``memory_budget``, each root collects into a ``SpillingCollector`` with
+        an equal share of it, and if any root spills the merged result is a
+        ``SpillStore``.
+        """
+        results: Dict[str, List[Dict]] = {}
+        self.sinks = {
+            root: SpillingCollector(memory_budget // len(self.roots)) if memory_budget else []
+            for root in self.roots
+        }
+        progress = {root: 0.0 for root in self.roots}
+        lock = threading.Lock()
+
+        def on_progress(root, percent):
+            with lock:
+                progress[root] = percent
+                overall = sum(progress.values()) / len(progress)
+            if progress_callback:
+                progress_callback(overall)
+
+        def scan_root(root):
+            scanner = self.scanners[root]
+            start = time.time()
+            sink = self.sinks[root]
+            if not self.cancelled[root]:
+                scanner.fast_scan_directory(
+                    root,
+                    progress_callback=lambda p: on_progress(root, p),
+                    log_callback=(lambda msg: log_callback(f"[{root}] {msg}")) if log_callback else None,
+                    checkpoint=ScanCheckpoint(root),
+                    record_callback=record_callback,
+                    results=sink
+                )
+                # fast_scan_directory resets the flag on start; honour a cancel that arrived meanwhile
+                if self.cancelled[root]:
+                    scanner.scan_cancelled = True
+            records = sink.result() if isinstance(sink, SpillingCollector) else sink
+            results[root] = records
+            on_progress(root, 100.0)
+            metrics = scanner.get_metrics()
+            self.aggregates[root] = {
+                "files": len(records),
+                # Hard-linked data counts once, as in ScanIndex.total_size
+                "bytes": (
+                    records.space_by_extension()[0] if isinstance(records, SpillStore)
+                    else sum(r["size"] for r in unique_files(records))
+                ),
+                "seconds": time.time() - start,
+                "errors": sum(metrics["errors"].values()),
+                "cancelled": scanner.scan_cancelled,
+            }
+
+        threads = [threading.Thread(target=scan_root, args=(root,), daemon=True) for root in self.roots]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stores = [records for records in results.values() if isinstance(records, SpillStore)]
+        merged = stores[0] if stores else []
+        for root in self.roots:
+            records = results.get(root, [])
+            if records is merged:
+                continue
+            merged.extend(records)
+            if isinstance(records, SpillStore):
+                records.close()
+        return merged
+
+    def summary(self) -> Dict:
+        """Totals across all roots."""
+        totals = {"files": 0, "bytes": 0, "errors": 0, "seconds": 0.0}
+        for aggregate in self.aggregates.values():
+            totals["files"] += aggregate["files"]
+            totals["bytes"] += aggregate["bytes"]
+            totals["errors"] += aggregate["errors"]
+            totals["seconds"] = max(totals["seconds"], aggregate["seconds"])
+        return totals
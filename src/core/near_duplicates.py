@@ -0,0 +1,181 @@
+import os
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.utils.paths import app_data_dir
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff", ".webp"}
+HASH_SIZE = 8  # 8x8 gradient -> 64-bit dHash
+DEFAULT_MAX_DISTANCE = 6
+
+
+def dhash(path: str, hash_size: int = HASH_SIZE) -> Optional[int]:
+    """Difference hash: compare horizontally adjacent pixels of a tiny grayscale copy."""
+    from PIL import Image
+    try:
+        with Image.open(path) as img:
+            # Let the JPEG decoder downscale while decoding; far cheaper than a full decode
+            img.draft("L", (hash_size * 8, hash_size * 8))
+            small = img.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+            pixels = list(small.getdata())
+    except Exception:
+        return None
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def _hash_worker(path: str) -> Tuple[str, Optional[int]]:
+    return path, dhash(path)
+
+
+class PerceptualHashCache:
+    """Perceptual hashes keyed by path, invalidated when size or mtime change."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(app_data_dir("cache"), "phash.json")
+        self.entries: Dict[str, List] = {}  # path -> [size, mtime, hash]
+        self.logger = logging.getLogger(__name__)
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def _key(record: Dict) -> Tuple[int, int]:
+        return record["size"], int(record["last_modified"].timestamp())
+
+    def get(self, record: Dict) -> Optional[int]:
+        entry = self.entries.get(record["path"])
+        if entry and tuple(entry[:2]) == self._key(record):
+            return entry[2]
+        return None
+
+    def put(self, record: Dict, value: int) -> None:
+        self.entries[record["path"]] = [*self._key(record), value]
+
+    def save(self) -> None:
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.logger.warning(f"Could not save perceptual hash cache: {str(e)}")
+
+
+class MultiIndexHamming:
+    """Multi-index hashing for Hamming-radius search over 64-bit hashes.
+
+    The hash is split into ``segments`` 16-bit pieces. Two hashes within
+    distance ``r`` must agree to within ``r // segments`` bits on at least one
+    piece (pigeonhole), so a query only probes that small neighbourhood of
+    each piece's table and verifies the few candidates it finds.
+    """
+
+    def __init__(self, max_distance: int, bits: int = HASH_SIZE * HASH_SIZE, segments: int = 4):
+        self.max_distance = max_distance
+        self.segments = segments
+        self.segment_bits = bits // segments
+        self.mask = (1 << self.segment_bits) - 1
+        self.tables: List[Dict[int, List[int]]] = [{} for _ in range(segments)]
+        self.values: List[int] = []
+        radius = max_distance // segments
+        self.flip_masks = [0]
+        for _ in range(radius):
+            self.flip_masks = sorted({m | (1 << b) for m in self.flip_masks for b in range(self.segment_bits)} | set(self.flip_masks))
+
+    def _pieces(self, value: int):
+        for i in range(self.segments):
+            yield i, (value >> (i * self.segment_bits)) & self.mask
+
+    def add(self, value: int) -> int:
+        item = len(self.values)
+        self.values.append(value)
+        for i, piece in self._pieces(value):
+            self.tables[i].setdefault(piece, []).append(item)
+        return item
+
+    def search(self, value: int) -> List[int]:
+        """Items within ``max_distance`` bits of ``value``."""
+        candidates = set()
+        flips = self.flip_masks
+        for i, piece in self._pieces(value):
+            get = self.tables[i].get
+            for bucket in filter(None, map(get, [piece ^ flip for flip in flips])):
+                candidates.update(bucket)
+        values = self.values
+        limit = self.max_distance
+        return [c for c in candidates if bin(values[c] ^ value).count("1") <= limit]
+
+
+def find_near_duplicates(
+    file_data: List[Dict],
+    max_distance: int = DEFAULT_MAX_DISTANCE,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    cache: Optional[PerceptualHashCache] = None,
+    workers: Optional[int] = None
+) -> List[List[Dict]]:
+    """Group visually similar images.
+
+    Hashes come from the cache when the file is unchanged; the rest are
+    decoded in a process pool. Similar pairs are found with a multi-index
+    Hamming search per image and merged into clusters with union-find.
+    """
+    cache = cache or PerceptualHashCache()
+    images = [f for f in file_data if f["extension"] in IMAGE_EXTENSIONS and f["size"] > 0]
+    total = len(images)
+    hashes: Dict[str, int] = {}
+    missing = []
+    for record in images:
+        value = cache.get(record)
+        if value is None:
+            missing.append(record)
+        else:
+            hashes[record["path"]] = value
+
+    done = total - len(missing)
+    if missing:
+        by_path = {r["path"]: r for r in missing}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for path, value in pool.map(_hash_worker, list(by_path), chunksize=32):
+                done += 1
+                if value is not None:
+                    hashes[path] = value
+                    cache.put(by_path[path], value)
+                if progress_callback:
+                    progress_callback(done, total)
+        cache.save()
+
+    records = [r for r in images if r["path"] in hashes]
+    index = MultiIndexHamming(max_distance)
+    for record in records:
+        index.add(hashes[record["path"]])
+
+    parent = list(range(len(records)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, record in enumerate(records):
+        for j in index.search(hashes[record["path"]]):
+            if j != i:
+                a, b = find(i), find(j)
+                if a != b:
+                    parent[b] = a
+
+    clusters: Dict[int, List[Dict]] = {}
+    for i, record in enumerate(records):
+        clusters.setdefault(find(i), []).append(record)
+    groups = [sorted(g, key=lambda r: -r["size"]) for g in clusters.values() if len(g) > 1]
+    groups.sort(key=lambda g: -sum(r["size"] for r in g[1:]))
+    return groups
@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import shutil
+import filecmp
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from src.utils.paths import app_data_dir
+
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_WORKERS = 4
+TMP_SUFFIX = ".salink.tmp"
+
+logger = logging.getLogger(__name__)
+
+
+def journal_path() -> str:
+    """New journal file for a link run."""
+    return os.path.join(app_data_dir("journals"), time.strftime("link_%Y%m%d_%H%M%S.jsonl"))
+
+
+def latest_journal() -> Optional[str]:
+    directory = app_data_dir("journals")
+    journals = sorted(f for f in os.listdir(directory) if f.startswith("link_") and f.endswith(".jsonl"))
+    return os.path.join(directory, journals[-1]) if journals else None
+
+
+class _Journal:
+    """Append-only, write-ahead JSON-lines undo journal.
+
+    A link's entry is on disk before the file is replaced, and a ``done``
+    marker follows once it is, so a crash at any point leaves every
+    replaced file recorded.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, entry: Dict) -> None:
+        with self.lock:
+            self.file.write(json.dumps(entry) + "\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def _unchanged(record: Dict, stats: os.stat_result) -> bool:
+    return stats.st_size == record["size"] and int(stats.st_mtime) == int(record["last_modified"].timestamp())
+
+
+def _link_group(group: List[Dict], journal: _Journal) -> Dict:
+    """Replace every copy in ``group`` with a hard link to its first entry."""
+    canonical = group[0]
+    result = {"linked": [], "skipped": 0, "bytes": 0, "errors": []}
+    try:
+        canonical_stats = os.stat(canonical["path"])
+    except OSError as e:
+        result["errors"].append(f"{canonical['path']}: {str(e)}")
+        result["skipped"] += len(group) - 1
+        return result
+    if not _unchanged(canonical, canonical_stats):
+        result["skipped"] += len(group) - 1
+        return result
+
+    for record in group[1:]:
+        path = record["path"]
+        tmp_path = path + TMP_SUFFIX
+        try:
+            stats = os.stat(path)
+            if (
+                stats.st_dev != canonical_stats.st_dev         # hard links cannot cross volumes
+                or os.path.samefile(path, canonical["path"])   # already linked
+                or not _unchanged(record, stats)               # modified since the scan
+                or not filecmp.cmp(canonical["path"], path, shallow=False)
+            ):
+                result["skipped"] += 1
+                continue
+            entry = {
+                "path": path,
+                "canonical": canonical["path"],
+                "size": stats.st_size,
+                "mode": stats.st_mode,
+                "atime": stats.st_atime,
+                "mtime": stats.st_mtime,
+            }
+            journal.write(entry)
+            os.link(canonical["path"], tmp_path)
+            os.replace(tmp_path, path)
+            journal.write({"path": path, "done": True})
+            result["linked"].append(entry)
+            if stats.st_nlink == 1:
+                # A copy with other links keeps its data alive elsewhere
+                result["bytes"] += stats.st_size
+        except OSError as e:
+            result["errors"].append(f"{path}: {str(e)}")
+            if os.path.lexists(tmp_path):
+                os.remove(tmp_path)
+    return result
+
+
+def link_duplicates(
+    groups: List[List[Dict]],
+    journal: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = DEFAULT_WORKERS,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> Dict:
+    """Reclaim space from confirmed duplicate sets by hard-linking the copies.
+
+    Each copy is re-verified byte-for-byte against the canonical file right
+    before it is swapped for a link (link to a temp name, then atomic
+    replace). Groups are processed in batches on a thread pool; each link
+    is journaled before its file is replaced, so ``undo_links`` can restore
+    independent copies even after a crash mid-run.
+    """
+    journal = journal or journal_path()
+    writer = _Journal(journal)
+    batches = [groups[i:i + batch_size] for i in range(0, len(groups), batch_size)]
+    summary = {"journal": journal, "linked": 0, "skipped": 0, "bytes": 0, "errors": []}
+
+    def run_batch(batch: List[List[Dict]]) -> Dict:
+        return [_link_group(group, writer) for group in batch]
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for done, results in enumerate(pool.map(run_batch, batches), 1):
+                for r in results:
+                    summary["linked"] += len(r["linked"])
+                    summary["skipped"] += r["skipped"]
+                    summary["bytes"] += r["bytes"]
+                    summary["errors"].extend(r["errors"])
+                if progress_callback:
+                    progress_callback(done, len(batches))
+    finally:
+        writer.close()
+    return summary
+
+
+def undo_links(journal: str) -> Dict:
+    """Turn the links recorded in ``journal`` back into independent copies."""
+    summary = {"restored": 0, "skipped": 0, "errors": []}
+    with open(journal, "r", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    entries = [e for e in lines if "canonical" in e]
+    done = {e["path"] for e in lines if e.get("done")}
+
+    for entry in reversed(entries):
+        path = entry["path"]
+        tmp_path = path + TMP_SUFFIX
+        try:
+            if path not in done and os.path.lexists(tmp_path):
+                # Interrupted between linking and replacing: the copy itself is untouched
+                os.remove(tmp_path)
+            if not (os.path.exists(path) and os.path.samefile(path, entry["canonical"])):
+                # Already restored, replaced or deleted by the user since
+                summary["skipped"] += 1
+                continue
+            shutil.copyfile(entry["canonical"], tmp_path)
+            os.chmod(tmp_path, entry["mode"] & 0o7777)
+            os.utime(tmp_path, (entry["atime"], entry["mtime"]))
+            os.replace(tmp_path, path)
+            summary["restored"] += 1
+        except OSError as e:
+            summary["errors"].append(f"{path}: {str(e)}")
+            if os.path.lexists(tmp_path):
+                os.remove(tmp_path)
+
+    os.replace(journal, journal + ".undone")
+    return summary
@@ -0,0 +1,286 @@
+import os
+import bisect
+import heapq
+from typing import Dict, List, Optional, Set, Iterable, Tuple
+
+from src.core.trigram_index import TrigramIndex
+
+DIRECTORY_MATCH_WEIGHT = 0.8  # files found through their folder's name rank below name matches
+
+
+def path_key(path: str) -> str:
+    """Case-folded path with '/' separators; in sorted order every subtree is contiguous."""
+    return path.replace("\\", "/").lower()
+
+
+def subtree_bounds(directory: str) -> Tuple[str, str]:
+    """Key range ``[low, high)`` holding exactly the paths below ``directory``."""
+    prefix = path_key(directory).rstrip("/")
+    # '0' is the character right after '/', so nothing outside the subtree falls in between
+    return prefix + "/", prefix + "0"
+
+
+class ScanIndex:
+    """In-memory lookup structures over a list of scan records.
+
+    Rows are addressed by a stable integer id (their position in ``rows``).
+    Removed rows leave a ``None`` hole so ids handed out earlier stay valid.
+    Byte totals count the data of hard-linked files once.
+    """
+
+    def __init__(self, file_data: Optional[List[Dict]] = None):
+        self.rows: List[Optional[Dict]] = []
+        self.row_by_path: Dict[str, int] = {}
+        self.rows_by_extension: Dict[str, Set[int]] = {}
+        self.rows_by_component: Dict[str, Set[int]] = {}
+        self.extension_totals: Dict[str, List[int]] = {}  # ext -> [count, bytes]
+        self.total_size = 0
+        self.file_count = 0
+        self.identities: Dict[Tuple[int, int], List] = {}  # file_id -> [indexed links, extension charged]
+        self._by_size: Optional[List[Tuple[int, int]]] = None  # (size, row) ascending
+        self._by_path: Optional[List[Tuple[str, int]]] = None  # (path key, row) ascending
+        self._path_bytes: Optional[List[int]] = None  # running size totals in path order
+        self.name_grams = TrigramIndex()        # row -> file name
+        self.component_grams = TrigramIndex()   # component id -> folder name
+        self.component_ids: Dict[str, int] = {}
+        self.components: List[str] = []
+        if file_data:
+            self.build(file_data)
+
+    def build(self, file_data: List[Dict]) -> None:
+        """Rebuild every index from scratch."""
+        self.rows = []
+        self.row_by_path.clear()
+        self.rows_by_extension.clear()
+        self.rows_by_component.clear()
+        self.extension_totals.clear()
+        self.total_size = 0
+        self.file_count = 0
+        self.identities.clear()
+        self.name_grams = TrigramIndex()
+        self.component_grams = TrigramIndex()
+        self.component_ids.clear()
+        self.components = []
+        self._by_size = None
+        self._by_path = None
+        self._path_bytes = None
+        for record in file_data:
+            self.add(record)
+
+    def add(self, record: Dict) -> int:
+        """Index a record, replacing any existing row with the same path."""
+        path = record["path"]
+        if path in self.row_by_path:
+            self.remove(path)
+        row = len(self.rows)
+        self.rows.append(record)
+        self.row_by_path[path] = row
+
+        ext = record.get("extension", "")
+        self.rows_by_extension.setdefault(ext, set()).add(row)
+        totals = self.extension_totals.setdefault(ext, [0, 0])
+        totals[0] += 1
+        size = self._charge(record, ext)
+        totals[1] += size
+
+        for component in self._dir_components(path):
+            self.rows_by_component.setdefault(component, set()).add(row)
+            if component not in self.component_ids:
+                self.component_ids[component] = len(self.components)
+                self.component_grams.add(len(self.components), component)
+                self.components.append(component)
+        self.name_grams.add(row, os.path.basename(path))
+
+        self.total_size += size
+        self.file_count += 1
+        if self._by_size is not None:
+            bisect.insort(self._by_size, (record.get("size", 0), row))
+        if self._by_path is not None:
+            bisect.insort(self._by_path, (path_key(path), row))
+        self._path_bytes = None
+        return row
+
+    def remove(self, path: str) -> Optional[Dict]:
+        """Drop the row for ``path`` and return its record, if indexed."""
+        row = self.row_by_path.pop(path, None)
+        if row is None:
+            return None
+        record = self.rows[row]
+        self.rows[row] = None
+        self.name_grams.remove(row)
+
+        ext = record.get("extension", "")
+        self.rows_by_extension.get(ext, set()).discard(row)
+        size, charged_ext = self._release(record, ext)
+        totals = self.extension_totals.get(charged_ext)
+        if totals:
+            totals[1] -= size
+        totals = self.extension_totals.get(ext)
+        if totals:
+            totals[0] -= 1
+            if totals[0] <= 0:
+                del self.extension_totals[ext]
+                self.rows_by_extension.pop(ext, None)
+
+        for component in self._dir_components(path):
+            rows = self.rows_by_component.get(component)
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del self.rows_by_component[component]
+
+        self.total_size -= size
+        self.file_count -= 1
+        if self._by_size is not None:
+            pos = bisect.bisect_left(self._by_size, (record.get("size", 0), row))
+            if pos < len(self._by_size) and self._by_size[pos][1] == row:
+                del self._by_size[pos]
+        if self._by_path is not None:
+            pos = bisect.bisect_left(self._by_path, (path_key(path), row))
+            if pos < len(self._by_path) and self._by_path[pos][1] == row:
+                del self._by_path[pos]
+        self._path_bytes = None
+        return record
+
+    def _charge(self, record: Dict, ext: str) -> int:
+        """Bytes ``record`` adds to the totals: nothing for another link to an indexed file."""
+        file_id = record.get("file_id")
+        if file_id is None:
+            return record.get("size", 0)
+        entry = self.identities.get(file_id)
+        if entry is not None:
+            entry[0] += 1
+            return 0
+        self.identities[file_id] = [1, ext]
+        return record.get("size", 0)
+
+    def _release(self, record: Dict, ext: str) -> Tuple[int, str]:
+        """Bytes and the extension they were charged to, freed by removing ``record``."""
+        file_id = record.get("file_id")
+        entry = self.identities.get(file_id) if file_id is not None else None
+        if entry is None:
+            return record.get("size", 0), ext
+        entry[0] -= 1
+        if entry[0] > 0:
+            return 0, ext
+        del self.identities[file_id]
+        return record.get("size", 0), entry[1]
+
+    def records(self) -> Iterable[Dict]:
+        """Iterate over live records."""
+        return (r for r in self.rows if r is not None)
+
+    def get(self, row: int) -> Optional[Dict]:
+        return self.rows[row] if 0 <= row < len(self.rows) else None
+
+    def _size_order(self) -> List[Tuple[int, int]]:
+        if self._by_size is None:
+            self._by_size = sorted(
+                (r.get("size", 0), row) for row, r in enumerate(self.rows) if r is not None
+            )
+        return self._by_size
+
+    def _path_order(self) -> List[Tuple[str, int]]:
+        if self._by_path is None:
+            self._by_path = sorted(
+                (path_key(r["path"]), row) for row, r in enumerate(self.rows) if r is not None
+            )
+        return self._by_path
+
+    def subtree_range(self, directory: str) -> Tuple[int, int]:
+        """Positions ``[lo, hi)`` in path order of every file below ``directory``."""
+        order = self._path_order()
+        low, high = subtree_bounds(directory)
+        lo = bisect.bisect_left(order, (low,))
+        return lo, bisect.bisect_left(order, (high,), lo)
+
+    def rows_under(self, directory: str) -> Set[int]:
+        """Row ids of the files below ``directory``, ready to intersect with other row sets."""
+        lo, hi = self.subtree_range(directory)
+        return {row for _, row in self._by_path[lo:hi]}
+
+    def records_under(self, directory: str) -> List[Dict]:
+        """Records below ``directory`` in path order."""
+        lo, hi = self.subtree_range(directory)
+        return [self.rows[row] for _, row in self._by_path[lo:hi]]
+
+    def subtree_totals(self, directory: str) -> Tuple[int, int]:
+        """``(count, bytes)`` below ``directory`` from running totals, without visiting the files.
+
+        A hard-linked file's data is charged to its first link in path order,
+        so the bytes of the whole tree match ``total_size``.
+        """
+        lo, hi = self.subtree_range(directory)
+        if self._path_bytes is None:
+            running = 0
+            charged = set()
+            self._path_bytes = [0]
+            for _, row in self._by_path:
+                record = self.rows[row]
+                file_id = record.get("file_id")
+                if file_id is None or file_id not in charged:
+                    running += record.get("size", 0)
+                    if file_id is not None:
+                        charged.add(file_id)
+                self._path_bytes.append(running)
+        return hi - lo, self._path_bytes[hi] - self._path_bytes[lo]
+
+    def largest(self, rows: Optional[Set[int]] = None) -> Iterable[Dict]:
+        """Yield records from largest to smallest, optionally restricted to ``rows``."""
+        if rows is not None and len(rows) < self.file_count // 4:
+            # Small candidate sets are cheaper to sort directly
+            for row in sorted(rows, key=lambda r: self.rows[r]["size"], reverse=True):
+                yield self.rows[row]
+            return
+        for size, row in reversed(self._size_order()):
+            if rows is None or row in rows:
+                yield self.rows[row]
+
+    def rows_in_size_range(self, min_size: int = 0, max_size: Optional[int] = None) -> Set[int]:
+        """Row ids whose size lies in ``[min_size, max_size]``."""
+        order = self._size_order()
+        lo = bisect.bisect_left(order, (min_size, -1))
+        hi = len(order) if max_size is None else bisect.bisect_right(order, (max_size, len(self.rows)))
+        return {row for _, row in order[lo:hi]}
+
+    def rows_for_extension(self, extension: str) -> Set[int]:
+        return self.rows_by_extension.get(extension, set())
+
+    def rows_for_component(self, component: str) -> Set[int]:
+        """Rows whose directory path contains a folder named ``component``."""
+        return self.rows_by_component.get(component.lower(), set())
+
+    def rows_matching_path(self, substring: str) -> Set[int]:
+        """Rows whose path contains ``substring`` (case-insensitive, linear)."""
+        needle = substring.lower()
+        return {
+            row for row, r in enumerate(self.rows)
+            if r is not None and needle in r["path"].lower()
+        }
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[float, Dict]]:
+        """Ranked fuzzy lookup of ``(score, record)`` by file name, then by folder name."""
+        scores: Dict[int, float] = {}
+        for score, row in self.name_grams.search(query, limit):
+            scores[row] = score
+        if len(scores) < limit:
+            # Fill the remaining slots with the largest files inside matching folders
+            for score, component_id in self.component_grams.search(query, 3):
+                rows = self.rows_by_component.get(self.components[component_id], set())
+                for row in heapq.nlargest(limit, rows, key=lambda r: self.rows[r]["size"]):
+                    scores.setdefault(row, score * DIRECTORY_MATCH_WEIGHT)
+        best = heapq.nlargest(limit, scores.items(), key=lambda kv: kv[1])
+        return [(score, self.rows[row]) for row, score in best]
+
+    def top_extensions(self, n: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """``(extension, count, bytes)`` sorted by bytes descending."""
+        ranked = sorted(
+            ((ext, t[0], t[1]) for ext, t in self.extension_totals.items()),
+            key=lambda x: -x[2]
+        )
+        return ranked if n is None else ranked[:n]
+
+    @staticmethod
+    def _dir_components(path: str) -> Set[str]:
+        directory = os.path.dirname(path).replace("\\", "/")
+        return {c.lower() for c in directory.split("/") if c and not c.endswith(":")}
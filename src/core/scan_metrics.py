@@ -0,0 +1,113 @@
+import json
+import math
+import time
+import heapq
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+PHASES = ("count", "enumerate", "stat", "hash", "aggregate")
+
+# Directory latency histogram buckets: <0.1ms, <0.2ms, <0.4ms ... doubling
+LATENCY_BASE_MS = 0.1
+LATENCY_BUCKETS = 20
+SLOWEST_DIRS = 20
+
+
+class ScanMetrics:
+    """Counters, phase timers and latency histograms for one scan.
+
+    The scan thread is the only writer of the traversal counters, so they are
+    plain attributes; hashing may run on other threads and takes the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.started = time.time()
+        self.dirs_visited = 0
+        self.files_visited = 0
+        self.bytes_stat = 0
+        self.files_hashed = 0
+        self.bytes_hashed = 0
+        self.errors: Dict[str, int] = {}
+        self.phase_seconds: Dict[str, float] = {p: 0.0 for p in PHASES}
+        self.phase_calls: Dict[str, int] = {p: 0 for p in PHASES}
+        self.dir_latency_buckets: List[int] = [0] * LATENCY_BUCKETS
+        self._slowest: List[Tuple[float, str]] = []  # min-heap of (seconds, path)
+
+    def add_time(self, phase: str, seconds: float, calls: int = 1) -> None:
+        with self._lock:
+            self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + seconds
+            self.phase_calls[phase] = self.phase_calls.get(phase, 0) + calls
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block of work under the given phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def record_error(self, error: BaseException) -> None:
+        name = type(error).__name__
+        with self._lock:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def record_hash(self, size: int, seconds: float) -> None:
+        with self._lock:
+            self.files_hashed += 1
+            self.bytes_hashed += size
+            self.phase_seconds["hash"] += seconds
+            self.phase_calls["hash"] += 1
+
+    def observe_directory(self, path: str, seconds: float) -> None:
+        """Record how long listing and stat'ing one directory took."""
+        self.dirs_visited += 1
+        ms = seconds * 1000
+        bucket = 0 if ms <= LATENCY_BASE_MS else int(math.log2(ms / LATENCY_BASE_MS)) + 1
+        self.dir_latency_buckets[min(bucket, LATENCY_BUCKETS - 1)] += 1
+        if len(self._slowest) < SLOWEST_DIRS:
+            heapq.heappush(self._slowest, (seconds, path))
+        elif seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, (seconds, path))
+
+    def files_per_second(self) -> float:
+        elapsed = time.time() - self.started
+        return self.files_visited / elapsed if elapsed > 0 else 0.0
+
+    def snapshot(self) -> Dict:
+        """Return a JSON-serializable view of the current metrics."""
+        with self._lock:
+            histogram = []
+            for i, count in enumerate(self.dir_latency_buckets):
+                upper = LATENCY_BASE_MS * (2 ** i)
+                label = f"<{upper:g}ms" if i < LATENCY_BUCKETS - 1 else f">={upper / 2:g}ms"
+                histogram.append({"bucket": label, "count": count})
+            return {
+                "elapsed_seconds": time.time() - self.started,
+                "dirs_visited": self.dirs_visited,
+                "files_visited": self.files_visited,
+                "bytes_stat": self.bytes_stat,
+                "files_hashed": self.files_hashed,
+                "bytes_hashed": self.bytes_hashed,
+                "files_per_second": self.files_per_second(),
+                "errors": dict(self.errors),
+                "phases": {
+                    p: {"seconds": self.phase_seconds[p], "calls": self.phase_calls[p]}
+                    for p in self.phase_seconds
+                },
+                "dir_latency_histogram": histogram,
+                "slowest_dirs": [
+                    {"path": path, "seconds": secs}
+                    for secs, path in sorted(self._slowest, reverse=True)
+                ],
+            }
+
+    def dump(self, path: str) -> None:
+        """Write the snapshot to ``path`` as JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
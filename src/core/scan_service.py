@@ -0,0 +1,312 @@
+import os
+import sys
+import time
+import getpass
+import logging
+import secrets
+import threading
+from datetime import datetime
+from multiprocessing.connection import Listener
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.core.file_scanner import FileScanner
+from src.core.multi_scan import MultiRootScanner
+from src.core.scan_index import ScanIndex
+from src.core.checkpoint import ScanCheckpoint, HashCheckpoint
+from src.core.analysis import filter_files, find_duplicate_groups, space_by_extension
+from src.core.snapshots import SnapshotStore
+from src.utils.paths import app_data_dir
+
+RECORDS_PAGE = 100000
+
+# Wire format for a record: (path, size, mtime, atime, extension, hash, allocated size, links, file id)
+# -- far smaller than dicts
+WireRow = Tuple[str, int, float, float, str, str, int, int, Optional[Tuple[int, int]]]
+
+
+def service_address() -> str:
+    """Named pipe on Windows, a Unix socket in the app data directory elsewhere."""
+    if sys.platform == "win32":
+        return r"\\.\pipe\StorageAssistant-" + getpass.getuser()
+    return os.path.join(app_data_dir("service"), "service.sock")
+
+
+def service_authkey(create: bool = False) -> Optional[bytes]:
+    """Shared secret for the connection handshake, readable only by the current user."""
+    path = os.path.join(app_data_dir("service"), "authkey")
+    if create:
+        key = secrets.token_bytes(32)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        return key
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def to_wire(records: List[Dict]) -> List[WireRow]:
+    return [
+        (r["path"], r["size"], r["last_modified"].timestamp(), r["last_accessed"].timestamp(),
+         r["extension"], r.get("hash", ""), r.get("allocated_size", r["size"]), r.get("links", 1), r.get("file_id"))
+        for r in records
+    ]
+
+
+def from_wire(rows: List[WireRow]) -> List[Dict]:
+    return [
+        {
+            "path": path,
+            "size": size,
+            "last_modified": datetime.fromtimestamp(mtime),
+            "last_accessed": datetime.fromtimestamp(atime),
+            "extension": extension,
+            "hash": digest,
+            "allocated_size": allocated,
+            "links": links,
+            "file_id": file_id,
+        }
+        for path, size, mtime, atime, extension, digest, allocated, links, file_id in rows
+    ]
+
+
+class ScanService:
+    """Owns the scanner, scan data, indexes and hash progress for every client.
+
+    Requests are ``{"method": name, "params": {...}}`` and replies are
+    ``{"ok": True, "result": ...}`` or ``{"ok": False, "error": message}``,
+    pickled by ``multiprocessing.connection`` over an authenticated named
+    pipe or Unix socket. Each connection gets its own thread; scans run in
+    the background and swap in their results when complete, so queries keep
+    answering from the previous scan meanwhile.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.scanner = FileScanner()
+        self.lock = threading.RLock()
+        self.hash_lock = threading.Lock()  # one duplicate search at a time
+        self.file_data: List[Dict] = []
+        self.index = ScanIndex()
+        self.roots: List[str] = []
+        self.duplicate_groups: Optional[List[List[Dict]]] = None
+        self.space: Optional[Tuple[int, Dict[str, Dict]]] = None
+        self.multi_scanner: Optional[MultiRootScanner] = None
+        self.scan_thread: Optional[threading.Thread] = None
+        self.scan_state = {"state": "idle", "progress": 0.0, "roots": [], "started": None, "finished": None}
+        self.handlers: Dict[str, Callable] = {
+            "scan": self.scan,
+            "status": self.status,
+            "cancel": self.cancel,
+            "query": self.query,
+            "search": self.search,
+            "stats": self.stats,
+            "space": self.space_by_extension,
+            "duplicates": self.duplicates,
+            "save_snapshot": self.save_snapshot,
+            "records": self.records,
+        }
+
+    # --- handlers ---------------------------------------------------------
+
+    def scan(self, roots: List[str], wait: bool = False) -> Dict:
+        """Start scanning ``roots``; with ``wait`` return only once it has finished."""
+        with self.lock:
+            if self.scan_thread and self.scan_thread.is_alive():
+                raise RuntimeError("A scan is already running")
+            missing = [root for root in roots if not os.path.exists(root)]
+            if not roots or missing:
+                raise ValueError(f"Not a valid directory: {', '.join(missing) or 'none given'}")
+            self.scan_state = {"state": "scanning", "progress": 0.0, "roots": roots,
+                               "started": time.time(), "finished": None}
+            self.scan_thread = threading.Thread(target=self._run_scan, args=(roots,), daemon=True)
+            self.scan_thread.start()
+        if wait:
+            self.scan_thread.join()
+        return self.status()
+
+    def _run_scan(self, roots: List[str]) -> None:
+        index = ScanIndex()
+        index_lock = threading.Lock()
+
+        def index_record(record):
+            with index_lock:
+                index.add(record)
+
+        def on_progress(percent):
+            self.scan_state["progress"] = percent
+
+        try:
+            if len(roots) > 1:
+                self.multi_scanner = MultiRootScanner(roots, io_scheduler=self.scanner.io_scheduler)
+                file_data = self.multi_scanner.scan(progress_callback=on_progress, record_callback=index_record)
+            else:
+                self.multi_scanner = None
+                file_data = self.scanner.fast_scan_directory(
+                    roots[0], progress_callback=on_progress,
+                    checkpoint=ScanCheckpoint(roots[0]), record_callback=index_record
+                )
+            if self.multi_scanner:
+                cancelled = any(self.multi_scanner.cancelled.values())
+            else:
+                cancelled = self.scanner.scan_cancelled
+            if cancelled:
+                # Partial results must not replace the last complete scan
+                self.scan_state.update(state="cancelled")
+                self.scan_state["finished"] = time.time()
+                return
+            if index.file_count != len(file_data):
+                index = ScanIndex(file_data)
+            with self.lock:
+                self.file_data = file_data
+                self.index = index
+                self.roots = roots
+                self.duplicate_groups = None
+                self.space = None
+            self.scan_state.update(state="done", progress=100.0)
+        except Exception as e:
+            self.logger.error(f"Scan of {roots} failed: {str(e)}")
+            self.scan_state.update(state="failed", error=str(e))
+        self.scan_state["finished"] = time.time()
+
+    def status(self) -> Dict:
+        with self.lock:
+            return {**self.scan_state, "files": self.index.file_count, "total_size": self.index.total_size,
+                    "scanned_roots": self.roots}
+
+    def cancel(self) -> Dict:
+        """Stop the running scan or duplicate search."""
+        self.scanner.scan_cancelled = True
+        if self.multi_scanner:
+            self.multi_scanner.cancel()
+        return self.status()
+
+    def query(self, params: Dict, limit: Optional[int] = None) -> Dict:
+        """Filter the scan like the app's list action; rows come back largest first."""
+        params = dict(params)
+        folder = params.pop("folder", None)
+        with self.lock:
+            # A folder scope is a contiguous range of the index's path order, not a full pass
+            matches = filter_files(self.index.records_under(folder) if folder else self.file_data, params)
+        matches = sorted(matches, key=lambda r: -r["size"])
+        return {"count": len(matches), "rows": to_wire(matches[:limit] if limit else matches)}
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[float, WireRow]]:
+        with self.lock:
+            matches = self.index.search(query, limit)
+        return [(score, to_wire([record])[0]) for score, record in matches]
+
+    def stats(self, top: int = 20) -> Dict:
+        with self.lock:
+            return {
+                "files": self.index.file_count,
+                "total_size": self.index.total_size,
+                "roots": self.roots,
+                "extensions": self.index.top_extensions(top),
+                "scanned_at": self.scan_state.get("finished"),
+            }
+
+    def space_by_extension(self) -> Tuple[int, Dict[str, Dict]]:
+        """``analysis.space_by_extension`` of the current scan, computed once per scan."""
+        with self.lock:
+            if self.space is None:
+                self.space = space_by_extension(self.file_data)
+            return self.space
+
+    def save_snapshot(self, name: str, root: str = "", auto: bool = False) -> str:
+        """Snapshot the current scan into the shared snapshot folder, so clients need not fetch it."""
+        with self.lock:
+            file_data = self.file_data
+        return SnapshotStore().save(name, file_data, root, auto)
+
+    def duplicates(self) -> List[List[WireRow]]:
+        """Duplicate sets of the current scan; computed once per scan, resumable if interrupted."""
+        with self.hash_lock:
+            with self.lock:
+                file_data, roots, groups = self.file_data, self.roots, self.duplicate_groups
+            if groups is None:
+                # Hash outside the state lock so status, queries and cancel stay responsive
+                hash_checkpoint = HashCheckpoint(os.pathsep.join(roots))
+                scheduler = self.scanner.io_scheduler
+                self.scanner.scan_cancelled = False
+                hash_func = self.scanner.calculate_file_hash
+                multi_scanner = self.multi_scanner
+                if multi_scanner:
+                    # Paths outside its roots (a newer scan started meanwhile) just run unbudgeted
+                    hash_func = multi_scanner.budgeted(hash_func)
+                groups = find_duplicate_groups(
+                    file_data,
+                    hash_func,
+                    order_key=scheduler.locality_key(file_data) if scheduler else None,
+                    hash_cache=hash_checkpoint
+                )
+                if self.scanner.scan_cancelled:
+                    hash_checkpoint.close()
+                    raise RuntimeError("Duplicate search cancelled; it will resume from here next time")
+                hash_checkpoint.clear()
+                with self.lock:
+                    if self.file_data is file_data:
+                        self.duplicate_groups = groups
+            return [to_wire(group) for group in groups]
+
+    def records(self, offset: int = 0, limit: int = RECORDS_PAGE) -> Dict:
+        """One page of the full record list, for clients that need the whole scan."""
+        with self.lock:
+            page = self.file_data[offset:offset + limit]
+            return {"total": len(self.file_data), "rows": to_wire(page)}
+
+    # --- transport --------------------------------------------------------
+
+    def dispatch(self, request: Dict) -> Dict:
+        handler = self.handlers.get(request.get("method"))
+        if handler is None:
+            return {"ok": False, "error": f"Unknown method: {request.get('method')}"}
+        try:
+            return {"ok": True, "result": handler(**request.get("params", {}))}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    def _serve_connection(self, conn) -> None:
+        try:
+            while True:
+                try:
+                    request = conn.recv()
+                except EOFError:
+                    break
+                conn.send(self.dispatch(request))
+        except OSError as e:
+            self.logger.warning(f"Client connection dropped: {str(e)}")
+        finally:
+            conn.close()
+
+    def serve(self, address: Optional[str] = None) -> None:
+        """Accept clients until interrupted."""
+        address = address or service_address()
+        if sys.platform != "win32" and os.path.exists(address):
+            os.remove(address)  # stale socket from a previous run
+        authkey = service_authkey(create=True)
+        with Listener(address, authkey=authkey) as listener:
+            self.logger.info(f"Scan service listening on {address}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except (OSError, EOFError) as e:
+                    # Failed handshakes (wrong key, client gone) must not stop the service
+                    self.logger.warning(f"Rejected client: {str(e)}")
+                    continue
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    service = ScanService()
+    try:
+        service.serve()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import json
+import argparse
+import threading
+from multiprocessing.connection import Client, AuthenticationError
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.core.scan_index import ScanIndex
+from src.core.scan_service import service_address, service_authkey, from_wire, RECORDS_PAGE
+
+CONTEXT_ROWS = 20000  # largest files fetched for the client's chat context
+
+
+class ServiceError(Exception):
+    """The scan service rejected a request."""
+
+
+class ServiceClient:
+    """Thin client for a running ``ScanService``; safe to share between threads."""
+
+    def __init__(self, address: Optional[str] = None, authkey: Optional[bytes] = None):
+        self.address = address or service_address()
+        self.authkey = authkey or service_authkey()
+        self.lock = threading.Lock()
+        self.idle = [self._open()]  # connections not carrying a request
+
+    def _open(self):
+        return Client(self.address, authkey=self.authkey)
+
+    @classmethod
+    def connect(cls, address: Optional[str] = None) -> Optional["ServiceClient"]:
+        """A client for the local service, or None when none is running."""
+        authkey = service_authkey()
+        if authkey is None:
+            return None
+        try:
+            return cls(address, authkey)
+        except (OSError, EOFError, AuthenticationError):
+            return None
+
+    def call(self, method: str, **params):
+        # A connection carries one request at a time. A call made while another is in flight
+        # (cancel during a long duplicate search) gets its own connection instead of waiting
+        with self.lock:
+            conn = self.idle.pop() if self.idle else None
+        if conn is None:
+            conn = self._open()
+        try:
+            conn.send({"method": method, "params": params})
+            reply = conn.recv()
+        except BaseException:
+            conn.close()
+            raise
+        with self.lock:
+            self.idle.append(conn)
+        if not reply["ok"]:
+            raise ServiceError(reply["error"])
+        return reply["result"]
+
+    def scan(self, roots: List[str], wait: bool = True) -> Dict:
+        return self.call("scan", roots=roots, wait=wait)
+
+    def status(self) -> Dict:
+        return self.call("status")
+
+    def cancel(self) -> Dict:
+        return self.call("cancel")
+
+    def query(self, params: Dict, limit: Optional[int] = None) -> Tuple[int, List[Dict]]:
+        result = self.call("query", params=params, limit=limit)
+        return result["count"], from_wire(result["rows"])
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[float, Dict]]:
+        matches = self.call("search", query=query, limit=limit)
+        return [(score, from_wire([row])[0]) for score, row in matches]
+
+    def stats(self, top: Optional[int] = 20) -> Dict:
+        return self.call("stats", top=top)
+
+    def space(self) -> Tuple[int, Dict[str, Dict]]:
+        return tuple(self.call("space"))
+
+    def save_snapshot(self, name: str, root: str = "", auto: bool = False) -> str:
+        return self.call("save_snapshot", name=name, root=root, auto=auto)
+
+    def duplicates(self) -> List[List[Dict]]:
+        return [from_wire(group) for group in self.call("duplicates")]
+
+    def records(self) -> List[Dict]:
+        """The whole current scan, fetched in pages."""
+        records: List[Dict] = []
+        while True:
+            page = self.call("records", offset=len(records), limit=RECORDS_PAGE)
+            records.extend(from_wire(page["rows"]))
+            if not page["rows"] or len(records) >= page["total"]:
+                return records
+
+    def current_scan(self) -> "RemoteScan":
+        return RemoteScan(self, self.status()["files"])
+
+    def close(self) -> None:
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for conn in idle:
+            conn.close()
+
+
+class RemoteScan:
+    """The service's current scan, queried where it lives instead of copied.
+
+    Listing, search and totals run in the service against its warm index and
+    only the rows asked for cross the connection; the method names match
+    ``SpillStore`` so callers treat both alike. Iterating pages through every
+    record, for the few reports that need all of them.
+    """
+
+    def __init__(self, client: ServiceClient, files: int):
+        self.client = client
+        self.files = files
+
+    def __len__(self) -> int:
+        return self.files
+
+    def __iter__(self) -> Iterator[Dict]:
+        offset = 0
+        while True:
+            page = self.client.call("records", offset=offset, limit=RECORDS_PAGE)
+            yield from from_wire(page["rows"])
+            offset += len(page["rows"])
+            if not page["rows"] or offset >= page["total"]:
+                return
+
+    def filter(self, params: Dict) -> List[Dict]:
+        return self.client.query(params)[1]
+
+    def largest(self, n: int, params: Optional[Dict] = None) -> List[Dict]:
+        return self.client.query(params or {}, n)[1]
+
+    def select(self, params: Dict, limit: int,
+               predicate: Optional[Callable[[Dict], bool]] = None) -> Tuple[int, List[Dict]]:
+        """Same contract as ``SpillStore.select``."""
+        if predicate is None:
+            return self.client.query(params, limit)
+        matches = [record for record in self.filter(params) if predicate(record)]
+        return len(matches), matches[:limit]
+
+    def space_by_extension(self) -> Tuple[int, Dict[str, Dict]]:
+        return self.client.space()
+
+    def summary_index(self, limit: int = CONTEXT_ROWS) -> ScanIndex:
+        """A local index of the largest files with whole-scan totals, for chat context."""
+        index = ScanIndex(self.largest(limit))
+        stats = self.client.stats(top=None)
+        index.file_count = stats["files"]
+        index.total_size = stats["total_size"]
+        index.extension_totals = {ext: [count, size] for ext, count, size in stats["extensions"]}
+        return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the running Storage Assistant scan service")
+    commands = parser.add_subparsers(dest="command", required=True)
+    scan = commands.add_parser("scan", help="Scan one or more roots")
+    scan.add_argument("roots", nargs="+")
+    scan.add_argument("--no-wait", action="store_true", help="Return as soon as the scan has started")
+    commands.add_parser("status")
+    commands.add_parser("cancel")
+    commands.add_parser("stats")
+    commands.add_parser("duplicates")
+    search = commands.add_parser("search", help="Fuzzy file name search")
+    search.add_argument("query")
+    search.add_argument("--limit", type=int, default=20)
+    query = commands.add_parser("query", help="List files by extension and size, largest first")
+    query.add_argument("--extension")
+    query.add_argument("--min-size", type=int)
+    query.add_argument("--folder", help="Only files below this folder")
+    query.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    client = ServiceClient.connect()
+    if client is None:
+        parser.exit(1, "No scan service is running; start it with python -m src.core.scan_service\n")
+    try:
+        if args.command == "scan":
+            print(json.dumps(client.scan(args.roots, wait=not args.no_wait)))
+        elif args.command in ("status", "cancel", "stats"):
+            print(json.dumps(getattr(client, args.command)()))
+        elif args.command == "duplicates":
+            for group in client.duplicates():
+                print(f"{group[0]['size']} bytes x{len(group)}")
+                for record in group:
+                    print(f"  {record['path']}")
+        elif args.command == "search":
+            for score, record in client.search(args.query, args.limit):
+                print(f"{score:.2f}\t{record['size']}\t{record['path']}")
+        else:
+            params = {k: v for k, v in (
+                ("extension", args.extension), ("min_size", args.min_size), ("folder", args.folder)
+            ) if v is not None}
+            count, records = client.query(params, args.limit)
+            for record in records:
+                print(f"{record['size']}\t{record['path']}")
+            print(f"{count} files matched")
+    except ServiceError as e:
+        parser.exit(1, f"Error: {str(e)}\n")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
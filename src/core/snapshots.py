@@ -0,0 +1,251 @@
+import os
+import gzip
+import json
+import heapq
+import time
+import re
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.utils.paths import app_data_dir
+from src.core.scan_index import path_key, subtree_bounds
+
+SNAPSHOT_SUFFIX = ".snap.gz"
+SNAPSHOT_VERSION = 1
+DEFAULT_KEEP = 10
+TOP_CHANGES = 50
+
+Row = Tuple[str, int, int]  # (path, size, mtime)
+
+
+def _encode_path(path: str) -> str:
+    # Paths are tab-separated; the rare path with control characters is JSON-quoted
+    if "\t" in path or "\n" in path or "\r" in path or path.startswith('"'):
+        return json.dumps(path)
+    return path
+
+
+def _decode_line(line: str) -> Row:
+    path, size, mtime = line.rstrip("\n").rsplit("\t", 2)
+    if path.startswith('"'):
+        path = json.loads(path)
+    return path, int(size), int(mtime)
+
+
+def record_rows(file_data: Iterable[Dict]) -> List[Row]:
+    """Sorted ``(path, size, mtime)`` rows for in-memory scan records.
+
+    Record stores that can sort on disk (``SpillStore``) supply their own rows.
+    """
+    sorted_rows = getattr(file_data, "sorted_rows", None)
+    if sorted_rows is not None:
+        return sorted_rows()
+    rows = [(f["path"], f["size"], int(f["last_modified"].timestamp())) for f in file_data]
+    rows.sort()
+    return rows
+
+
+def row_lines(rows: Iterable[Row]) -> Iterator[str]:
+    """Encode rows exactly as they are stored, so unchanged files compare equal as strings."""
+    return (f"{_encode_path(p)}\t{s}\t{m}\n" for p, s, m in rows)
+
+
+def lines_under(lines: Iterable[str], folders: List[str]) -> Iterator[str]:
+    """Snapshot lines for files below any of ``folders``."""
+    bounds = [subtree_bounds(folder) for folder in folders]
+    for line in lines:
+        key = path_key(_decode_line(line)[0])
+        if any(low <= key < high for low, high in bounds):
+            yield line
+
+
+def snapshot_name(root: str) -> str:
+    """Default snapshot name for a scan of ``root``: folder name plus timestamp."""
+    base = os.path.basename(root.rstrip("\\/")) or root.strip(":\\/") or "root"
+    return f"{base}_{time.strftime('%Y%m%d_%H%M%S')}"
+
+
+class SnapshotStore:
+    """Named, gzip-compressed scan snapshots, stored sorted by path."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or app_data_dir("snapshots")
+        self.logger = logging.getLogger(__name__)
+
+    def _path(self, name: str) -> str:
+        safe_name = re.sub(r"[^\w.\-]", "_", name)
+        return os.path.join(self.directory, safe_name + SNAPSHOT_SUFFIX)
+
+    def save(self, name: str, file_data: Iterable[Dict], root: str = "", auto: bool = False) -> str:
+        """Write a snapshot of ``file_data`` under ``name``; ``auto`` marks one taken after a scan."""
+        rows = record_rows(file_data)
+        path = self._path(name)
+        tmp_path = path + ".tmp"
+        header = {"version": SNAPSHOT_VERSION, "name": name, "root": root,
+                  "created": time.time(), "files": len(rows), "auto": auto}
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(json.dumps(header) + "\n")
+            f.writelines(row_lines(rows))
+        os.replace(tmp_path, path)
+        return path
+
+    def list(self) -> List[Dict]:
+        """Snapshot headers, newest first."""
+        snapshots = []
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith(SNAPSHOT_SUFFIX):
+                try:
+                    with gzip.open(os.path.join(self.directory, file_name), "rt", encoding="utf-8") as f:
+                        snapshots.append(json.loads(f.readline()))
+                except (OSError, ValueError) as e:
+                    self.logger.warning(f"Skipping unreadable snapshot {file_name}: {str(e)}")
+        return sorted(snapshots, key=lambda h: -h["created"])
+
+    def delete(self, name: str) -> None:
+        os.remove(self._path(name))
+
+    def prune(self, root: str, keep: int = DEFAULT_KEEP) -> None:
+        """Keep only the newest ``keep`` automatic snapshots of ``root``; named ones are never pruned."""
+        for header in [h for h in self.list() if h.get("root") == root and h.get("auto")][keep:]:
+            self.delete(header["name"])
+
+    def lines(self, name: str) -> Iterator[str]:
+        """Raw data lines of a snapshot, in path order."""
+        with gzip.open(self._path(name), "rt", encoding="utf-8") as f:
+            f.readline()  # header
+            yield from f
+
+    def rows(self, name: str) -> Iterator[Row]:
+        return (_decode_line(line) for line in self.lines(name))
+
+
+class _DeltaTable:
+    """Accumulates byte/count deltas per key."""
+
+    def __init__(self):
+        self.deltas: Dict[str, List[int]] = {}
+
+    def add(self, key: str, byte_delta: int, count_delta: int) -> None:
+        entry = self.deltas.get(key)
+        if entry is None:
+            entry = self.deltas[key] = [0, 0]
+        entry[0] += byte_delta
+        entry[1] += count_delta
+
+    def top(self, n: int) -> List[Dict]:
+        ranked = heapq.nlargest(n, self.deltas.items(), key=lambda kv: abs(kv[1][0]))
+        return [{"key": k, "bytes": b, "files": c} for k, (b, c) in ranked if b or c]
+
+
+def _ancestors(path: str) -> Iterator[str]:
+    directory = os.path.dirname(path)
+    while directory:
+        yield directory
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+
+
+def diff_snapshots(old: Iterable, new: Iterable, top: int = TOP_CHANGES) -> Dict:
+    """Sorted merge of two path-ordered snapshots.
+
+    ``old`` and ``new`` yield either raw snapshot lines or ``(path, size, mtime)``
+    rows. Identical lines are skipped without parsing, so the cost of unchanged
+    files is one string comparison. Only changed files touch the delta tables.
+    """
+    old_iter = iter(old)
+    new_iter = iter(new)
+    parse = lambda item: _decode_line(item) if isinstance(item, str) else item
+
+    directories = _DeltaTable()
+    extensions = _DeltaTable()
+    added: List[Tuple[int, str]] = []
+    removed: List[Tuple[int, str]] = []
+    grown: List[Tuple[int, str]] = []
+    totals = {"added_files": 0, "added_bytes": 0, "removed_files": 0, "removed_bytes": 0,
+              "grown_files": 0, "shrunk_files": 0, "changed_bytes": 0, "unchanged_files": 0}
+
+    def keep_top(heap, delta, path):
+        if len(heap) < top:
+            heapq.heappush(heap, (delta, path))
+        elif delta > heap[0][0]:
+            heapq.heapreplace(heap, (delta, path))
+
+    def account(path, byte_delta, count_delta):
+        for directory in _ancestors(path):
+            directories.add(directory, byte_delta, count_delta)
+        extensions.add(os.path.splitext(path)[1].lower() or "no_extension", byte_delta, count_delta)
+
+    old_item = next(old_iter, None)
+    new_item = next(new_iter, None)
+    while old_item is not None or new_item is not None:
+        if old_item is not None and new_item is not None and old_item == new_item:
+            totals["unchanged_files"] += 1
+            old_item = next(old_iter, None)
+            new_item = next(new_iter, None)
+            continue
+        old_row = parse(old_item) if old_item is not None else None
+        new_row = parse(new_item) if new_item is not None else None
+
+        if new_row is None or (old_row is not None and old_row[0] < new_row[0]):
+            path, size, _ = old_row
+            totals["removed_files"] += 1
+            totals["removed_bytes"] += size
+            keep_top(removed, size, path)
+            account(path, -size, -1)
+            old_item = next(old_iter, None)
+        elif old_row is None or new_row[0] < old_row[0]:
+            path, size, _ = new_row
+            totals["added_files"] += 1
+            totals["added_bytes"] += size
+            keep_top(added, size, path)
+            account(path, size, 1)
+            new_item = next(new_iter, None)
+        else:
+            path = new_row[0]
+            delta = new_row[1] - old_row[1]
+            if delta > 0:
+                totals["grown_files"] += 1
+                keep_top(grown, delta, path)
+            elif delta < 0:
+                totals["shrunk_files"] += 1
+            else:
+                totals["unchanged_files"] += 1
+            if delta:
+                totals["changed_bytes"] += delta
+                account(path, delta, 0)
+            old_item = next(old_iter, None)
+            new_item = next(new_iter, None)
+
+    totals["net_bytes"] = totals["added_bytes"] - totals["removed_bytes"] + totals["changed_bytes"]
+    ordered = lambda heap: [{"path": p, "bytes": b} for b, p in sorted(heap, reverse=True)]
+    return {
+        "totals": totals,
+        "added": ordered(added),
+        "removed": ordered(removed),
+        "grown": ordered(grown),
+        "directories": directories.top(top),
+        "extensions": extensions.top(top),
+    }
+
+
+def format_diff(diff: Dict, limit: int = 10) -> str:
+    """Human/LLM-readable summary of a diff."""
+    mb = lambda b: f"{b / (1024 * 1024):+.2f} MB"
+    t = diff["totals"]
+    lines = [
+        f"Net change: {mb(t['net_bytes'])}",
+        f"Added: {t['added_files']} files ({mb(t['added_bytes'])}), "
+        f"removed: {t['removed_files']} files ({mb(-t['removed_bytes'])}), "
+        f"grown: {t['grown_files']}, shrunk: {t['shrunk_files']}",
+        "Directories with the largest change:",
+    ]
+    lines += [f"- {d['key']}: {mb(d['bytes'])} ({d['files']:+d} files)" for d in diff["directories"][:limit]]
+    lines.append("Extensions with the largest change:")
+    lines += [f"- {e['key']}: {mb(e['bytes'])} ({e['files']:+d} files)" for e in diff["extensions"][:limit]]
+    lines.append("Largest new files:")
+    lines += [f"- {a['path']} ({mb(a['bytes'])})" for a in diff["added"][:limit]]
+    lines.append("Files that grew the most:")
+    lines += [f"- {g['path']} ({mb(g['bytes'])})" for g in diff["grown"][:limit]]
+    return "\n".join(lines)
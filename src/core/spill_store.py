@@ -0,0 +1,401 @@
+import os
+import re
+import sys
+import time
+import atexit
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.core.scan_index import ScanIndex, subtree_bounds, path_key
+from src.core.analysis import find_duplicate_groups, reclaimable_bytes
+from src.utils.paths import app_data_dir
+
+BATCH_SIZE = 50000
+RECORD_BYTES = 700                     # rough in-memory cost of one record with its strings and datetimes
+DEFAULT_MEMORY_BUDGET = 1024 ** 3      # records kept in RAM before spilling
+SQLITE_CACHE_KB = 64 * 1024
+SUMMARY_ROWS = 100000                  # largest files indexed in memory for search and chat context
+FETCH_LIMIT = 100000                   # records loaded at once for a listing or deletion
+
+_COLUMNS = "path, size, mtime, atime, ext, hash, allocated, links, file_id"
+
+
+def _row(record: Dict) -> Tuple:
+    # File IDs are text: NTFS file indexes do not fit SQLite's signed 64-bit integers
+    file_id = record.get("file_id")
+    return (
+        record["path"], record["size"], record["last_modified"].timestamp(),
+        record["last_accessed"].timestamp(), record["extension"], record.get("hash", ""),
+        record.get("allocated_size", record["size"]), record.get("links", 1),
+        f"{file_id[0]}:{file_id[1]}" if file_id else None,
+    )
+
+
+def _record(row: Tuple) -> Dict:
+    path, size, mtime, atime, ext, digest, allocated, links, file_id = row
+    return {
+        "path": path,
+        "size": size,
+        "last_modified": datetime.fromtimestamp(mtime),
+        "last_accessed": datetime.fromtimestamp(atime),
+        "extension": ext,
+        "hash": digest,
+        "allocated_size": allocated,
+        "links": links,
+        "file_id": tuple(int(part) for part in file_id.split(":")) if file_id else None,
+    }
+
+
+class SpillStore:
+    """Scan records in a temporary SQLite file instead of RAM.
+
+    Iterating yields record dicts in insertion order, so code that only walks
+    the records (filters, aging, export, junk counts) works unchanged. Grouping
+    and ranking run as SQL instead: totals per extension are a GROUP BY, the
+    top-K is an ORDER BY ... LIMIT, and duplicate candidates come out of a size
+    index that SQLite builds with an external sort. Memory stays at the page
+    cache size however many files are stored.
+    """
+
+    def __init__(self, path: Optional[str] = None, batch_size: int = BATCH_SIZE):
+        self.path = path or os.path.join(app_data_dir("spill"), f"scan-{os.getpid()}-{int(time.time() * 1000)}.db")
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=OFF")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute("PRAGMA temp_store=FILE")
+        self.conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files "
+            "(path TEXT, size INTEGER, mtime REAL, atime REAL, ext TEXT, hash TEXT, "
+            "allocated INTEGER, links INTEGER, file_id TEXT, key TEXT)"
+        )
+        self.lock = threading.RLock()
+        self.buffer: List[Tuple] = []
+        self.count = self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        self.total_size = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM files").fetchone()[0]
+        self.indexes = set()
+        if self.path != ":memory:":
+            # Removed at interpreter exit too; files left by a crash are swept by remove_stale_spills
+            atexit.register(self.close)
+
+    def append(self, record: Dict) -> None:
+        self.buffer.append(_row(record) + (path_key(record["path"]),))
+        self.count += 1
+        self.total_size += record["size"]
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def extend(self, records: Iterable[Dict]) -> None:
+        for record in records:
+            self.append(record)
+
+    def flush(self) -> None:
+        with self.lock:
+            if self.buffer:
+                with self.conn:
+                    self.conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", self.buffer)
+                self.buffer = []
+
+    def _index(self, column: str) -> None:
+        """Index ``column`` on first use; building it once is an external sort of the table."""
+        if column not in self.indexes:
+            self.flush()
+            with self.lock, self.conn:
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS files_{column} ON files ({column})")
+            self.indexes.add(column)
+
+    def _query(self, sql: str, args: Tuple = ()) -> Iterator[Dict]:
+        self.flush()
+        for row in self.conn.execute(sql, args):
+            yield _record(row)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self._query(f"SELECT {_COLUMNS} FROM files ORDER BY rowid")
+
+    def rows_after(self, offset: int) -> List[Dict]:
+        """Records appended after the first ``offset`` (rowids are 1-based and never reused)."""
+        return list(self._query(f"SELECT {_COLUMNS} FROM files WHERE rowid > ? ORDER BY rowid", (offset,)))
+
+    def _where(self, params: Dict) -> Tuple[str, List]:
+        clauses, args = [], []
+        if "extension" in params:
+            clauses.append("ext = ?")
+            args.append(params["extension"])
+        if "min_size" in params:
+            clauses.append("size >= ?")
+            args.append(params["min_size"])
+        if params.get("folder"):
+            self._index("key")
+            low, high = subtree_bounds(params["folder"])
+            clauses.append("key >= ? AND key < ?")
+            args += [low, high]
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    def filter(self, params: Dict) -> Iterator[Dict]:
+        """Records matching the same parameters as ``analysis.filter_files``."""
+        where, args = self._where(params)
+        return self._query(f"SELECT {_COLUMNS} FROM files{where}", tuple(args))
+
+    def select(self, params: Dict, limit: int,
+               predicate: Optional[Callable[[Dict], bool]] = None) -> Tuple[int, List[Dict]]:
+        """``(matches, largest matches)``: all records matching ``params`` (and ``predicate``) are
+        counted, but at most ``limit`` of them, largest first, are loaded."""
+        if predicate is None:
+            where, args = self._where(params)
+            self.flush()
+            total = self.conn.execute(f"SELECT COUNT(*) FROM files{where}", tuple(args)).fetchone()[0]
+            return total, self.largest(limit, params)
+        where, args = self._where(params)
+        total = 0
+        selected: List[Dict] = []
+        for record in self._query(f"SELECT {_COLUMNS} FROM files{where} ORDER BY size DESC", tuple(args)):
+            if predicate(record):
+                total += 1
+                if len(selected) < limit:
+                    selected.append(record)
+        return total, selected
+
+    def largest(self, n: int, params: Optional[Dict] = None) -> List[Dict]:
+        """Top ``n`` by size; SQLite keeps only ``n`` rows while sorting for a LIMIT."""
+        where, args = self._where(params or {})
+        return list(self._query(f"SELECT {_COLUMNS} FROM files{where} ORDER BY size DESC LIMIT ?", (*args, n)))
+
+    def space_by_extension(self) -> Tuple[int, Dict[str, Dict]]:
+        """Same result as ``analysis.space_by_extension``, computed by SQL.
+
+        Extra links to an already counted file are subtracted in a second
+        query that only visits rows with a file ID.
+        """
+        self.flush()
+        totals = {
+            ext: [count, size, allocated]
+            for ext, count, size, allocated in self.conn.execute(
+                "SELECT ext, COUNT(*), SUM(size), SUM(allocated) FROM files GROUP BY ext"
+            )
+        }
+        extra_links = self.conn.execute(
+            "SELECT ext, SUM(size), SUM(allocated) FROM (SELECT ext, size, allocated, "
+            "ROW_NUMBER() OVER (PARTITION BY file_id ORDER BY rowid) AS n FROM files WHERE file_id IS NOT NULL) "
+            "WHERE n > 1 GROUP BY ext"
+        )
+        for ext, size, allocated in extra_links:
+            totals[ext][1] -= size
+            totals[ext][2] -= allocated
+        total_size = sum(size for _, size, _ in totals.values())
+        return total_size, {
+            (ext or "no_extension"): {
+                "count": count,
+                "total_size": size,
+                "allocated_size": allocated,
+                "percentage": (size / total_size * 100) if total_size else 0.0,
+            }
+            for ext, (count, size, allocated) in totals.items()
+        }
+
+    def size_groups(self, min_size: int = 1) -> Iterator[List[Dict]]:
+        """Records sharing a size, one group at a time, streamed in size order from the index."""
+        self._index("size")
+        group: List[Dict] = []
+        sql = (
+            f"SELECT {_COLUMNS} FROM files WHERE size IN "
+            "(SELECT size FROM files WHERE size >= ? GROUP BY size HAVING COUNT(*) > 1) ORDER BY size"
+        )
+        for record in self._query(sql, (min_size,)):
+            if group and record["size"] != group[0]["size"]:
+                yield group
+                group = []
+            group.append(record)
+        if group:
+            yield group
+
+    def duplicate_candidates(self, min_size: int = 1) -> int:
+        self._index("size")
+        return self.conn.execute(
+            "SELECT COALESCE(SUM(n), 0) FROM (SELECT COUNT(*) AS n FROM files WHERE size >= ? "
+            "GROUP BY size HAVING COUNT(*) > 1)", (min_size,)
+        ).fetchone()[0]
+
+    def duplicate_groups(
+        self,
+        hash_func: Callable[[str], Optional[str]],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        hash_cache=None
+    ) -> List[List[Dict]]:
+        """Duplicate sets, hashing one size bucket at a time instead of grouping everything in RAM."""
+        total = self.duplicate_candidates()
+        done = 0
+        groups: List[List[Dict]] = []
+        for bucket in self.size_groups():
+            groups.extend(find_duplicate_groups(bucket, hash_func, hash_cache=hash_cache))
+            done += len(bucket)
+            if progress_callback:
+                progress_callback(done, total)
+        return groups
+
+    def sorted_rows(self) -> "_PathOrderedRows":
+        """Snapshot rows sorted by path on disk; see ``snapshots.record_rows``."""
+        return _PathOrderedRows(self)
+
+    def summary_index(self, limit: int = SUMMARY_ROWS) -> ScanIndex:
+        """An in-memory index of the largest files with whole-scan totals, for search and chat context."""
+        index = ScanIndex(self.largest(limit))
+        total_size, extensions = self.space_by_extension()
+        index.file_count = self.count
+        index.total_size = total_size
+        index.extension_totals = {
+            ("" if ext == "no_extension" else ext): [e["count"], e["total_size"]] for ext, e in extensions.items()
+        }
+        return index
+
+    def close(self, delete: bool = True) -> None:
+        atexit.unregister(self.close)
+        with self.lock:
+            self.conn.close()
+        if delete and self.path != ":memory:":
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+def _process_running(pid: int) -> bool:
+    if sys.platform == "win32":
+        # Windows refuses to delete a file another process has open, so removal itself is the check
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def remove_stale_spills(directory: Optional[str] = None) -> int:
+    """Delete spill files whose process has exited, e.g. after a crash; returns how many."""
+    directory = directory or app_data_dir("spill")
+    removed = 0
+    for name in os.listdir(directory):
+        match = re.match(r"scan-(\d+)-\d+\.db$", name)
+        if not match:
+            continue
+        pid = int(match.group(1))
+        if pid == os.getpid() or _process_running(pid):
+            continue
+        try:
+            os.remove(os.path.join(directory, name))
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+class _PathOrderedRows:
+    """Sized, re-iterable ``(path, size, mtime)`` rows in path order."""
+
+    def __init__(self, store: SpillStore):
+        self.store = store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __iter__(self) -> Iterator[Tuple[str, int, int]]:
+        self.store.flush()
+        # BINARY collation compares UTF-8 bytes, which orders like Python str comparison
+        for path, size, mtime in self.store.conn.execute("SELECT path, size, mtime FROM files ORDER BY path"):
+            yield path, size, int(mtime)
+
+
+class SpillingCollector:
+    """List-like sink for scan records that moves them into a SpillStore past a memory budget.
+
+    Supports what ``fast_scan_directory`` and checkpoints use: ``append``,
+    ``extend``, ``len`` and tail slices ``[start:]``.
+    """
+
+    def __init__(self, memory_budget: int = DEFAULT_MEMORY_BUDGET, directory: Optional[str] = None):
+        self.limit = max(1, memory_budget // RECORD_BYTES)
+        self.directory = directory
+        self.records: List[Dict] = []
+        self.store: Optional[SpillStore] = None
+
+    @property
+    def spilled(self) -> bool:
+        return self.store is not None
+
+    def append(self, record: Dict) -> None:
+        if self.store is not None:
+            self.store.append(record)
+            return
+        self.records.append(record)
+        if len(self.records) > self.limit:
+            path = os.path.join(self.directory, f"scan-{os.getpid()}-{id(self)}.db") if self.directory else None
+            self.store = SpillStore(path)
+            self.store.extend(self.records)
+            self.records = []
+
+    def extend(self, records: Iterable[Dict]) -> None:
+        for record in records:
+            self.append(record)
+
+    def __len__(self) -> int:
+        return len(self.store) if self.store is not None else len(self.records)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.store) if self.store is not None else iter(self.records)
+
+    def __getitem__(self, key):
+        if self.store is None:
+            return self.records[key]
+        if isinstance(key, slice) and key.stop is None and key.step is None:
+            return self.store.rows_after(key.start or 0)
+        raise TypeError("Spilled records only support tail slices")
+
+    def result(self):
+        """The records: a plain list while they fit the budget, otherwise the store."""
+        return self.store if self.store is not None else self.records
+
+
+def main():
+    from src.core.file_scanner import FileScanner
+    parser = argparse.ArgumentParser(description="Scan a huge volume with bounded memory and summarize it")
+    parser.add_argument("root")
+    parser.add_argument("--memory-mb", type=int, default=DEFAULT_MEMORY_BUDGET // (1024 * 1024))
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--duplicates", action="store_true", help="Also hash size collisions")
+    args = parser.parse_args()
+
+    scanner = FileScanner()
+    sink = SpillingCollector(args.memory_mb * 1024 * 1024)
+    records = scanner.fast_scan_directory(args.root, results=sink).result()
+    mb = lambda b: f"{b / (1024 * 1024):.2f} MB"
+    print(f"{len(records)} files{' (spilled to disk)' if sink.spilled else ''}")
+    store = records if isinstance(records, SpillStore) else None
+    if store is None:
+        # Small enough to fit the budget; the same queries run on an in-memory database
+        store = SpillStore(":memory:")
+        store.extend(records)
+    total_size, extensions = store.space_by_extension()
+    print(f"Total: {mb(total_size)}")
+    for ext, e in sorted(extensions.items(), key=lambda kv: -kv[1]["total_size"])[:args.top]:
+        print(f"  {ext}: {e['count']} files, {mb(e['total_size'])}, {mb(e['allocated_size'])} on disk "
+              f"({e['percentage']:.1f}%)")
+    print("Largest files:")
+    for record in store.largest(args.top):
+        print(f"  {mb(record['size'])}  {record['path']}")
+    if args.duplicates:
+        groups = store.duplicate_groups(scanner.calculate_file_hash)
+        wasted = sum(reclaimable_bytes(g) for g in groups)
+        print(f"{len(groups)} duplicate sets, {mb(wasted)} reclaimable")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
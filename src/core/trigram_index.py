@@ -0,0 +1,95 @@
+import heapq
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+COMMON_FRACTION = 0.05  # postings longer than this share of all keys carry little signal
+CANDIDATE_FACTOR = 20   # candidates rescored exactly per requested result
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrams of ``text`` padded with spaces, so prefixes and suffixes get their own grams."""
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(query: str, text: str, query_grams: Optional[Set[str]] = None) -> float:
+    """Dice coefficient over trigrams, plus 1 when ``query`` is a plain substring."""
+    query_grams = query_grams or trigrams(query)
+    text_grams = trigrams(text)
+    score = 2 * len(query_grams & text_grams) / (len(query_grams) + len(text_grams))
+    if query in text:
+        score += 1.0
+    return score
+
+
+class TrigramIndex:
+    """Inverted index from trigrams to integer keys for ranked fuzzy lookup.
+
+    Keys are dense caller-assigned ids (ScanIndex row ids), posted into
+    compact ``array('I')`` lists. Removal only clears the stored text; stale
+    postings are skipped at query time, which is fine because ids are never
+    reused.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, array] = {}
+        self.texts: List[Optional[str]] = []
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, key: int, text: str) -> None:
+        text = text.lower()
+        if key >= len(self.texts):
+            self.texts.extend([None] * (key + 1 - len(self.texts)))
+        if self.texts[key] is None:
+            self.count += 1
+        self.texts[key] = text
+        postings = self.postings
+        for gram in trigrams(text):
+            posting = postings.get(gram)
+            if posting is None:
+                posting = postings[gram] = array("I")
+            posting.append(key)
+
+    def remove(self, key: int) -> None:
+        if key < len(self.texts) and self.texts[key] is not None:
+            self.texts[key] = None
+            self.count -= 1
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[float, int]]:
+        """Best ``(score, key)`` pairs for ``query``, highest score first.
+
+        Candidates come from counting shared trigrams over the rarer postings
+        only; the best of them are then rescored exactly.
+        """
+        query = query.lower().strip()
+        if not query:
+            return []
+        texts = self.texts
+        if len(query) < 3:
+            # Too short for trigrams to narrow anything down
+            matches = ((1.0 + 1 / len(text), key) for key, text in enumerate(texts) if text is not None and query in text)
+            return heapq.nlargest(limit, matches)
+
+        query_grams = trigrams(query)
+        postings = [self.postings[g] for g in query_grams if g in self.postings]
+        if not postings:
+            return []
+        cutoff = max(1000, int(self.count * COMMON_FRACTION))
+        rare = [p for p in postings if len(p) <= cutoff] or [min(postings, key=len)]
+
+        counts = Counter()
+        for posting in rare:
+            counts.update(posting)
+        needed = max(1, len(rare) // 2)
+        candidates = [key for key, n in counts.most_common(limit * CANDIDATE_FACTOR) if n >= needed]
+
+        scored = []
+        for key in candidates:
+            text = texts[key]
+            if text is not None:
+                scored.append((similarity(query, text, query_grams), key))
+        return heapq.nlargest(limit, scored)
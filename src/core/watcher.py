@@ -0,0 +1,329 @@
+import os
+import sys
+import time
+import ctypes
+import select
+import struct
+import logging
+import threading
+from typing import Callable, Collection, Dict, Iterator, List, Optional, Tuple
+
+from src.core.scan_index import ScanIndex
+
+CREATED = "created"
+DELETED = "deleted"
+MODIFIED = "modified"
+
+DEFAULT_DEBOUNCE = 0.5  # seconds of quiet before a batch is flushed
+MAX_BATCH_DELAY = 3.0   # flush at least this often during constant churn
+
+# A backend maps a root directory to a blocking iterator of (kind, path) events
+BACKENDS: Dict[str, Callable] = {}
+
+
+def register_backend(name: str):
+    """Register a change-notification backend under ``name``."""
+    def decorator(cls):
+        BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+@register_backend("windows")
+class ReadDirectoryChangesBackend:
+    """ReadDirectoryChangesW on the root, watching the whole subtree."""
+
+    def __init__(self, root: str, stop_event: threading.Event):
+        import win32file
+        import win32con
+        import win32event
+        import pywintypes
+        self.win32file = win32file
+        self.win32event = win32event
+        self.root = root
+        self.stop_event = stop_event
+        self.handle = win32file.CreateFile(
+            root,
+            0x0001,  # FILE_LIST_DIRECTORY
+            win32con.FILE_SHARE_READ | win32con.FILE_SHARE_WRITE | win32con.FILE_SHARE_DELETE,
+            None,
+            win32con.OPEN_EXISTING,
+            win32con.FILE_FLAG_BACKUP_SEMANTICS | win32con.FILE_FLAG_OVERLAPPED,
+            None
+        )
+        self.overlapped = pywintypes.OVERLAPPED()
+        self.overlapped.hEvent = win32event.CreateEvent(None, True, False, None)
+        self.buffer = win32file.AllocateReadBuffer(64 * 1024)
+        self.flags = (
+            win32con.FILE_NOTIFY_CHANGE_FILE_NAME
+            | win32con.FILE_NOTIFY_CHANGE_DIR_NAME
+            | win32con.FILE_NOTIFY_CHANGE_SIZE
+            | win32con.FILE_NOTIFY_CHANGE_LAST_WRITE
+        )
+        # FILE_ACTION_* codes: added, removed, modified, renamed old name, renamed new name
+        self.actions = {1: CREATED, 2: DELETED, 3: MODIFIED, 4: DELETED, 5: CREATED}
+
+    def __iter__(self):
+        win32file = self.win32file
+        try:
+            while not self.stop_event.is_set():
+                win32file.ReadDirectoryChangesW(self.handle, self.buffer, True, self.flags, self.overlapped)
+                while not self.stop_event.is_set():
+                    rc = self.win32event.WaitForSingleObject(self.overlapped.hEvent, 500)
+                    if rc == self.win32event.WAIT_OBJECT_0:
+                        break
+                else:
+                    win32file.CancelIo(self.handle)
+                    return
+                nbytes = win32file.GetOverlappedResult(self.handle, self.overlapped, True)
+                if not nbytes:
+                    # Buffer overflow: treat the root as new so it is walked again
+                    yield CREATED, self.root
+                    continue
+                for action, name in win32file.FILE_NOTIFY_INFORMATION(self.buffer, nbytes):
+                    yield self.actions.get(action, MODIFIED), os.path.join(self.root, name)
+        finally:
+            win32file.CloseHandle(self.handle)
+
+
+@register_backend("inotify")
+class InotifyBackend:
+    """Linux inotify via libc, with one watch per directory in the tree."""
+
+    IN_MODIFY = 0x002
+    IN_ATTRIB = 0x004
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    MASK = IN_CLOSE_WRITE | IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    HEADER = struct.Struct("iIII")
+
+    def __init__(self, root: str, stop_event: threading.Event):
+        self.libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        self.root = root
+        self.stop_event = stop_event
+        self.fd = self.libc.inotify_init1(self.IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, str] = {}
+        for directory, _, _ in os.walk(root):
+            self._add_watch(directory)
+
+    def _add_watch(self, directory: str) -> None:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd >= 0:
+            self.watches[wd] = directory
+
+    def __iter__(self):
+        try:
+            while not self.stop_event.is_set():
+                ready, _, _ = select.select([self.fd], [], [], 0.5)
+                if not ready:
+                    continue
+                try:
+                    data = os.read(self.fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                offset = 0
+                while offset < len(data):
+                    wd, mask, _, length = self.HEADER.unpack_from(data, offset)
+                    offset += self.HEADER.size
+                    name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                    offset += length
+                    if mask & self.IN_Q_OVERFLOW:
+                        yield CREATED, self.root
+                        continue
+                    if mask & self.IN_IGNORED:
+                        self.watches.pop(wd, None)
+                        continue
+                    directory = self.watches.get(wd)
+                    if directory is None:
+                        continue
+                    path = os.path.join(directory, name) if name else directory
+                    if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                        if mask & self.IN_ISDIR:
+                            for sub, _, _ in os.walk(path):
+                                self._add_watch(sub)
+                        yield CREATED, path
+                    elif mask & (self.IN_DELETE | self.IN_MOVED_FROM | self.IN_DELETE_SELF):
+                        yield DELETED, path
+                    else:
+                        yield MODIFIED, path
+        finally:
+            os.close(self.fd)
+
+
+def default_backend() -> Optional[str]:
+    if sys.platform == "win32":
+        return "windows"
+    if sys.platform.startswith("linux"):
+        return "inotify"
+    return None
+
+
+def _walk_files(directory: str, skip_dirs: Collection[str]) -> Iterator[str]:
+    """Paths of files under ``directory``, pruning ``skip_dirs`` like the scanner does."""
+    for current, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if d not in skip_dirs]
+        for name in files:
+            yield os.path.join(current, name)
+
+
+def _in_skipped_dir(root: str, path: str, skip_dirs: Collection[str]) -> bool:
+    """Whether a directory between ``root`` and ``path`` is one the scanner never enters."""
+    parts = os.path.relpath(path, root).split(os.sep)[:-1]
+    return any(part in skip_dirs for part in parts)
+
+
+def read_changes(
+    root: str,
+    changes: Dict[str, str],
+    build_record: Callable[[str, os.stat_result], Dict],
+    skip_dirs: Collection[str] = ()
+) -> Dict:
+    """Stat and walk what a coalesced ``path -> kind`` batch touched, without touching the index.
+
+    This is the slow, I/O-bound half of applying a batch and is safe to run
+    on the watcher thread; ``apply_changes`` then updates the index. Paths
+    inside ``skip_dirs`` are ignored, as the scanner ignores them. A created
+    directory (including the root, which backends report after an event
+    overflow) is walked again with ``skip_dirs`` pruned.
+    """
+    read = {"upserts": [], "gone": [], "walked": {}}
+    for path, kind in changes.items():
+        if _in_skipped_dir(root, path, skip_dirs):
+            continue
+        try:
+            stats = os.stat(path) if kind != DELETED else None
+        except OSError:
+            stats = None
+
+        if stats is None:
+            read["gone"].append(path)
+        elif os.path.isdir(path):
+            if kind != CREATED or (path != root and os.path.basename(path) in skip_dirs):
+                # Directory timestamps change with their contents; the files report themselves
+                continue
+            seen = set()
+            for full_path in _walk_files(path, skip_dirs):
+                try:
+                    read["upserts"].append(build_record(full_path, os.stat(full_path)))
+                except OSError:
+                    continue
+                seen.add(full_path)
+            read["walked"][path] = seen
+        else:
+            read["upserts"].append(build_record(path, stats))
+    return read
+
+
+def apply_changes(index: ScanIndex, read: Dict) -> Tuple[List[Dict], List[str]]:
+    """Apply what ``read_changes`` found to the index.
+
+    Returns the records added or replaced and the paths removed, so callers
+    can patch their own copies without rebuilding them. Rows under a walked
+    directory that the walk no longer found are removed.
+    """
+    upserted: List[Dict] = []
+    removed: List[str] = []
+    for path in read["gone"]:
+        if index.remove(path) is not None:
+            removed.append(path)
+        else:
+            # A directory went away: drop everything that lived under it
+            for stale in [r["path"] for r in index.records_under(path)]:
+                index.remove(stale)
+                removed.append(stale)
+    for directory, seen in read["walked"].items():
+        for stale in [r["path"] for r in index.records_under(directory) if r["path"] not in seen]:
+            index.remove(stale)
+            removed.append(stale)
+    for record in read["upserts"]:
+        index.add(record)
+        upserted.append(record)
+    return upserted, removed
+
+
+class ScanWatcher:
+    """Follow filesystem changes under a scanned root and batch them.
+
+    Raw events are coalesced per path (last kind wins) and handed to
+    ``on_batch`` once the tree has been quiet for ``debounce`` seconds.
+    ``on_batch`` is called from the watcher thread.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        on_batch: Callable[[Dict[str, str]], None],
+        backend: Optional[str] = None,
+        debounce: float = DEFAULT_DEBOUNCE
+    ):
+        self.root = root
+        self.on_batch = on_batch
+        self.backend = backend or default_backend()
+        self.debounce = debounce
+        self.logger = logging.getLogger(__name__)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._pending: Dict[str, str] = {}
+        self._first_event = 0.0
+        self._last_event = 0.0
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> bool:
+        """Start watching; returns False if no backend is available."""
+        if self.backend not in BACKENDS:
+            self.logger.warning(f"No change-notification backend for {sys.platform}")
+            return False
+        try:
+            source = BACKENDS[self.backend](self.root, self._stop)
+        except Exception as e:
+            self.logger.error(f"Could not watch {self.root}: {str(e)}")
+            return False
+        self._threads = [
+            threading.Thread(target=self._read_events, args=(source,), daemon=True),
+            threading.Thread(target=self._flush_loop, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _read_events(self, source) -> None:
+        try:
+            for kind, path in source:
+                now = time.monotonic()
+                with self._lock:
+                    if not self._pending:
+                        self._first_event = now
+                    # created+deleted within one batch still resolves correctly: apply re-stats the path
+                    self._pending[path] = kind
+                    self._last_event = now
+        except Exception as e:
+            self.logger.error(f"Watcher for {self.root} stopped: {str(e)}")
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.debounce / 2):
+            now = time.monotonic()
+            with self._lock:
+                if not self._pending:
+                    continue
+                quiet = now - self._last_event >= self.debounce
+                overdue = now - self._first_event >= MAX_BATCH_DELAY
+                if not (quiet or overdue):
+                    continue
+                batch, self._pending = self._pending, {}
+            try:
+                self.on_batch(batch)
+            except Exception as e:
+                self.logger.error(f"Error applying file changes: {str(e)}")
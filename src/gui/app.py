@@ -5,12 +5,33 @@ import queue
 from send2trash import send2trash
 import os
 import tkinter as tk
-from tkinter import filedialog
+from tkinter import filedialog, messagebox
 import time
 
-from src.core.file_scanner import FileScanner
+from src.core.file_scanner import FileScanner, SKIP_DIRS
 from src.core.ai_interface import AIInterface
+from src.core.ai_backend import format_usage
+from src.core.scan_index import ScanIndex
+from src.core.multi_scan import MultiRootScanner, split_roots
+from src.core.io_scheduler import IOScheduler
+from src.core.exporter import open_exporter
+from src.core.compressibility import estimate_compressibility, format_compressibility, DEFAULT_BUDGET
+from src.core.aging import aging_report, format_aging, DEFAULT_MIN_AGE_DAYS, DEFAULT_SUBTREE_DEPTH
+from src.core.junk_rules import JunkClassifier, format_junk
+from src.core.spill_store import SpillStore, SpillingCollector, remove_stale_spills, DEFAULT_MEMORY_BUDGET, FETCH_LIMIT
+from src.core.checkpoint import ScanCheckpoint, HashCheckpoint, resumable_roots, discard
+from src.core.service_client import ServiceClient, ServiceError, RemoteScan
+from src.core.watcher import ScanWatcher, read_changes, apply_changes
+from src.core.snapshots import SnapshotStore, snapshot_name, diff_snapshots, format_diff, record_rows, row_lines, lines_under
+from src.core.near_duplicates import find_near_duplicates, DEFAULT_MAX_DISTANCE
+from src.core.chunking import analyze_chunks, MIN_FILE_SIZE
+from src.core.reclaim import link_duplicates, undo_links, latest_journal
+from src.core.analysis import (
+    filter_files, under_folder, group_by_size, space_by_extension, find_duplicate_groups, reclaimable_bytes, unique_files
+)
 from src.utils.logger import setup_logger
+from src.utils.paths import app_data_dir
+from src.utils.profiler import profiler
 from src.gui.chatbox import ChatBox
 from src.utils.debug_overlay import DebugOverlay
 
@@ -33,6 +54,12 @@ class StorageAssistant:
         self.file_scanner = FileScanner()
         self.ai_interface = AIInterface()
         self.file_data = []
+        self.memory_budget = DEFAULT_MEMORY_BUDGET  # scans larger than this spill to disk
+        remove_stale_spills()
+        self.snapshot_store = SnapshotStore()
+        # A running scan service owns scanning and hashing; without one the app works standalone
+        self.service = ServiceClient.connect()
+        self.ai_interface.snapshot_names = [h["name"] for h in self.snapshot_store.list()]
         
         # UI Setup
         self.root = ctk.CTk()
@@ -47,6 +74,9 @@ class StorageAssistant:
         )
         self.scan_speed_label.pack(side="right", padx=(0, 10))
         self.auto_name_widgets()
+        self.report_resumable_scans()
+        if self.service:
+            threading.Thread(target=self.load_service_scan, daemon=True).start()
 
         
     def _setup_window(self):
@@ -93,7 +123,7 @@ class StorageAssistant:
         
         ctk.CTkLabel(dir_frame, text="WORKSPACE").pack(anchor="w")
         
-        self.dir_entry = ctk.CTkEntry(dir_frame, placeholder_text="Select directory...")
+        self.dir_entry = ctk.CTkEntry(dir_frame, placeholder_text="Select directory (C:\\; D:\\ for several)...")
         self.dir_entry.pack(fill="x", pady=(5, 0))
         
         btn_frame = ctk.CTkFrame(dir_frame, fg_color="transparent")
@@ -114,6 +144,15 @@ class StorageAssistant:
         )
         self.scan_btn.pack(side="left")
 
+        self.watch_var = ctk.BooleanVar(value=False)
+        self.watch_checkbox = ctk.CTkCheckBox(
+            dir_frame,
+            text="Watch for changes",
+            variable=self.watch_var,
+            command=self.toggle_watch
+        )
+        self.watch_checkbox.pack(anchor="w", pady=(8, 0))
+
         # Quick Actions
         actions_frame = ctk.CTkFrame(self.sidebar, fg_color="transparent")
         actions_frame.pack(pady=15, padx=15, fill="x")
@@ -123,6 +162,7 @@ class StorageAssistant:
         actions = [
             ("🔍 Find Large Files", "Find files >100MB"),
             ("🔄 Find Duplicates", "Find duplicate files"),
+            ("🖼️ Similar Images", "Find similar images"),
             ("📊 Analyze Space", "Analyze space usage")
         ]
         
@@ -300,6 +340,92 @@ class StorageAssistant:
         self.analytics_mode = not getattr(self, 'analytics_mode', False)
         self.update_log(f"Analytics mode: {'enabled' if self.analytics_mode else 'disabled'}")
         
+    def report_scan_metrics(self):
+        """Log a phase breakdown of the last scan and dump the full metrics as JSON."""
+        metrics = self.file_scanner.get_metrics()
+        self.update_log(
+            f"Scan metrics: {metrics['dirs_visited']} dirs, {metrics['files_visited']} files, "
+            f"{metrics['bytes_stat'] / (1024*1024):.2f} MB stat'ed, {metrics['files_per_second']:.1f} files/sec"
+        )
+        for phase, stats in metrics["phases"].items():
+            if stats["calls"]:
+                self.update_log(f"- {phase}: {stats['seconds']:.3f}s over {stats['calls']} calls")
+        if metrics["errors"]:
+            self.update_log("- errors: " + ", ".join(f"{k}={v}" for k, v in metrics["errors"].items()))
+        path = os.path.join(app_data_dir("metrics"), time.strftime("scan_%Y%m%d_%H%M%S.json"))
+        self.file_scanner.dump_metrics(path)
+        self.update_log(f"Metrics written to {path}")
+
+    def report_root_aggregates(self):
+        """Log per-root totals of a multi-root scan."""
+        for root, aggregate in self.multi_scanner.aggregates.items():
+            state = " (cancelled)" if aggregate["cancelled"] else ""
+            self.update_log(
+                f"- {root}: {aggregate['files']} files, {aggregate['bytes'] / (1024*1024):.2f} MB "
+                f"in {aggregate['seconds']:.1f}s, {aggregate['errors']} errors{state}"
+            )
+
+    def report_resumable_scans(self):
+        """Mention scans that were cancelled or interrupted and can pick up where they stopped."""
+        for state in resumable_roots():
+            self.update_log(
+                f"Interrupted scan of {state['root']} can be resumed "
+                f"({state['total_files']} files counted); scan it again to continue"
+            )
+
+    def _confirm_resume(self, roots):
+        """Ask before a saved checkpoint seeds this scan; declining starts the root fresh."""
+        for root in roots:
+            state = ScanCheckpoint(root).load()
+            if not state:
+                continue
+            saved = time.strftime("%Y-%m-%d %H:%M", time.localtime(state["updated"]))
+            if messagebox.askyesno(
+                "Resume scan",
+                f"A scan of {root} was interrupted on {saved} ({state['total_files']} files counted).\n\n"
+                f"Resume it? Choose No to discard it and scan from scratch."
+            ):
+                self.update_log(f"Resuming interrupted scan of {root} from {saved}")
+            else:
+                discard(root)
+                self.update_log(f"Discarded interrupted scan of {root}; scanning from scratch")
+
+    def load_service_scan(self):
+        """Pick up the scan the service already holds instead of rescanning."""
+        try:
+            status = self.service.status()
+            if not status["files"]:
+                self.update_log("Connected to the scan service")
+                return
+            self.scan_roots = status["scanned_roots"]
+            self.scan_root = os.pathsep.join(self.scan_roots)
+            self.ai_interface.scope_history(self.scan_root)
+            # Queries run in the service; only a summary of the largest files is kept here
+            self.file_data = RemoteScan(self.service, status["files"])
+            self.ai_interface.add_scan_context(self.file_data, self.file_data.summary_index())
+            self.update_log(
+                f"Using the scan service's {len(self.file_data)} files for {', '.join(self.scan_roots)}"
+            )
+            self.root.after(0, self.activate_chat_mode)
+        except (OSError, EOFError, ServiceError) as e:
+            self.update_log(f"Scan service unavailable: {str(e)}")
+            self.service = None
+
+    def _scan_via_service(self, roots: List[str]) -> RemoteScan:
+        """Have the service scan, mirroring its progress; the records stay in the service."""
+        self.service.scan(roots, wait=False)
+        while True:
+            status = self.service.status()
+            if status["state"] != "scanning":
+                break
+            self.update_progress(status["progress"], "Scanning")
+            time.sleep(0.5)
+        if status["state"] == "failed":
+            raise ServiceError(status.get("error", "scan failed"))
+        if status["state"] == "cancelled":
+            raise ServiceError("Scan cancelled; the service keeps its previous scan")
+        return RemoteScan(self.service, status["files"])
+
     def update_log(self, message: str):
         """Update the log display with a new message."""
         self.results_text.insert("end", f"{message}\n")
@@ -308,15 +434,29 @@ class StorageAssistant:
         
     def start_scan(self):
         """Start scanning the selected directory with real-time feedback."""
-        directory = self.dir_entry.get()
-        if not directory or not os.path.exists(directory):
-            self.update_log("Please select a valid directory")
+        roots = split_roots(self.dir_entry.get())
+        missing = [root for root in roots if not os.path.exists(root)]
+        if not roots or missing:
+            self.update_log(f"Please select a valid directory{': ' + ', '.join(missing) if missing else ''}")
             return
+        directory = roots[0]
+        self._confirm_resume(roots)
 
+        self.stop_watch()
         self.scan_btn.configure(state="disabled")
         self.dir_entry.configure(state="disabled")
         self.progress_bar.set(0)
+        if isinstance(self.file_data, SpillStore):
+            self.file_data.close()
         self.file_data = []
+        self.scan_snapshot = None  # the snapshot saved by this scan, once it completes
+        self.scan_roots = roots
+        self.scan_root = os.pathsep.join(roots)
+        self.ai_interface.scope_history(self.scan_root)
+        self.multi_scanner = (
+            MultiRootScanner(roots, io_scheduler=self.file_scanner.io_scheduler)
+            if len(roots) > 1 and not self.service else None
+        )
         self.status_label.configure(text="Scanning...")
         self.scan_speed_label.configure(text="")
         self.last_update_time = time.time()
@@ -327,14 +467,75 @@ class StorageAssistant:
             last_update = 0
             processed_files = 0
 
+            # Index and classify records (search trigrams, junk rules) while the scan waits on I/O
+            index = ScanIndex()
+            junk = JunkClassifier()
+            index_lock = threading.Lock()
+            sink = SpillingCollector(self.memory_budget)
+
+            def index_record(record):
+                nonlocal index
+                with index_lock:
+                    if index is not None:
+                        if sink.spilled or (self.multi_scanner and self.multi_scanner.spilled):
+                            index = None  # an index over every record would not fit the budget either
+                        else:
+                            index.add(record)
+                    junk.add(record)
+
             try:
-                self.file_data = self.file_scanner.fast_scan_directory(
-                    directory,
-                    progress_callback=lambda p: self.update_progress(p, "Scanning"),
-                    log_callback=lambda msg: self.update_log(msg)
-                )
-                self.ai_interface.add_scan_context(self.file_data)
-                self.update_log(f"Scan complete. Found {len(self.file_data)} files.")
+                with profiler.profile("scan"):
+                    if self.service:
+                        self.file_data = self._scan_via_service(roots)
+                    elif self.multi_scanner:
+                        self.file_data = self.multi_scanner.scan(
+                            progress_callback=lambda p: self.update_progress(p, "Scanning"),
+                            log_callback=lambda msg: self.update_log(msg),
+                            record_callback=index_record,
+                            memory_budget=self.memory_budget
+                        )
+                    else:
+                        self.file_data = self.file_scanner.fast_scan_directory(
+                            directory,
+                            progress_callback=lambda p: self.update_progress(p, "Scanning"),
+                            log_callback=lambda msg: self.update_log(msg),
+                            checkpoint=ScanCheckpoint(directory),
+                            record_callback=index_record,
+                            results=sink
+                        ).result()
+                    with self.file_scanner.metrics.phase("aggregate"):
+                        if isinstance(self.file_data, (SpillStore, RemoteScan)):
+                            # Chat context covers the largest files; totals cover everything
+                            self.ai_interface.add_scan_context(self.file_data, self.file_data.summary_index())
+                            if isinstance(self.file_data, SpillStore):
+                                self.update_log(
+                                    f"Scan exceeded the {self.memory_budget // (1024*1024)} MB memory budget; "
+                                    f"records are kept on disk and name search covers the largest files"
+                                )
+                        else:
+                            complete = index is not None and index.file_count == len(self.file_data)
+                            self.ai_interface.add_scan_context(self.file_data, index if complete else None)
+                        self.junk = junk if junk.files == len(self.file_data) else None
+                if self.service:
+                    scanners = []  # a cancelled or failed service scan raises ServiceError
+                elif self.multi_scanner:
+                    scanners = list(self.multi_scanner.scanners.values())
+                else:
+                    scanners = [self.file_scanner]
+                incomplete = any(s.scan_cancelled or s.scan_failed for s in scanners)
+                if incomplete:
+                    self.update_log(f"Scan stopped early with {len(self.file_data)} files; no snapshot saved.")
+                else:
+                    self.update_log(f"Scan complete. Found {len(self.file_data)} files.")
+                if self.multi_scanner:
+                    self.report_root_aggregates()
+                elif getattr(self, 'analytics_mode', False):
+                    self.report_scan_metrics()
+                if not incomplete:
+                    # A partial tree would become the baseline the next diff compares against
+                    self.scan_snapshot = self.save_snapshot(self.file_data, auto=True)
+                if self.watch_var.get():
+                    self.root.after(0, self.start_watch)
                 self.root.after(0, self.activate_chat_mode)
             except Exception as e:
                 self.update_log(f"Error during scan: {str(e)}")
@@ -346,9 +547,82 @@ class StorageAssistant:
         self.scan_thread = threading.Thread(target=scan_thread, daemon=True)
         self.scan_thread.start()
         
+    def toggle_watch(self):
+        """Start or stop live watching of the scanned directory."""
+        if self.watch_var.get():
+            if self.file_data:
+                self.start_watch()
+        else:
+            self.stop_watch()
+
+    def start_watch(self):
+        """Keep scan data current from filesystem change notifications."""
+        self.stop_watch()
+        if isinstance(self.file_data, (SpillStore, RemoteScan)):
+            self.update_log("Live watch is not available for scans kept on disk or by the scan service")
+            self.watch_var.set(False)
+            return
+        self.watchers = []
+        self.watch_positions = None  # path -> position in file_data, built by the first batch
+        for root in getattr(self, 'scan_roots', []):
+            watcher = ScanWatcher(root, on_batch=lambda batch, root=root: self._read_watch_batch(root, batch))
+            if watcher.start():
+                self.watchers.append(watcher)
+                self.update_log(f"Watching {root} for changes")
+        if getattr(self, 'scan_roots', None) and not self.watchers:
+            self.update_log("Live watch is not supported on this system")
+            self.watch_var.set(False)
+
+    def stop_watch(self):
+        if getattr(self, 'watchers', None):
+            for watcher in self.watchers:
+                watcher.stop()
+            self.watchers = []
+            self.update_log("Stopped watching for changes")
+
+    def _read_watch_batch(self, root: str, batch: Dict[str, str]):
+        """Stat what a change batch touched (watcher thread), then apply it on the Tk thread."""
+        read = read_changes(root, batch, self.file_scanner.build_record, SKIP_DIRS)
+        if read["upserts"] or read["gone"] or read["walked"]:
+            self.root.after(0, lambda: self._apply_watch_batch(read))
+
+    def _apply_watch_batch(self, read: Dict):
+        """Apply a read change batch to the index and patch file_data in place (Tk thread)."""
+        if not getattr(self, 'watchers', None):
+            return
+        file_data = self.file_data
+        upserted, removed = apply_changes(self.ai_interface.scan_index, read)
+        if not (upserted or removed):
+            return
+        if self.watch_positions is None:
+            self.watch_positions = {record["path"]: i for i, record in enumerate(file_data)}
+        positions = self.watch_positions
+        for path in removed:
+            i = positions.pop(path, None)
+            if i is None:
+                continue
+            # Order carries no meaning, so fill the hole with the last record
+            last = file_data.pop()
+            if i < len(file_data):
+                file_data[i] = last
+                positions[last["path"]] = i
+        for record in upserted:
+            i = positions.get(record["path"])
+            if i is None:
+                positions[record["path"]] = len(file_data)
+                file_data.append(record)
+            else:
+                file_data[i] = record
+        self.junk = None  # recounted on the next junk report
+        self.status_label.configure(text=f"Updated: {len(upserted)} changed, {len(removed)} removed")
+
     def cancel_scan(self):
         """Cancel the ongoing scan."""
         self.file_scanner.scan_cancelled = True
+        if getattr(self, 'multi_scanner', None):
+            self.multi_scanner.cancel()
+        if self.service:
+            self.service.cancel()
         self.update_log("Scan cancelled")
         
     def update_progress(self, value: float, operation: str = ""):
@@ -357,14 +631,16 @@ class StorageAssistant:
         if operation:
             self.status_label.configure(text=f"{operation}: {value:.1f}%")
         
-        # Calculate and display scan speed
+        # Calculate and display scan speed from the scanner's live counters
         current_time = time.time()
         if current_time - self.last_update_time >= 1.0:  # Update every second
-            files_processed = len(self.file_data) - self.last_file_count
+            counters = getattr(self, 'multi_scanner', None) or self.file_scanner.metrics
+            files_visited = counters.files_visited
+            files_processed = files_visited - self.last_file_count
             files_per_sec = files_processed / (current_time - self.last_update_time)
             self.scan_speed_label.configure(text=f"{files_per_sec:.1f} files/sec")
             self.last_update_time = current_time
-            self.last_file_count = len(self.file_data)
+            self.last_file_count = files_visited
         
         self.root.update_idletasks()
         
@@ -381,7 +657,8 @@ class StorageAssistant:
             
         self.execute_button.configure(state="disabled")
         try:
-            command = self.ai_interface.parse_query(query, self.file_data)
+            with profiler.profile("ai"):
+                command = self.ai_interface.parse_query(query, self.file_data)
             self.execute_command(command, self.file_data)
         except Exception as e:
             self.update_log(f"Error executing query: {str(e)}")
@@ -391,8 +668,12 @@ class StorageAssistant:
     def execute_command(self, command: Dict, file_data: List[Dict], for_chat=False):
         """Modified to return results for chat"""
         action = command.get("action")
-        params = command.get("parameters", {})
-        
+        params = dict(command.get("parameters", {}))
+        folder = params.pop("folder", None)
+        if folder:
+            file_data = self._scope_to_folder(file_data, folder)
+            self.update_log(f"Limited to {len(file_data)} files under {folder}")
+
         if action == "list":
             results = self._filter_files(file_data, params)
             if for_chat:
@@ -401,32 +682,234 @@ class StorageAssistant:
                 self.list_files(results, params)
         elif action == "delete":
             self.delete_files(file_data, params)
+        elif action == "search":
+            results = self.search_files(params.get("query", ""), int(params.get("limit", 20)), for_chat)
+            if for_chat:
+                return results
         elif action == "find_duplicates":
             threading.Thread(target=self.find_duplicates, args=(file_data,), daemon=True).start()
+        elif action == "link_duplicates":
+            if self._confirm_link_duplicates():
+                threading.Thread(target=self.link_duplicates, daemon=True).start()
+        elif action == "undo_link_duplicates":
+            threading.Thread(target=self.undo_link_duplicates, args=(params.get("journal"),), daemon=True).start()
+        elif action == "find_similar_images":
+            threading.Thread(
+                target=self.find_similar_images,
+                args=(file_data, int(params.get("max_distance", DEFAULT_MAX_DISTANCE))),
+                daemon=True
+            ).start()
+        elif action == "analyze_chunks":
+            threading.Thread(
+                target=self.analyze_chunks,
+                args=(file_data, int(params.get("min_size", MIN_FILE_SIZE))),
+                daemon=True
+            ).start()
         elif action == "analyze_space":
             self.analyze_space(file_data)
+        elif action == "estimate_compression":
+            threading.Thread(
+                target=self.estimate_compression,
+                args=(
+                    file_data,
+                    params.get("method", "zlib"),
+                    int(float(params.get("budget_mb", DEFAULT_BUDGET // (1024 * 1024))) * 1024 * 1024)
+                ),
+                daemon=True
+            ).start()
+        elif action == "analyze_junk":
+            self.analyze_junk(file_data)
+        elif action == "analyze_aging":
+            threading.Thread(
+                target=self.analyze_aging,
+                args=(
+                    file_data,
+                    int(params.get("min_age_days", DEFAULT_MIN_AGE_DAYS)),
+                    int(params.get("depth", DEFAULT_SUBTREE_DEPTH))
+                ),
+                daemon=True
+            ).start()
+        elif action == "save_snapshot":
+            self.save_snapshot(file_data, params.get("name"))
+        elif action == "diff_snapshots":
+            # file_data is already scoped; the snapshots have to be scoped the same way
+            threading.Thread(
+                target=self.diff_snapshots,
+                args=(file_data, params.get("old"), params.get("new"), self._folder_paths(folder) if folder else None),
+                daemon=True
+            ).start()
+        elif action == "export":
+            threading.Thread(
+                target=self.export_scan,
+                args=(file_data, params.get("format", "csv"), params.get("name") or params.get("path")),
+                daemon=True
+            ).start()
+        elif action == "set_io_limits":
+            self.set_io_limits(params)
+        elif action == "show_ai_usage":
+            self.show_ai_usage()
         elif action == "error":
             self.update_log(f"Error: {params.get('message', 'Unknown error')}")
         else:
             self.update_log(f"Unknown action: {action}")
             
+    def export_scan(self, file_data: List[Dict], fmt: str = "csv", name: str = None):
+        """Stream the scan records to a new file in the exports folder for offline analysis.
+
+        ``name`` comes from the model, so it may only be a file name: exports
+        never leave the exports folder and never replace an existing file.
+        """
+        extension = {"arrow": ".arrow", "parquet": ".parquet", "ndjson": ".ndjson"}.get(fmt, ".csv")
+        if not name:
+            name = snapshot_name(getattr(self, 'scan_root', "")) + extension
+        elif os.path.basename(name) != name or name in (".", ".."):
+            self.update_log(f"Export refused: '{name}' is not a plain file name; exports are saved in the exports folder")
+            return
+        elif not os.path.splitext(name)[1]:
+            name += extension
+        path = os.path.join(app_data_dir("exports"), name)
+        if os.path.exists(path) or os.path.exists(path + ".aggregates.json"):
+            self.update_log(f"Export refused: {path} already exists")
+            return
+        self.status_label.configure(text="Exporting...")
+        try:
+            with open_exporter(path, fmt) as exporter:
+                exporter.write_all(file_data)
+            self.update_log(f"Exported {exporter.files} files to {path} (aggregates in {path}.aggregates.json)")
+        except (ImportError, ValueError, OSError) as e:
+            self.update_log(f"Export failed: {str(e)}")
+        self.status_label.configure(text="Ready")
+
+    def set_io_limits(self, params: Dict):
+        """Throttle scanning and hashing; all-zero limits without background mode remove throttling."""
+        bytes_per_sec = float(params.get("bytes_per_sec") or 0)
+        ops_per_sec = float(params.get("ops_per_sec") or 0)
+        background = str(params.get("background", False)).lower() == "true"
+        if params.get("memory_mb"):
+            self.memory_budget = int(float(params["memory_mb"]) * 1024 * 1024)
+            self.update_log(f"Scans larger than {self.memory_budget // (1024*1024)} MB of records will spill to disk")
+            if not any(key in params for key in ("bytes_per_sec", "ops_per_sec", "background")):
+                return
+        if not (bytes_per_sec or ops_per_sec or background):
+            self.file_scanner.io_scheduler = None
+            self.update_log("I/O throttling disabled")
+            return
+        self.file_scanner.io_scheduler = IOScheduler(
+            bytes_per_sec=bytes_per_sec or None,
+            ops_per_sec=ops_per_sec or None,
+            background=background
+        )
+        limits = []
+        if bytes_per_sec:
+            limits.append(f"{bytes_per_sec / (1024*1024):.1f} MB/s")
+        if ops_per_sec:
+            limits.append(f"{ops_per_sec:.0f} ops/s")
+        if background:
+            limits.append("background priority")
+        self.update_log(f"I/O throttling: {', '.join(limits)}, with adaptive backoff")
+
+    def show_ai_usage(self):
+        """Report latency, token counts and cache hits of the AI calls made so far."""
+        backend = self.ai_interface.backend
+        self.update_log("\n" + format_usage(backend.metrics.summary(), backend.describe()))
+
+    def save_snapshot(self, file_data: List[Dict], name: str = None, auto: bool = False) -> str:
+        """Store the scan as a snapshot; only the newest few automatic ones per root are kept."""
+        root = getattr(self, 'scan_root', "")
+        name = name or snapshot_name(root)
+        if isinstance(file_data, RemoteScan):
+            # The service writes it to the same snapshot folder without sending the records here
+            self.service.save_snapshot(name, root, auto)
+        else:
+            self.snapshot_store.save(name, file_data, root, auto)
+        self.snapshot_store.prune(root)
+        self.ai_interface.snapshot_names = [h["name"] for h in self.snapshot_store.list()]
+        self.update_log(f"Saved snapshot '{name}'")
+        return name
+
+    def diff_snapshots(self, file_data: List[Dict], old: str = None, new: str = None, folders: List[str] = None):
+        """Report what changed between two snapshots (or a snapshot and the current scan).
+
+        With ``folders``, both sides are limited to those subtrees.
+        """
+        headers = self.snapshot_store.list()
+        names = [h["name"] for h in headers]
+        if old is None:
+            root = getattr(self, 'scan_root', "")
+            # Against the current scan, its own snapshot would show no changes
+            current = getattr(self, 'scan_snapshot', None) if new is None else new
+            same_root = [h["name"] for h in headers if h.get("root") == root and h["name"] != current]
+            old = same_root[0] if same_root else None
+        if old not in names or (new is not None and new not in names):
+            self.update_log(f"Snapshot not found. Available: {', '.join(names) or 'none'}")
+            return
+
+        self.status_label.configure(text="Comparing snapshots...")
+        old_lines = self.snapshot_store.lines(old)
+        new_lines = self.snapshot_store.lines(new) if new else row_lines(record_rows(file_data))
+        if folders:
+            old_lines = lines_under(old_lines, folders)
+            if new:
+                new_lines = lines_under(new_lines, folders)
+        diff = diff_snapshots(old_lines, new_lines)
+        summary = format_diff(diff)
+        self.ai_interface.diff_summary = summary
+        scope = f" under {', '.join(folders)}" if folders else ""
+        self.update_log(f"\nChanges from '{old}' to '{new or 'current scan'}'{scope}:")
+        self.update_log(summary)
+        self.status_label.configure(text="Ready")
+
+    def _folder_paths(self, folder: str) -> List[str]:
+        """``folder`` as absolute paths; a relative folder is looked up under each scanned root."""
+        if os.path.isabs(folder):
+            return [folder]
+        return [os.path.join(root, folder) for root in getattr(self, 'scan_roots', [])] or [folder]
+
+    def _scope_to_folder(self, file_data: List[Dict], folder: str) -> List[Dict]:
+        """Files below ``folder``; a relative folder is looked up under each scanned root."""
+        folders = self._folder_paths(folder)
+        if isinstance(file_data, (SpillStore, RemoteScan)):
+            return [record for f in folders for record in file_data.filter({"folder": f})]
+        index = self.ai_interface.scan_index
+        if file_data is self.ai_interface.current_scan_data:
+            # The index covers this data: each subtree is one contiguous range in path order
+            return [record for f in folders for record in index.records_under(f)]
+        return [record for f in folders for record in under_folder(file_data, f)]
+
     def _filter_files(self, file_data: List[Dict], params: Dict) -> List[Dict]:
         """Filter files based on parameters"""
-        filtered = file_data
-        if "extension" in params:
-            filtered = [f for f in filtered if f["extension"] == params["extension"]]
-        if "min_size" in params:
-            filtered = [f for f in filtered if f["size"] >= params["min_size"]]
+        if isinstance(file_data, (SpillStore, RemoteScan)):
+            total, filtered = self._select_spilled(file_data, params)
+            if total > len(filtered):
+                self.update_log(f"{total} files match; showing the largest {len(filtered)}")
+            return filtered
+        filtered = filter_files(file_data, params)
+        if params.get("category"):
+            filtered = self._junk_classifier(file_data).select(filtered, params["category"])
         return filtered
 
+    def _select_spilled(self, store, params: Dict):
+        """``(matches, largest matches)`` from a spilled or service-held scan, loading at most FETCH_LIMIT records."""
+        category = params.get("category")
+        predicate = None
+        if category:
+            classifier = self._junk_classifier(store)
+            predicate = lambda f: classifier.category(f["path"]) == category
+        return store.select(params, FETCH_LIMIT, predicate)
+
+    def _junk_classifier(self, file_data: List[Dict]) -> JunkClassifier:
+        """The classifier filled during the scan, or a fresh pass when the data has changed since."""
+        junk = getattr(self, 'junk', None)
+        if junk is None or junk.files != len(file_data):
+            junk = JunkClassifier().add_all(file_data)
+            if file_data is self.file_data:
+                self.junk = junk
+        return junk
+
     def list_files(self, file_data: List[Dict], params: Dict):
         """List files matching the given parameters."""
         # Filter files based on parameters
-        filtered_files = file_data
-        if "extension" in params:
-            filtered_files = [f for f in filtered_files if f["extension"] == params["extension"]]
-        if "min_size" in params:
-            filtered_files = [f for f in filtered_files if f["size"] >= params["min_size"]]
+        filtered_files = self._filter_files(file_data, params)
             
         # Display results
         self.update_log(f"Found {len(filtered_files)} matching files:")
@@ -435,14 +918,31 @@ class StorageAssistant:
         if len(filtered_files) > 10:
             self.update_log(f"... and {len(filtered_files) - 10} more files")
             
+    def search_files(self, query: str, limit: int = 20, for_chat: bool = False) -> List[Dict]:
+        """Ranked fuzzy file name search over the trigram index."""
+        start = time.perf_counter()
+        if isinstance(self.file_data, RemoteScan):
+            matches = self.service.search(query, limit)  # the service's index covers every file
+        else:
+            matches = self.ai_interface.scan_index.search(query, limit)
+        if not for_chat:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.update_log(f"Found {len(matches)} matches for '{query}' in {elapsed_ms:.1f} ms:")
+            for score, file in matches:
+                self.update_log(f"- {file['path']} ({file['size'] / (1024*1024):.2f} MB, score {score:.2f})")
+        return [file for _, file in matches]
+
     def delete_files(self, file_data: List[Dict], params: Dict):
         """Delete files matching the given parameters."""
         # Filter files based on parameters
-        files_to_delete = file_data
-        if "extension" in params:
-            files_to_delete = [f for f in files_to_delete if f["extension"] == params["extension"]]
-        if "min_size" in params:
-            files_to_delete = [f for f in files_to_delete if f["size"] >= params["min_size"]]
+        if isinstance(file_data, (SpillStore, RemoteScan)):
+            total, files_to_delete = self._select_spilled(file_data, params)
+            if total > len(files_to_delete):
+                self.update_log(f"{total} files match, more than can be deleted at once; narrow it down "
+                                "by extension, size or folder")
+                return
+        else:
+            files_to_delete = self._filter_files(file_data, params)
             
         # Confirm deletion
         if not files_to_delete:
@@ -466,55 +966,180 @@ class StorageAssistant:
     def find_duplicates(self, file_data: List[Dict]):
         """Find duplicates with progress reporting."""
         self.status_label.configure(text="Finding duplicates...")
-        size_groups = self._group_by_size(file_data)
-        total_files = sum(len(files) for files in size_groups.values())
-        processed_files = 0
 
-        for size, files in size_groups.items():
-            for file in files:
-                self.file_scanner.calculate_file_hash(file["path"])
-                processed_files += 1
-                progress = (processed_files / total_files) * 100
-                self.update_progress(progress, "Hashing")
-                self.scan_speed_label.configure(text=f"{processed_files}/{total_files} files")
+        def on_progress(processed_files, total_files):
+            self.update_progress(processed_files / total_files * 100, "Hashing")
+            self.scan_speed_label.configure(text=f"{processed_files}/{total_files} files")
 
-        # ... rest of the duplicate logic ...
+        if self.service:
+            try:
+                duplicate_groups = self.service.duplicates()
+            except ServiceError as e:
+                self.update_log(str(e))
+                self.status_label.configure(text="Ready")
+                return
+            self._report_duplicates(duplicate_groups)
+            return
+
+        hash_checkpoint = HashCheckpoint(getattr(self, 'scan_root', ""))
+        if len(hash_checkpoint):
+            self.update_log(f"Resuming hash job: {len(hash_checkpoint)} hashes from an earlier run")
+        self.file_scanner.scan_cancelled = False
+        hash_func = self.file_scanner.calculate_file_hash
+        if getattr(self, 'multi_scanner', None):
+            hash_func = self.multi_scanner.budgeted(hash_func)
+        with profiler.profile("hash"):
+            if isinstance(file_data, SpillStore):
+                # Size buckets stream from the on-disk size index, one at a time
+                duplicate_groups = file_data.duplicate_groups(hash_func, on_progress, hash_checkpoint)
+            else:
+                scheduler = self.file_scanner.io_scheduler
+                order_key = scheduler.locality_key(file_data) if scheduler else None
+                duplicate_groups = find_duplicate_groups(
+                    file_data, hash_func, on_progress, order_key, hash_checkpoint
+                )
+        if self.file_scanner.scan_cancelled:
+            hash_checkpoint.close()
+            self.update_log("Duplicate search cancelled; it will resume from here next time")
+            self.status_label.configure(text="Ready")
+            return
+        hash_checkpoint.clear()
+        self._report_duplicates(duplicate_groups)
+
+    def _report_duplicates(self, duplicate_groups: List[List[Dict]]):
+        self.duplicate_groups = duplicate_groups
+        wasted = sum(reclaimable_bytes(group) for group in duplicate_groups)
+        self.update_log(f"\nFound {len(duplicate_groups)} duplicate sets ({wasted / (1024*1024):.2f} MB reclaimable):")
+        for group in sorted(duplicate_groups, key=lambda g: -reclaimable_bytes(g))[:10]:
+            self.update_log(f"- {len(group)} copies of {group[0]['size'] / (1024*1024):.2f} MB:")
+            for file in group:
+                links = file.get("links", 1)
+                self.update_log(f"    {file['path']}" + (f" ({links} hard links)" if links > 1 else ""))
+        if len(duplicate_groups) > 10:
+            self.update_log(f"... and {len(duplicate_groups) - 10} more sets")
+        self.status_label.configure(text="Ready")
+
+    def _confirm_link_duplicates(self) -> bool:
+        """Show the sets linking would rewrite and ask before touching any file."""
+        groups = getattr(self, 'duplicate_groups', None)
+        if not groups:
+            self.update_log("Run 'Find duplicates' first; linking uses its confirmed sets")
+            return False
+        copies = sum(len(group) - 1 for group in groups)
+        reclaimable = sum(reclaimable_bytes(group) for group in groups)
+        self.update_log(f"\nLinking would replace {copies} copies in {len(groups)} sets with hard links "
+                        f"to the first file of each ({reclaimable / (1024*1024):.2f} MB):")
+        for group in sorted(groups, key=lambda g: -reclaimable_bytes(g))[:10]:
+            self.update_log(f"- keep {group[0]['path']}")
+            for file in group[1:]:
+                self.update_log(f"    link {file['path']}")
+        if len(groups) > 10:
+            self.update_log(f"... and {len(groups) - 10} more sets")
+        confirmed = messagebox.askyesno(
+            "Link duplicates",
+            f"Replace {copies} duplicate copies with hard links, reclaiming about "
+            f"{reclaimable / (1024*1024):.2f} MB?\n\nLinked files share their contents afterwards; "
+            "the run can be undone from its journal.",
+            parent=self.root
+        )
+        if not confirmed:
+            self.update_log("Linking cancelled")
+        return confirmed
+
+    def link_duplicates(self):
+        """Replace the copies in the last duplicate search with hard links."""
+        groups = getattr(self, 'duplicate_groups', None)
+        if not groups:
+            self.update_log("Run 'Find duplicates' first; linking uses its confirmed sets")
+            return
+        self.status_label.configure(text="Linking duplicates...")
+        summary = link_duplicates(
+            groups,
+            progress_callback=lambda done, total: self.update_progress(done / total * 100, "Linking")
+        )
+        self.update_log(
+            f"\nLinked {summary['linked']} copies, reclaiming {summary['bytes'] / (1024*1024):.2f} MB "
+            f"({summary['skipped']} skipped because they changed, differ or are on another volume)"
+        )
+        for error in summary["errors"][:10]:
+            self.update_log(f"- Error: {error}")
+        self.update_log(f"Undo journal: {summary['journal']}")
+        self.duplicate_groups = None
+        self.status_label.configure(text="Ready")
+
+    def undo_link_duplicates(self, journal: str = None):
+        """Restore independent copies from a link journal."""
+        journal = journal or latest_journal()
+        if not journal or not os.path.exists(journal):
+            self.update_log("No link journal to undo")
+            return
+        summary = undo_links(journal)
+        self.update_log(f"Restored {summary['restored']} copies ({summary['skipped']} skipped)")
+        for error in summary["errors"][:10]:
+            self.update_log(f"- Error: {error}")
+
+    def find_similar_images(self, file_data: List[Dict], max_distance: int = DEFAULT_MAX_DISTANCE):
+        """Find re-encoded or resized copies of images by perceptual hash."""
+        self.status_label.configure(text="Finding similar images...")
+
+        def on_progress(processed_files, total_files):
+            self.update_progress(processed_files / total_files * 100, "Hashing images")
+            self.scan_speed_label.configure(text=f"{processed_files}/{total_files} images")
+
+        with profiler.profile("hash"):
+            groups = find_near_duplicates(unique_files(file_data), max_distance, on_progress)
+        self.similar_groups = groups
+
+        # Keeping the largest copy of each group, the rest is what could be reclaimed
+        reclaimable = sum(r["size"] for group in groups for r in group[1:])
+        self.update_log(f"\nFound {len(groups)} groups of similar images ({reclaimable / (1024*1024):.2f} MB in smaller copies):")
+        for group in groups[:10]:
+            self.update_log(f"- {len(group)} similar images:")
+            for file in group:
+                self.update_log(f"    {file['path']} ({file['size'] / (1024*1024):.2f} MB)")
+        if len(groups) > 10:
+            self.update_log(f"... and {len(groups) - 10} more groups")
+        self.status_label.configure(text="Ready")
+
+    def analyze_chunks(self, file_data: List[Dict], min_size: int = MIN_FILE_SIZE):
+        """Report how much chunk-level dedup would save across large files."""
+        self.status_label.configure(text="Chunking large files...")
+
+        def on_progress(processed_files, total_files):
+            self.update_progress(processed_files / total_files * 100, "Chunking")
+            self.scan_speed_label.configure(text=f"{processed_files}/{total_files} files")
+
+        with profiler.profile("hash"):
+            summary = analyze_chunks(unique_files(file_data), min_size, on_progress)
+
+        total = summary["total_bytes"]
+        self.update_log(f"\nChunk analysis of {summary['files']} files >= {min_size / (1024*1024):.0f} MB:")
+        self.update_log(f"- Chunks: {summary['chunks']} ({summary['unique_chunks']} unique)")
+        self.update_log(f"- Data: {total / (1024**3):.2f} GB, unique {summary['unique_bytes'] / (1024**3):.2f} GB")
+        self.update_log(
+            f"- Saveable by chunk dedup: {summary['saveable_bytes'] / (1024**3):.2f} GB "
+            f"({summary['saveable_bytes'] / total * 100 if total else 0:.1f}%)"
+        )
+        if summary["errors"]:
+            self.update_log(f"- {summary['errors']} files could not be read")
+        self.status_label.configure(text="Ready")
 
     def _group_by_size(self, file_data: List[Dict]) -> Dict[int, List[Dict]]:
         """Group files by size for duplicate detection."""
-        size_groups = {}
-        for file in file_data:
-            size = file["size"]
-            if size not in size_groups:
-                size_groups[size] = []
-            size_groups[size].append(file)
-        return size_groups
+        return group_by_size(file_data)
 
     def analyze_space(self, file_data: List[Dict]):
         """Analyze disk space usage."""
-        # Group files by extension
-        extension_groups = {}
-        for file in file_data:
-            ext = file["extension"] or "no_extension"
-            if ext not in extension_groups:
-                extension_groups[ext] = []
-            extension_groups[ext].append(file)
-            
-        # Calculate statistics
-        total_size = sum(f["size"] for f in file_data)
-        extension_stats = {
-            ext: {
-                "count": len(files),
-                "total_size": sum(f["size"] for f in files),
-                "percentage": sum(f["size"] for f in files) / total_size * 100
-            }
-            for ext, files in extension_groups.items()
-        }
+        if isinstance(file_data, (SpillStore, RemoteScan)):
+            total_size, extension_stats = file_data.space_by_extension()
+        else:
+            total_size, extension_stats = space_by_extension(file_data)
         
         # Display results
         self.update_log(f"\nSpace Analysis:")
         self.update_log(f"Total files: {len(file_data)}")
-        self.update_log(f"Total size: {total_size / (1024*1024):.2f} MB")
+        allocated = sum(stats["allocated_size"] for stats in extension_stats.values())
+        self.update_log(f"Total size: {total_size / (1024*1024):.2f} MB ({allocated / (1024*1024):.2f} MB on disk)")
         self.update_log("\nBreakdown by extension:")
         
         # Sort by size
@@ -528,9 +1153,44 @@ class StorageAssistant:
             self.update_log(
                 f"- {ext}: {stats['count']} files, "
                 f"{stats['total_size'] / (1024*1024):.2f} MB "
-                f"({stats['percentage']:.1f}%)"
+                f"({stats['allocated_size'] / (1024*1024):.2f} MB on disk, {stats['percentage']:.1f}%)"
             )
             
+    def estimate_compression(self, file_data: List[Dict], method: str = "zlib", budget: int = DEFAULT_BUDGET):
+        """Estimate how much compressing each extension and folder would save."""
+        if method not in ("zlib", "lzma"):
+            self.update_log(f"Unknown compression method: {method}")
+            return
+        self.status_label.configure(text="Sampling compressibility...")
+        roots = getattr(self, 'scan_roots', None) or [""]
+        report = estimate_compressibility(
+            unique_files(file_data), budget=budget, method=method, root=roots[0] if len(roots) == 1 else "",
+            progress_callback=lambda done, total: self.update_progress(done / total * 100, "Sampling")
+        )
+        self.update_log("\nEstimated compression savings:")
+        self.update_log(format_compressibility(report))
+        self.status_label.configure(text="Ready")
+
+    def analyze_junk(self, file_data: List[Dict]):
+        """Report caches, build outputs and other junk by category, as counted during the scan."""
+        report = self._junk_classifier(file_data).report()
+        self.update_log("\n" + format_junk(report))
+        reclaimable = sum(c["bytes"] for c in report["categories"].values())
+        if reclaimable:
+            self.update_log("Ask to delete a category (e.g. 'delete the temp files') to clean it up.")
+        return report
+
+    def analyze_aging(self, file_data: List[Dict], min_age_days: int = DEFAULT_MIN_AGE_DAYS,
+                      depth: int = DEFAULT_SUBTREE_DEPTH):
+        """Report how long data has gone unused and what is worth archiving."""
+        self.status_label.configure(text="Analyzing data age...")
+        roots = getattr(self, 'scan_roots', None) or [""]
+        report = aging_report(unique_files(file_data), root=roots[0] if len(roots) == 1 else "",
+                              min_age_days=min_age_days, depth=depth)
+        self.update_log("\nData aging:")
+        self.update_log(format_aging(report))
+        self.status_label.configure(text="Ready")
+
     def activate_chat_mode(self):
         """Switch to conversational mode with animation"""
         self.current_mode = "chat"
@@ -551,9 +1211,17 @@ class StorageAssistant:
         """Process messages based on current mode"""
         if self.current_mode == "command":
             self.handle_command(message)
+        elif message.lower().startswith(("search ", "find file ")):
+            # Name lookups are answered locally from the trigram index, no model round-trip
+            query = message.split(" ", 2)[-1] if message.lower().startswith("find file ") else message[7:]
+            files = self.search_files(query.strip(), for_chat=True)
+            self.chat_panel.add_message("AI", f"Best matches for '{query.strip()}':" if files else "No matching files")
+            if files:
+                self.chat_panel.add_file_response(files)
         else:
             try:
-                response = self.ai_interface.chat_query(message)
+                with profiler.profile("ai"):
+                    response = self.ai_interface.chat_query(message)
                 
                 # Special handling for file listings
                 if "Here are the files" in response:
@@ -568,8 +1236,13 @@ class StorageAssistant:
     
     def _extract_files_from_query(self, query: str) -> List[Dict]:
         """Convert natural language query to file results"""
-        command = self.ai_interface.parse_query(query, self.file_data)
-        return self.execute_command(command, self.file_data, for_chat=True)
+        with profiler.profile("ai"):
+            command = self.ai_interface.parse_query(query, self.file_data)
+        results = self.execute_command(command, self.file_data, for_chat=True)
+        self.ai_interface.history.log_query(
+            query, command.get("action", ""), command.get("parameters", {}), results or []
+        )
+        return results
 
     def _execute_quick_action(self, command: str):
         """Handle quick action commands from the sidebar."""
@@ -578,7 +1251,8 @@ class StorageAssistant:
             return
 
         try:
-            parsed_command = self.ai_interface.parse_query(command, self.file_data)
+            with profiler.profile("ai"):
+                parsed_command = self.ai_interface.parse_query(command, self.file_data)
             self.execute_command(parsed_command, self.file_data)
         except Exception as e:
             self.update_log(f"Error executing quick action: {str(e)}")
@@ -594,6 +1268,7 @@ class StorageAssistant:
     def run(self):
         """Start the application."""
         self.debug_overlay = DebugOverlay(self.root)
+        self.root.bind("<F9>", lambda e: self.toggle_analytics())
         self.root.mainloop() 
 
     
\ No newline at end of file
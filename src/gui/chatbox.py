@@ -1,9 +1,29 @@
 import customtkinter as ctk
-from typing import Callable, List, Dict
+from typing import Callable, List, Dict, Optional, Tuple
+import itertools
+from collections import deque
 import time
 import webbrowser
 import tkinter as tk
 
+MAX_MESSAGES = 500     # messages kept in the model
+RENDER_WINDOW = 100    # messages kept rendered in the textbox at once
+FILE_PAGE_SIZE = 25    # listing entries rendered per page
+
+
+class ChatMessage:
+    """One chat entry. File listings keep their records and render a page at a time."""
+
+    __slots__ = ("id", "sender", "text", "files", "offset")
+
+    def __init__(self, id: int, sender: str, text: str, files: Optional[List[Dict]] = None):
+        self.id = id
+        self.sender = sender
+        self.text = text
+        self.files = files
+        self.offset = 0  # first listing entry on the current page
+
+
 class ChatBox(ctk.CTkFrame):
     def __init__(self, master, send_callback: Callable, **kwargs):
         super().__init__(master, width=0, **kwargs)
@@ -26,6 +46,16 @@ class ChatBox(ctk.CTkFrame):
             text_color=("#2B2B2B", "#FFFFFF")
         )
         self.title_label.pack(side="left")
+
+        self.earlier_button = ctk.CTkButton(
+            header,
+            text="Show earlier",
+            width=90,
+            height=24,
+            fg_color="transparent",
+            text_color=("#2B2B2B", "#E0E0E0"),
+            command=self.show_earlier
+        )
         
         # Chat History
         self.chat_history = ctk.CTkTextbox(
@@ -61,15 +91,27 @@ class ChatBox(ctk.CTkFrame):
         # Configure tags for clickable links
         self.chat_history.tag_config("file_link", foreground="blue", underline=True)
         self.chat_history.tag_bind("file_link", "<Button-1>", self.open_file)
-        
+        self.chat_history.tag_config("page_link", foreground="blue", underline=True)
+        self.chat_history.tag_bind("page_link", "<Button-1>", self.turn_page)
+
+        # Message model; only the newest ``window`` messages are in the textbox
+        self.messages: deque = deque(maxlen=MAX_MESSAGES)
+        self.rendered: deque = deque()
+        self.listings: Dict[int, ChatMessage] = {}  # rendered file listings by message id
+        self.window = RENDER_WINDOW
+        self._ids = itertools.count()
+        self._pending: List[ChatMessage] = []
+        self._flush_scheduled = False
+
         self.update()  # Ensures winfo_width is accurate
         self.typing_indicator = None
     
     def clear_chat(self):
         """Clear the chat history completely"""
-        self.chat_history.configure(state="normal")
-        self.chat_history.delete(1.0, "end")
-        self.chat_history.configure(state="disabled")
+        self.messages.clear()
+        self._pending = []
+        self.window = RENDER_WINDOW
+        self._rerender()
         self.add_message("System", "Chat history cleared. Start a new conversation.")
 
     def send_message(self):
@@ -83,30 +125,156 @@ class ChatBox(ctk.CTkFrame):
 
     def add_message(self, sender: str, message: str):
         """Add a message to the chat history"""
+        self._append(ChatMessage(next(self._ids), sender, message))
+
+    def add_file_response(self, files: List[Dict]):
+        """Add a file listing; it renders one page of clickable paths at a time however long it is"""
+        if files:
+            self._append(ChatMessage(next(self._ids), "", "", list(files)))
+
+    def _append(self, message: ChatMessage):
+        """Queue a message; everything queued before the next idle is written in one edit."""
+        self.messages.append(message)
+        self._pending.append(message)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.after_idle(self._flush)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
         self.chat_history.configure(state="normal")
-        self.chat_history.insert("end", f"{sender}: {message}\n\n")
+        for message in pending:
+            self._render(message)
+        self._trim()
         self.chat_history.configure(state="disabled")
         self.chat_history.see("end")
 
+    def _render(self, message: ChatMessage):
+        """Write ``message`` at the end of the textbox (textbox must be editable)."""
+        box = self.chat_history
+        mark = f"msg{message.id}"
+        box.mark_set(mark, "end-1c")
+        box.mark_gravity(mark, "left")
+        if message.files is None:
+            box.insert("end", f"{message.sender}: {message.text}\n\n")
+        else:
+            self._render_listing(message, "end-1c")
+            # The separator sits outside the listing's marks, so repaging never moves the next message
+            box.insert("end", "\n")
+            self.listings[message.id] = message
+        self.rendered.append(message)
+
+    def _render_listing(self, message: ChatMessage, at: str):
+        """Write the current page of a listing at ``at`` and mark where it ends."""
+        box = self.chat_history
+        files = message.files
+        box.mark_set("render", at)
+        box.mark_gravity("render", "right")
+        block = f"list{message.id}"
+        page_end = min(message.offset + FILE_PAGE_SIZE, len(files))
+        for i in range(message.offset, page_end):
+            box.insert("render", f"• {files[i]['path']}\n", ("file_link", block))
+        if len(files) > FILE_PAGE_SIZE:
+            box.insert("render", f"{message.offset + 1}-{page_end} of {len(files)} files  ")
+            if message.offset > 0:
+                box.insert("render", "Previous", ("page_link", f"prev{message.id}"))
+                box.insert("render", "  ")
+            if page_end < len(files):
+                box.insert("render", "Next", ("page_link", f"next{message.id}"))
+            box.insert("render", "\n")
+        end = f"end{message.id}"
+        box.mark_set(end, "render")
+        box.mark_gravity(end, "left")
+        box.mark_unset("render")
+
+    def _trim(self):
+        """Drop the oldest rendered messages beyond the render window."""
+        box = self.chat_history
+        while len(self.rendered) > self.window:
+            oldest = self.rendered.popleft()
+            box.delete(f"msg{oldest.id}", f"msg{self.rendered[0].id}")
+            self._forget(oldest)
+        self._update_earlier_button()
+
+    def _forget(self, message: ChatMessage):
+        box = self.chat_history
+        box.mark_unset(f"msg{message.id}")
+        if self.listings.pop(message.id, None) is not None:
+            box.mark_unset(f"end{message.id}")
+            for tag in (f"list{message.id}", f"prev{message.id}", f"next{message.id}"):
+                box.tag_delete(tag)
+
+    def _rerender(self):
+        """Redraw the newest ``window`` messages from the model."""
+        for message in self.rendered:
+            self._forget(message)
+        self.rendered.clear()
+        self.typing_indicator = None
+        self.chat_history.configure(state="normal")
+        self.chat_history.delete(1.0, "end")
+        pending = set(id(m) for m in self._pending)
+        for message in [m for m in self.messages if id(m) not in pending][-self.window:]:
+            self._render(message)
+        self.chat_history.configure(state="disabled")
+        self._update_earlier_button()
+
+    def _update_earlier_button(self):
+        if len(self.messages) - len(self._pending) > len(self.rendered):
+            self.earlier_button.pack(side="right")
+        else:
+            self.earlier_button.pack_forget()
+
+    def show_earlier(self):
+        """Widen the render window to bring older messages back from the model."""
+        self._flush()
+        self.window = min(self.window + RENDER_WINDOW, MAX_MESSAGES)
+        self._rerender()
+        self.chat_history.see(1.0)
+
+    def _listing_at(self, event) -> Tuple[Optional[ChatMessage], str, Tuple[str, ...]]:
+        index = self.chat_history.index(f"@{event.x},{event.y}")
+        tags = self.chat_history.tag_names(index)
+        for tag in tags:
+            for prefix in ("list", "prev", "next"):
+                if tag.startswith(prefix) and tag[len(prefix):].isdigit():
+                    return self.listings.get(int(tag[len(prefix):])), index, tags
+        return None, index, tags
+
+    def turn_page(self, event):
+        """Replace a listing's page in place with the previous or next one."""
+        message, _, tags = self._listing_at(event)
+        if message is None:
+            return
+        step = -FILE_PAGE_SIZE if f"prev{message.id}" in tags else FILE_PAGE_SIZE
+        message.offset = max(0, min(message.offset + step, len(message.files) - 1))
+        box = self.chat_history
+        box.configure(state="normal")
+        box.delete(f"msg{message.id}", f"end{message.id}")
+        self._render_listing(message, f"msg{message.id}")
+        box.configure(state="disabled")
+
     def show_typing(self):
         """Show 'AI is typing...' indicator."""
-        if self.typing_indicator:
-            self.chat_history.configure(state="normal")
-            self.chat_history.delete("end-3c", "end")  # Remove previous typing indicator
-            self.chat_history.configure(state="disabled")
-        
+        self._flush()  # the indicator goes after anything still queued
+        self.hide_typing()
         self.chat_history.configure(state="normal")
-        self.typing_indicator = self.chat_history.insert("end", "AI is typing...\n")
+        self.chat_history.insert("end", "AI is typing...\n", "typing")
         self.chat_history.configure(state="disabled")
         self.chat_history.see("end")
+        self.typing_indicator = True
         self.master.after(1500, self.hide_typing)  # Hide after 1.5 seconds
 
     def hide_typing(self):
         """Hide typing indicator."""
         if self.typing_indicator:
-            self.chat_history.configure(state="normal")
-            self.chat_history.delete("end-2l", "end")  # Remove typing indicator
-            self.chat_history.configure(state="disabled")
+            ranges = self.chat_history.tag_ranges("typing")
+            if ranges:
+                self.chat_history.configure(state="normal")
+                self.chat_history.delete(ranges[0], ranges[-1])
+                self.chat_history.configure(state="disabled")
             self.typing_indicator = None
 
     def send_suggestion(self, text: str):
@@ -114,22 +282,13 @@ class ChatBox(ctk.CTkFrame):
         self.user_input.delete(0, "end")
         self.user_input.insert(0, text)
         self.send_message()
-    
-    def open_file(self, event):
-        """Handle clicking on file paths"""
-        index = self.chat_history.index(f"@{event.x},{event.y}")
-        line = self.chat_history.get(index + " linestart", index + " lineend")
-        if line.startswith(("/", "C:", "D:", "E:")):
-            webbrowser.open(f"file://{line.strip()}")
-    
-    def add_file_response(self, files: List[Dict]):
-        """Format file listings with clickable paths"""
-        self.chat_history.configure(state="normal")
-        for file in files[:5]:  # Show first 5 files
-            path = file["path"]
-            self.chat_history.insert("end", f"• {path}\n", "file_link")
-        if len(files) > 5:
-            self.chat_history.insert("end", f"... and {len(files)-5} more files\n")
-        self.chat_history.configure(state="disabled")
-        self.chat_history.see("end")
 
+    def open_file(self, event):
+        """Open the clicked listing entry; its line offset in the block gives the record"""
+        message, index, _ = self._listing_at(event)
+        if message is None:
+            return
+        start_line = int(self.chat_history.index(f"msg{message.id}").split(".")[0])
+        entry = message.offset + int(index.split(".")[0]) - start_line
+        if 0 <= entry < len(message.files):
+            webbrowser.open(f"file://{message.files[entry]['path']}")
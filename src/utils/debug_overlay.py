@@ -1,58 +1,185 @@
 import tkinter as tk
+import time
+
+from src.utils.profiler import profiler
+from src.utils.paths import app_data_dir
+
+STALL_INTERVAL_MS = 50
+STALL_THRESHOLD_MS = 100
+
+OVERLAY_KEY_COLOR = "#ff00fe"  # Painted pixels of this color are see-through
+OUTLINE_COLOR = "red"
+HOVER_COLOR = "yellow"
+EVENT_SEQUENCES = ("<Configure>", "<Map>", "<Unmap>", "<Destroy>", "<Motion>")
 
 class DebugOverlay:
+    """F12 widget outlines drawn on one transparent canvas above the window.
+
+    Outlines are tracked per widget and only recomputed when Tk reports a
+    <Configure>/<Map> for that widget (or one of its ancestors), so an idle
+    window costs nothing while debug mode is on.
+    """
+
     def __init__(self, root):
         self.root = root
         self.debug_enabled = False
         self.tooltip = None
-        self.overlays = []
+        self.overlays = {}  # widget -> canvas rectangle id
+        self.overlay_window = None
+        self.canvas = None
+        self.hovered = None
+        self._dirty = set()
+        self._flush_pending = False
+        self._bindings = []
+        self.profile_panel = None
+        self.profile_text = None
+        self._last_tick = None
         self.root.bind("<F12>", self.toggle_debug)
+        self.root.bind("<Control-F12>", self.toggle_profiling)
 
     def toggle_debug(self, event=None):
         self.debug_enabled = not self.debug_enabled
         if self.debug_enabled:
-            self.update_overlays_loop()
+            self.create_overlays()
         else:
             self.remove_overlays()
 
-    def update_overlays_loop(self):
-        self.remove_overlays()
-        self.create_overlays(self.root)
-        if self.debug_enabled:
-            self.root.after(500, self.update_overlays_loop)
+    def create_overlays(self):
+        """Build the overlay layer, outline every widget once and start listening."""
+        self.overlay_window = tk.Toplevel(self.root)
+        self.overlay_window.overrideredirect(True)
+        self.overlay_window.attributes("-topmost", True)
+        try:
+            self.overlay_window.attributes("-transparentcolor", OVERLAY_KEY_COLOR)
+        except tk.TclError:
+            # No color keying outside Windows; a translucent layer is the best we can do
+            self.overlay_window.attributes("-alpha", 0.35)
+        self.canvas = tk.Canvas(
+            self.overlay_window, bg=OVERLAY_KEY_COLOR, highlightthickness=0, borderwidth=0
+        )
+        self.canvas.pack(fill="both", expand=True)
+        self._place_overlay_window()
 
-    def create_overlays(self, widget):
+        for widget in self._walk(self.root):
+            self.add_overlay(widget)
+        self._dirty.update(self.overlays)
+        self._flush()
+
+        for sequence in EVENT_SEQUENCES:
+            funcid = self.root.bind_all(sequence, self._on_event, add="+")
+            self._bindings.append((sequence, funcid))
+
+    def _walk(self, widget):
         for child in widget.winfo_children():
-            self.add_overlay(child)
-            self.create_overlays(child)
+            if self._is_own(child):
+                continue
+            yield child
+            yield from self._walk(child)
+
+    def _is_own(self, widget) -> bool:
+        toplevel = widget.winfo_toplevel()
+        return toplevel in (self.overlay_window, self.tooltip, self.profile_panel)
 
     def add_overlay(self, widget):
-        try:
-            widget.update_idletasks()
+        if widget in self.overlays:
+            return
+        self.overlays[widget] = self.canvas.create_rectangle(
+            0, 0, 0, 0, outline=OUTLINE_COLOR, width=2, state="hidden"
+        )
 
-            x = widget.winfo_x()
-            y = widget.winfo_y()
-            w = widget.winfo_width()
-            h = widget.winfo_height()
-            parent = widget.nametowidget(widget.winfo_parent())
+    def _on_event(self, event):
+        widget = event.widget
+        if not isinstance(widget, tk.Misc) or not self.debug_enabled:
+            return
+        if widget is self.root:
+            if event.type == tk.EventType.Configure:
+                self._place_overlay_window()
+            return
+        if event.type == tk.EventType.Motion:
+            self._on_hover(event, widget)
+            return
+        if event.type == tk.EventType.Destroy:
+            item = self.overlays.pop(widget, None)
+            if item is not None:
+                self.canvas.delete(item)
+            self._dirty.discard(widget)
+            return
+        if widget not in self.overlays:
+            if widget.winfo_toplevel() is not self.root or self._is_own(widget):
+                return
+            self.add_overlay(widget)
+        self._dirty.add(widget)
+        if not self._flush_pending:
+            self._flush_pending = True
+            self.root.after_idle(self._flush)
 
-            overlay = tk.Frame(parent, bg="", highlightbackground="red", highlightthickness=2)
-            overlay.place(x=x, y=y, width=w, height=h)
-            overlay.lift(widget)
+    def _flush(self):
+        """Re-place outlines for dirty widgets and their descendants."""
+        self._flush_pending = False
+        if not self.debug_enabled:
+            return
+        base_x = self.root.winfo_rootx()
+        base_y = self.root.winfo_rooty()
+        pending = list(self._dirty)
+        self._dirty.clear()
+        seen = set()
+        while pending:
+            widget = pending.pop()
+            if widget in seen or widget not in self.overlays:
+                continue
+            seen.add(widget)
+            # Children move with their parent without getting a <Configure> of their own
+            pending.extend(widget.winfo_children())
+            item = self.overlays[widget]
+            try:
+                if not widget.winfo_ismapped():
+                    self.canvas.itemconfigure(item, state="hidden")
+                    continue
+                x = widget.winfo_rootx() - base_x
+                y = widget.winfo_rooty() - base_y
+                self.canvas.coords(item, x, y, x + widget.winfo_width(), y + widget.winfo_height())
+                self.canvas.itemconfigure(item, state="normal")
+            except tk.TclError:
+                continue
 
-            widget_name = getattr(widget, "_name", widget.__class__.__name__)
-            overlay.bind("<Enter>", lambda e, w=widget, name=widget_name: self.show_tooltip(e, w, name))
-            overlay.bind("<Leave>", self.hide_tooltip)
+    def _place_overlay_window(self):
+        self.overlay_window.geometry(
+            f"{self.root.winfo_width()}x{self.root.winfo_height()}"
+            f"+{self.root.winfo_rootx()}+{self.root.winfo_rooty()}"
+        )
 
-            self.overlays.append(overlay)
-        except Exception as e:
-            print(f"[Overlay Error] {e}")
+    def _on_hover(self, event, widget):
+        if widget is self.hovered:
+            return
+        if self.hovered in self.overlays:
+            self.canvas.itemconfigure(self.overlays[self.hovered], outline=OUTLINE_COLOR)
+        self.hide_tooltip()
+        self.hovered = widget if widget in self.overlays else None
+        if self.hovered is not None:
+            self.canvas.itemconfigure(self.overlays[widget], outline=HOVER_COLOR)
+            self.canvas.tag_raise(self.overlays[widget])
+            widget_name = getattr(widget, "_name", widget.__class__.__name__)
+            self.show_tooltip(event, widget, widget_name)
 
     def remove_overlays(self):
-        for overlay in self.overlays:
-            overlay.destroy()
-        self.overlays.clear()
+        for sequence, funcid in self._bindings:
+            self._unbind_all(sequence, funcid)
+        self._bindings.clear()
         self.hide_tooltip()
+        if self.overlay_window:
+            self.overlay_window.destroy()
+        self.overlay_window = None
+        self.canvas = None
+        self.overlays.clear()
+        self._dirty.clear()
+        self.hovered = None
+
+    def _unbind_all(self, sequence, funcid):
+        """Remove only our handler from the "all" bind tag (tkinter's unbind_all drops every handler)."""
+        script = self.root.tk.call("bind", "all", sequence)
+        kept = "\n".join(line for line in script.split("\n") if funcid not in line)
+        self.root.tk.call("bind", "all", sequence, kept)
+        self.root.deletecommand(funcid)
 
     def show_tooltip(self, event, widget, name):
         x, y = event.x_root + 10, event.y_root + 10
@@ -62,6 +189,7 @@ class DebugOverlay:
 
         self.tooltip = tk.Toplevel(self.root)
         self.tooltip.overrideredirect(True)
+        self.tooltip.attributes("-topmost", True)
         self.tooltip.geometry(f"+{x}+{y}")
         label = tk.Label(self.tooltip, text=text, bg="yellow", fg="black", font=("Arial", 9))
         label.pack()
@@ -70,3 +198,70 @@ class DebugOverlay:
         if self.tooltip:
             self.tooltip.destroy()
             self.tooltip = None
+
+    def toggle_profiling(self, event=None):
+        """Start/stop profiling the worker threads and show the profile panel."""
+        if profiler.enabled:
+            profiler.stop()
+            if self.profile_panel:
+                self.profile_panel.destroy()
+                self.profile_panel = None
+            return
+        profiler.reset()
+        profiler.start()
+        self._build_profile_panel()
+        self._last_tick = time.perf_counter()
+        self.root.after(STALL_INTERVAL_MS, self._stall_tick)
+        self._refresh_profile_panel()
+
+    def _stall_tick(self):
+        """Heartbeat on the Tk loop; a late tick means the loop was blocked."""
+        if not profiler.enabled:
+            return
+        now = time.perf_counter()
+        stall_ms = (now - self._last_tick) * 1000 - STALL_INTERVAL_MS
+        if stall_ms > STALL_THRESHOLD_MS:
+            profiler.record_stall(stall_ms)
+        self._last_tick = now
+        self.root.after(STALL_INTERVAL_MS, self._stall_tick)
+
+    def _build_profile_panel(self):
+        self.profile_panel = tk.Toplevel(self.root)
+        self.profile_panel.title("Profiler")
+        self.profile_panel.geometry("640x420")
+        self.profile_panel.attributes("-topmost", True)
+        self.profile_panel.protocol("WM_DELETE_WINDOW", self.toggle_profiling)
+
+        buttons = tk.Frame(self.profile_panel)
+        buttons.pack(fill="x")
+        tk.Button(buttons, text="Export", command=self.export_profiles).pack(side="left", padx=4, pady=4)
+        tk.Button(buttons, text="Reset", command=profiler.reset).pack(side="left", pady=4)
+
+        self.profile_text = tk.Text(self.profile_panel, font=("Consolas", 9), wrap="none")
+        self.profile_text.pack(fill="both", expand=True)
+
+    def _refresh_profile_panel(self):
+        if not profiler.enabled or not self.profile_panel:
+            return
+        stalls = profiler.stall_summary()
+        lines = [
+            f"Tk stalls > {STALL_THRESHOLD_MS} ms: {stalls['count']}  "
+            f"(max {stalls['max_ms']:.0f} ms, mean {stalls['mean_ms']:.0f} ms)",
+            ""
+        ]
+        top = profiler.top_functions(10)
+        if not top:
+            lines.append("No profiled work yet. Run a scan, duplicate search or chat query.")
+        for name, rows in top.items():
+            lines.append(f"[{name}]  {'calls':>9} {'own s':>8} {'cum s':>8}")
+            for label, calls, own, cumulative in rows:
+                lines.append(f"  {label[:60]:<60} {calls:>9} {own:>8.3f} {cumulative:>8.3f}")
+            lines.append("")
+
+        self.profile_text.delete("1.0", "end")
+        self.profile_text.insert("end", "\n".join(lines))
+        self.root.after(1000, self._refresh_profile_panel)
+
+    def export_profiles(self):
+        paths = profiler.export(app_data_dir("profiles"))
+        self.profile_text.insert("1.0", f"Exported {len(paths)} files to {app_data_dir('profiles')}\n\n")
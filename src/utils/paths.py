@@ -0,0 +1,9 @@
+import os
+
+
+def app_data_dir(*parts: str) -> str:
+    """Return (and create) the per-user data directory for the app."""
+    base = os.getenv("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    path = os.path.join(base, "StorageAssistant", *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
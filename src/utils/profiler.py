@@ -0,0 +1,116 @@
+import io
+import os
+import time
+import pstats
+import cProfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+MAX_STALLS = 200
+
+
+class ThreadProfiler:
+    """Collect cProfile stats for named worker threads while profiling is on.
+
+    Work is wrapped in ``with profiler.profile("scan"):``; when profiling is
+    off the context manager costs a single attribute check.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._stats: Dict[str, pstats.Stats] = {}
+        self.stalls: List[Tuple[float, float]] = []  # (timestamp, stall ms)
+
+    def start(self) -> None:
+        self.enabled = True
+
+    def stop(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self.stalls.clear()
+
+    @contextmanager
+    def profile(self, name: str):
+        """Profile the enclosed block and merge it into the stats for ``name``."""
+        if not self.enabled:
+            yield
+            return
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:
+            # Another profiler is already active on this thread
+            yield
+            return
+        try:
+            yield
+        finally:
+            prof.disable()
+            with self._lock:
+                if name in self._stats:
+                    self._stats[name].add(prof)
+                else:
+                    self._stats[name] = pstats.Stats(prof)
+
+    def record_stall(self, stall_ms: float) -> None:
+        with self._lock:
+            self.stalls.append((time.time(), stall_ms))
+            if len(self.stalls) > MAX_STALLS:
+                del self.stalls[0]
+
+    def stall_summary(self) -> Dict:
+        with self._lock:
+            durations = [ms for _, ms in self.stalls]
+        if not durations:
+            return {"count": 0, "max_ms": 0.0, "mean_ms": 0.0}
+        return {
+            "count": len(durations),
+            "max_ms": max(durations),
+            "mean_ms": sum(durations) / len(durations),
+        }
+
+    def top_functions(self, n: int = 10) -> Dict[str, List[Tuple[str, int, float, float]]]:
+        """Per thread name: ``(function, calls, own seconds, cumulative seconds)``."""
+        result = {}
+        with self._lock:
+            for name, stats in self._stats.items():
+                rows = []
+                for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+                    label = f"{func} ({os.path.basename(filename)}:{line})"
+                    rows.append((label, nc, tt, ct))
+                rows.sort(key=lambda r: -r[3])
+                result[name] = rows[:n]
+        return result
+
+    def export(self, directory: str) -> List[str]:
+        """Write one ``.prof`` file per thread plus a text summary; return the paths."""
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        paths = []
+        summary = io.StringIO()
+        with self._lock:
+            for name, stats in self._stats.items():
+                path = os.path.join(directory, f"profile_{stamp}_{name}.prof")
+                stats.dump_stats(path)
+                paths.append(path)
+                summary.write(f"===== {name} =====\n")
+                pstats.Stats(path, stream=summary).sort_stats("cumulative").print_stats(30)
+        stalls = self.stall_summary()
+        summary.write(
+            f"===== Tk event loop =====\n"
+            f"Stalls: {stalls['count']}, max {stalls['max_ms']:.1f} ms, mean {stalls['mean_ms']:.1f} ms\n"
+        )
+        for timestamp, ms in list(self.stalls):
+            summary.write(f"{time.strftime('%H:%M:%S', time.localtime(timestamp))}  {ms:.1f} ms\n")
+        summary_path = os.path.join(directory, f"profile_{stamp}_summary.txt")
+        with open(summary_path, "w", encoding="utf-8") as f:
+            f.write(summary.getvalue())
+        paths.append(summary_path)
+        return paths
+
+
+profiler = ThreadProfiler()